@@ -14,11 +14,74 @@ class Settings(BaseSettings):
     MONGODB_URL: str = ""
     MYSQL_URL: str = ""
     SECRET_KEY: str = "your-secret-key"
+    MAX_UPLOAD_SIZE_MB: int = 500
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    MAX_DECOMPRESSED_SIZE_MB: int = 5000
+    MAX_DECOMPRESSION_RATIO: float = 200
+    CSV_SNIFF_SAMPLE_SIZE: int = 64 * 1024
+    CSV_ARROW_ENGINE: bool = True
+    CSV_ARROW_BLOCK_SIZE: int = 4 * 1024 * 1024
+    CSV_ARROW_DTYPES: bool = False
+    EXCEL_MAX_WORKERS: int = 4
+    EXCEL_ROW_CHUNK: int = 50000
+    JSON_BATCH_SIZE: int = 50000
+    DATASET_STORE_DIR: str = "data/datasets"
+    DATASET_PREVIEW_ROWS: int = 100
+    DEFAULT_PAYLOAD_FORMAT: str = "columns"
+    DTYPE_OPTIMIZATION: bool = True
+    CATEGORY_MAX_CARDINALITY_RATIO: float = 0.5
+    DATETIME_SAMPLE_SIZE: int = 200
+    UPLOAD_CACHE_ENABLED: bool = True
+    UPLOAD_CACHE_MAX_ENTRIES: int = 128
+    UPLOAD_CACHE_MAX_MB: int = 2048
+    BACKGROUND_INGEST_THRESHOLD_MB: int = 50
+    INGEST_MAX_WORKERS: int = 2
+    INGEST_JOB_TTL: int = 3600
+    # Shared by every worker so status polls can land on any of them
+    INGEST_JOB_DIR: str = "data/jobs"
+    LOG_BATCH_SIZE: int = 50000
+    LOG_MAX_TEMPLATES: int = 1000
+    LOG_TEMPLATE_SIMILARITY: float = 0.5
+    LOG_MAX_FIELDS: int = 64
+    API_TIMEOUT: float = 30.0
+    API_MAX_CONNECTIONS: int = 20
+    API_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    API_PAGE_CONCURRENCY: int = 4
+    API_MAX_RETRIES: int = 3
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_IDLE_TIMEOUT: float = 600.0
+    DB_HEALTH_CHECK_INTERVAL: float = 60.0
+    DB_REGISTRY_MAX_ENTRIES: int = 32
+    DB_PREWARM_CONNECTIONS: int = 2
+    DB_FETCH_SIZE: int = 10000
+    DB_MAX_WORKERS: int = 8
+    DB_QUERY_TIMEOUT: float = 300.0
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_TTL: float = 300.0
+    QUERY_CACHE_MAX_ENTRIES: int = 256
+    QUERY_CACHE_MAX_MB: int = 256
+    # Connection sessions hold credentials and live in the memory of one
+    # process only; run a single uvicorn worker when clients use connection_id
+    SESSION_IDLE_TIMEOUT: float = 600.0
+    SESSION_MAX_ENTRIES: int = 1024
+
+    # Report profiling pushed down into the source database
+    PROFILE_SAMPLE_ROWS: int = 10000
+    PROFILE_TOP_K: int = 20
+    PROFILE_MAX_CORRELATION_COLUMNS: int = 10
+    PROFILE_MAX_TRACKED_VALUES: int = 1000
 
     @property
     def allowed_hosts_list(self) -> List[str]:
         return [host.strip() for host in self.ALLOWED_HOSTS.split(",")]
 
+    @property
+    def max_upload_size_bytes(self) -> int:
+        return self.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
@@ -41,4 +41,58 @@ class ConfigurationError(BaseError):
     """Raised when there's a configuration error"""
     def __init__(self, message: str, missing_keys: list = None):
         self.missing_keys = missing_keys or []
-        super().__init__(message) 
\ No newline at end of file
+        super().__init__(message) 
+
+class DecompressionLimitError(BaseError):
+    """Raised when a compressed upload inflates past the size or ratio limit"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+class JobNotFoundError(BaseError):
+    """Raised when an ingest job ID is unknown or has expired"""
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        super().__init__(f"Ingest job not found: {job_id}")
+
+class DatasetNotFoundError(BaseError):
+    """Raised when a stored dataset cannot be found"""
+    def __init__(self, dataset_id: str):
+        self.dataset_id = dataset_id
+        super().__init__(f"Dataset not found: {dataset_id}")
+
+class ConnectionSessionNotFoundError(BaseError):
+    """Raised when a connection ID is unknown or its session has expired"""
+    def __init__(self, connection_id: str):
+        self.connection_id = connection_id
+        super().__init__(f"Connection not found or expired: {connection_id}")
+
+class DatasetRefreshError(BaseError):
+    """Raised when a dataset cannot be refreshed from its source"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+class MultiSourceError(BaseError):
+    """Raised when sources of a multi-source request fail to load"""
+    def __init__(self, message: str, errors: dict = None):
+        self.message = message
+        self.errors = errors or {}
+        super().__init__(self.message)
+
+class ExportError(BaseError):
+    """Raised when report export fails"""
+    def __init__(self, message: str, details: dict = None):
+        self.message = message
+        self.details = details or {}
+        super().__init__(self.message)
+
+class QueryCancelledError(BaseError):
+    """Raised when a running database query is cancelled, e.g. the client went away"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+class QueryTimeoutError(QueryCancelledError):
+    """Raised when a database query runs past its timeout"""
+    pass
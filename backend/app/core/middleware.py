@@ -0,0 +1,159 @@
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Iterable, Optional
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UploadSizeLimitMiddleware:
+    """Reject upload bodies as soon as they grow past the configured limit.
+
+    Starlette already spools multipart files to a temporary file while the
+    body arrives, so the only thing missing is a running byte count. The
+    count happens on the raw ``receive`` channel, which means oversized
+    requests are cut off mid-stream instead of after the whole body has
+    been written to disk.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str] = ("/api/upload",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        limit_mb = self.max_bytes // (1024 * 1024)
+        detail = f"File size exceeds {limit_mb}MB limit"
+
+        # Fast path: trust an explicit Content-Length when the client sends one
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejected upload with Content-Length {content_length.decode()}")
+            await self._reject(scope, receive, send, detail)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.warning(f"Upload aborted after {received} bytes")
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=detail
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, detail: str) -> None:
+        response = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": detail}
+        )
+        await response(scope, receive, send)
+
+class UploadDigestMiddleware:
+    """SHA-256 of each uploaded file, computed while the body streams in.
+
+    The multipart body is parsed alongside Starlette's own parser on the
+    raw ``receive`` channel and only file parts are hashed, so the upload
+    cache can key on content without reading the spooled file back.
+    Digests end up in ``request.state.upload_digests`` by form field
+    name; a body this parser cannot follow simply has no digest.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str] = ("/api/upload",)):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        content_type, params = parse_options_header(Headers(scope=scope).get("content-type", ""))
+        if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+            await self.app(scope, receive, send)
+            return
+
+        digests: Dict[str, str] = {}
+        scope.setdefault("state", {})["upload_digests"] = digests
+        parser = _DigestParser(params[b"boundary"], digests)
+
+        async def hashing_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                parser.feed(message.get("body", b""), more=message.get("more_body", False))
+            return message
+
+        await self.app(scope, hashing_receive, send)
+
+class _DigestParser:
+    """Feeds a multipart body through python-multipart, hashing file parts"""
+
+    def __init__(self, boundary: bytes, digests: Dict[str, str]):
+        self.digests = digests
+        self._header_field = b""
+        self._header_value = b""
+        self._name: Optional[str] = None
+        self._digest = None
+        self._failed = False
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+
+    def feed(self, data: bytes, more: bool) -> None:
+        if self._failed:
+            return
+        try:
+            self._parser.write(data)
+            if not more:
+                self._parser.finalize()
+        except Exception as e:
+            # Starlette reports malformed bodies; just stop hashing
+            logger.debug(f"Upload digest skipped: {str(e)}")
+            self._failed = True
+            self.digests.clear()
+
+    def _on_part_begin(self) -> None:
+        self._name, self._digest = None, None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            if b"filename" in options:
+                self._name = options.get(b"name", b"").decode("latin-1")
+                self._digest = hashlib.sha256()
+        self._header_field, self._header_value = b"", b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._digest is not None:
+            self._digest.update(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._digest is not None:
+            self.digests[self._name] = self._digest.hexdigest()
+        self._name, self._digest = None, None
@@ -0,0 +1,63 @@
+from typing import Any
+from datetime import date, datetime, time
+from decimal import Decimal
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    """Fallback for the few types orjson does not serialize natively.
+
+    Called only for values orjson rejects, so plain Python and NumPy data
+    never goes through Python code.
+    """
+    # NaT, pd.NA and friends
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    # pd.Timestamp and other datetime subclasses
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, pd.Timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, Decimal):
+        # NUMERIC values carry more digits than a float holds
+        return str(obj)
+    if isinstance(obj, np.ndarray):
+        # Object, string and datetime arrays with NaT are not handled natively
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Series, pd.Index, pd.Categorical)):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient='list')
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "to_plotly_json"):
+        return obj.to_plotly_json()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Serialize content with orjson, NumPy/pandas aware"""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson.
+
+    NumPy scalars and arrays are serialized natively, NaN/Inf become
+    ``null``, and pandas/Decimal values go through a small fallback.
+    Returning this response directly from a route also skips FastAPI's
+    ``jsonable_encoder`` walk over the payload.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,28 +1,43 @@
-from typing import Union, Dict, Any, List
+from typing import Union, Dict, Any, List, Optional
 import pandas as pd
 from fastapi import UploadFile
 import json
 import os
 import io
-import requests
-from sqlalchemy import create_engine
 import yaml
 from datetime import datetime
 import numpy as np
+import asyncio
+import httpx
+from ..utils.csv_reader import read_csv
+from ..utils.payload import encode_frame
+from ..utils.datetime_inference import DatetimeInferrer
+from ..services.api_source import ApiSource
+from ..services.connection_registry import get_connection_registry
+from ..services.database_executor import CancellationToken, get_database_executor
+from ..services.database_service import DatabaseService
+from ..services.dataset_store import DatasetStore
+from ..schemas.api_source import ApiSourceRequest
+from ..core.config import get_settings
+
+settings = get_settings()
 
 class DataProcessor:
     def __init__(self):
-        pass
+        self.datetime_inferrer = DatetimeInferrer()
+        self.dataset_store = DatasetStore()
         
     async def process_file(self, file: UploadFile) -> Dict[str, Any]:
-        content = await file.read()
         file_extension = file.filename.split('.')[-1].lower()
+        # CSV is parsed straight from the spooled upload, so skip the copy
+        content = await file.read() if file_extension != 'csv' else None
         
         try:
             data = None
             if file_extension in ['csv', 'xlsx', 'xls']:
                 if file_extension == 'csv':
-                    df = pd.read_csv(io.BytesIO(content))
+                    file.file.seek(0)
+                    df = read_csv(file.file)
                 else:
                     df = pd.read_excel(io.BytesIO(content))
                 data = self._process_dataframe(df)
@@ -72,14 +87,9 @@ class DataProcessor:
     def _process_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Process DataFrame and detect its characteristics"""
         
-        # Detect date columns and convert them
-        date_columns = []
-        for col in df.columns:
-            try:
-                df[col] = pd.to_datetime(df[col])
-                date_columns.append(col)
-            except:
-                continue
+        # Detect date columns from a sample and parse only those, each with
+        # its cached explicit format
+        date_columns = self.datetime_inferrer.convert(df)
 
         # Detect numeric columns
         numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
@@ -100,11 +110,15 @@ class DataProcessor:
         return {
             "type": "structured",
             "data_type": data_type,
-            "data": df.to_dict(orient='records'),
+            "data": encode_frame(df, settings.DEFAULT_PAYLOAD_FORMAT),
             "metadata": {
                 "date_columns": date_columns,
                 "numeric_columns": numeric_columns,
                 "categorical_columns": categorical_columns,
+                "datetime_formats": {
+                    str(col): self.datetime_inferrer.formats.get(str(col))
+                    for col in date_columns
+                },
                 "statistics": stats
             }
         }
@@ -122,30 +136,72 @@ class DataProcessor:
         else:
             return 'categorical'
 
-    async def process_api_data(self, api_url: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Process data from external APIs"""
+    async def process_api_data(
+        self,
+        api_url: str,
+        params: Dict[str, Any] = None,
+        source: Optional[ApiSourceRequest] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ) -> Dict[str, Any]:
+        """Process data from external APIs.
+
+        Pages are fetched over the shared async connection pool (or
+        ``client``), following ``source.pagination``, and written to the
+        dataset store batch by batch.
+        """
         try:
-            response = requests.get(api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Try to convert to DataFrame if it's a list
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-                return self._process_dataframe(df)
+            request = source or ApiSourceRequest(url=api_url, params=params or {})
+            api_source = ApiSource(request, client=client)
+            writer = self.dataset_store.writer({
+                "source": {"type": "api", "url": request.url, "pagination": request.pagination.type}
+            })
+            head = None
+            try:
+                async for df in api_source.iter_frames(settings.JSON_BATCH_SIZE):
+                    if head is None:
+                        head = df.head(settings.DATASET_PREVIEW_ROWS)
+                    # Keep Parquet encoding off the event loop
+                    await asyncio.to_thread(writer.write, df)
+                
+                if head is None:
+                    # No record list in the response; return it as it is
+                    writer.abort()
+                    return {
+                        "type": "unstructured",
+                        "data": api_source.first_body
+                    }
+                dataset_id = writer.commit()
+            except BaseException:
+                writer.abort()
+                raise
             
-            return {
-                "type": "unstructured",
-                "data": data
-            }
+            result = self._process_dataframe(head)
+            result["dataset_id"] = dataset_id
+            # The preview is only the head; count every stored row
+            result["metadata"]["statistics"]["row_count"] = writer.rows
+            result["metadata"].update({
+                "rows": writer.rows,
+                "columns": list(writer.dtypes),
+                "dtypes": writer.dtypes,
+                "pages": api_source.pages_fetched,
+                "preview_rows": len(head)
+            })
+            return result
         except Exception as e:
             raise Exception(f"Error fetching API data: {str(e)}")
 
     async def process_database(self, connection_string: str, query: str) -> Dict[str, Any]:
         """Process data from databases"""
         try:
-            engine = create_engine(connection_string)
-            df = pd.read_sql(query, engine)
+            # Stops the statement on the server too if the executor times out
+            token = CancellationToken()
+
+            def read() -> pd.DataFrame:
+                # The registry may ping the pool; keep that off the event loop
+                engine = get_connection_registry().engine(connection_string)
+                return DatabaseService.read_sql(engine, query, token=token, timeout=settings.DB_QUERY_TIMEOUT)
+
+            df = await get_database_executor().run(read, timeout=settings.DB_QUERY_TIMEOUT, token=token)
             return self._process_dataframe(df)
         except Exception as e:
             raise Exception(f"Error querying database: {str(e)}")
\ No newline at end of file
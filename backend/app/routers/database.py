@@ -1,38 +1,321 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from typing import Dict, Any, AsyncIterator, Callable, Optional
+import logging
+import pandas as pd
+from ..services.connection_sessions import get_session_store
+from ..services.database_connector import DatabaseConnector
 from ..services.database_service import DatabaseService
-from ..schemas.database import DatabaseConnectionRequest, DatabaseResponse
+from ..services.multi_source import MultiSourceLoader
+from ..services.dataset_store import DatasetStore, DatasetWriter
+from ..services.query_cache import CachedQuery, get_query_cache, is_read_only
+from ..schemas.database import (
+    DatabaseConnectionRequest,
+    DatabaseResponse,
+    MultiSourceRequest,
+    QueryRequest,
+    QueryResponse
+)
 from ..core.config import get_settings
 from ..utils.data_processor import DataProcessor
+from ..utils.payload import (
+    ARROW_STREAM_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    ArrowStreamEncoder,
+    negotiate_payload_format,
+    to_ndjson
+)
+from ..core.responses import FastJSONResponse, dumps
+from ..core.exceptions import (
+    ConnectionSessionNotFoundError,
+    MultiSourceError,
+    QueryCancelledError,
+    QueryTimeoutError
+)
 
 router = APIRouter(tags=["database"])
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
-@router.post("/connect", response_model=DatabaseResponse)
-async def connect_database(request: DatabaseConnectionRequest):
-    """Connect to database and execute query"""
+_STREAM_MEDIA_TYPES = {"ndjson": NDJSON_MEDIA_TYPE, "arrow": ARROW_STREAM_MEDIA_TYPE}
+
+# Routes return FastJSONResponse themselves; the models only document the body
+@router.post("/connect", response_class=FastJSONResponse, responses={200: {"model": DatabaseResponse}})
+async def connect_database(
+    request: DatabaseConnectionRequest,
+    http_request: Request,
+    accept: Optional[str] = Header(None)
+):
+    """Connect to database and execute query.
+
+    Rows are read from a server-side cursor ``fetch_size`` at a time and
+    stored batch by batch. With ``Accept: application/x-ndjson`` or
+    ``application/vnd.apache.arrow.stream`` they are also streamed back as
+    they arrive; otherwise the response carries the dataset ID and a
+    preview. Queries run on the database executor and are cancelled on
+    timeout or when the client disconnects. Read-only results are cached
+    for ``cache_ttl`` seconds (``QUERY_CACHE_TTL`` by default).
+
+    The returned ``connection_id`` opens a session: follow-up queries can
+    go to ``/api/query`` without the credentials.
+    """
     try:
         db_service = DatabaseService()
-        data_processor = DataProcessor()
-        
-        # Connect and execute query
-        raw_data = await db_service.connect(request.dict())
-        
-        # Process the data
-        processed_data = data_processor.process_data(raw_data)
-        
-        # Determine data type
-        data_type = data_processor.determine_data_type(processed_data["processed_data"])
-        
-        return DatabaseResponse(
-            status="success",
-            data={
-                "type": "structured",
-                "data": processed_data["processed_data"],
-                "data_type": data_type,
-                "metadata": processed_data["metadata"]
+        dataset_store = DatasetStore()
+        query_cache = get_query_cache()
+        payload_format = negotiate_payload_format(accept, allow_streaming=True)
+        streaming = payload_format in _STREAM_MEDIA_TYPES
+
+        params = request.dict()
+        connection_id = db_service.connection_id(params)
+
+        ttl = request.cache_ttl if request.cache_ttl is not None else settings.QUERY_CACHE_TTL
+        cache_key = None
+        if not is_read_only(request.type, request.query):
+            # The statement may change what the connection's cached
+            # queries return
+            query_cache.invalidate(connection_id)
+        elif settings.QUERY_CACHE_ENABLED and ttl > 0:
+            cache_key = query_cache.key(connection_id, request.query, request.parameters)
+
+        cached = query_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None and dataset_store.exists(cached.dataset_id):
+            # Same DSN as a query that succeeded, so the credentials are good
+            get_session_store().open(connection_id, params)
+            if streaming:
+                return StreamingResponse(
+                    _stream_frames(iterate_in_threadpool(dataset_store.iter_batches(cached.dataset_id)), payload_format),
+                    media_type=_STREAM_MEDIA_TYPES[payload_format],
+                    headers=_stream_headers(cached.dataset_id, connection_id, cached=True)
+                )
+            body = cached.bodies.get(payload_format)
+            if body is None:
+                preview = await run_in_threadpool(dataset_store.preview, cached.dataset_id, None, payload_format)
+                body = dumps(_with_preview(cached.response, preview))
+                query_cache.add_body(cache_key, payload_format, body)
+            return Response(content=body, media_type="application/json")
+
+        if streaming:
+            # Starlette cancels the streaming task on disconnect
+            frames = db_service.stream(params)
+        else:
+            frames = db_service.stream(params, http_request)
+        # Run the query up to its first batch here, so connection and
+        # query errors still become an error response
+        first = await frames.__anext__()
+        get_session_store().open(connection_id, params)
+
+        writer = dataset_store.writer({
+            "source": {
+                "type": request.type,
+                "host": request.host,
+                "database": request.database,
+                # Kept for incremental refreshes
+                "query": request.query,
+                "parameters": request.parameters
             }
+        })
+
+        def cache_result(response: Dict[str, Any]) -> Optional[CachedQuery]:
+            if cache_key is None:
+                return None
+            cached = CachedQuery(connection_id, writer.dataset_id, _as_cached(response), ttl)
+            query_cache.put(cache_key, cached)
+            return cached
+
+        if streaming:
+            return StreamingResponse(
+                _store_and_stream(
+                    first, frames, writer, payload_format,
+                    on_commit=lambda: cache_result(_build_response(connection_id, writer, first, db_service.stats))
+                ),
+                media_type=_STREAM_MEDIA_TYPES[payload_format],
+                headers=_stream_headers(writer.dataset_id, connection_id, cached=False)
+            )
+
+        try:
+            with writer:
+                await run_in_threadpool(writer.write, first)
+                async for df in frames:
+                    await run_in_threadpool(writer.write, df)
+        finally:
+            await frames.aclose()
+
+        response = _build_response(connection_id, writer, first, db_service.stats)
+        preview = dataset_store.to_preview(first, payload_format=payload_format)
+        cached = cache_result(response)
+        if cached is not None:
+            query_cache.add_body(cache_key, payload_format, dumps(_with_preview(cached.response, preview)))
+
+        # Build the DatabaseResponse shape directly so the payload is
+        # serialized once by orjson instead of validated and re-encoded
+        return FastJSONResponse(_with_preview(response, preview))
+
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCancelledError as e:
+        # Client Closed Request; nobody is left to read it
+        raise HTTPException(status_code=499, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/connect/multi")
+async def connect_sources(request: MultiSourceRequest, http_request: Request) -> FastJSONResponse:
+    """Load PostgreSQL, MongoDB and stored-dataset sources concurrently.
+
+    Each database source is stored as its own dataset, as ``/api/connect``
+    would; the response names them, with per-source errors. With ``join``
+    the sources are joined into one dataset and any failure fails the
+    request.
+    """
+    try:
+        result = await MultiSourceLoader().load(request.dict(), http_request)
+        return FastJSONResponse({"status": "success", **result})
+
+    except MultiSourceError as e:
+        status_code = 502 if e.errors else 400
+        raise HTTPException(status_code=status_code, detail={"message": str(e), "errors": e.errors})
+    except QueryCancelledError as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query", response_class=FastJSONResponse, responses={200: {"model": QueryResponse}})
+async def execute_query(request: QueryRequest, http_request: Request):
+    """Run a query on a connection opened by ``/api/connect``.
+
+    Rows come back inline, so this suits the small results of interactive
+    exploration; large extracts should go through ``/api/connect``.
+    """
+    try:
+        connector = DatabaseConnector()
+        session = connector.sessions.get(request.connection_id)
+        if not is_read_only(session.params['type'], request.query):
+            get_query_cache().invalidate(request.connection_id)
+        result = await connector.execute_query(
+            request.connection_id, request.query, request.parameters, http_request
         )
-        
+        return FastJSONResponse({"status": "success", **result})
+
+    except ConnectionSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCancelledError as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/connections/{connection_id}")
+async def close_connection(connection_id: str) -> FastJSONResponse:
+    """End a connection session; the shared pool stays open for other requests"""
+    if not get_session_store().close(connection_id):
+        raise HTTPException(status_code=404, detail=f"Connection not found or expired: {connection_id}")
+    return FastJSONResponse({"status": "success", "connection_id": connection_id})
+
+@router.delete("/connect/cache")
+async def invalidate_query_cache(connection_id: Optional[str] = None) -> FastJSONResponse:
+    """Drop cached query results for one connection, or all of them"""
+    invalidated = get_query_cache().invalidate(connection_id)
+    return FastJSONResponse({"status": "success", "invalidated": invalidated})
+
+def _build_response(
+    connection_id: str,
+    writer: DatasetWriter,
+    first: pd.DataFrame,
+    stats: Dict[str, float]
+) -> Dict[str, Any]:
+    """The DatabaseResponse body, without the preview"""
+    # Profile the first batch; the full result is in the store
+    head = first.head(settings.DATASET_PREVIEW_ROWS)
+    processed_data = DataProcessor.process_frame(head)
+    return {
+        "status": "success",
+        "connection_id": connection_id,
+        "metadata": {
+            # DatabaseStats
+            "stats": {
+                "connection_time": stats["connection_time"],
+                "query_time": stats["query_time"],
+                "rows_affected": writer.rows,
+                "cached": False
+            }
+        },
+        "data": {
+            "type": "structured",
+            "dataset_id": writer.dataset_id,
+            "data": None,
+            "data_type": processed_data["data_type"],
+            "metadata": {
+                **processed_data["metadata"],
+                "columns": list(writer.dtypes),
+                "rows": writer.rows,
+                "dtypes": writer.dtypes,
+                "memory": writer.memory if settings.DTYPE_OPTIMIZATION else None,
+                "preview_rows": len(head)
+            }
+        }
+    }
+
+def _as_cached(response: Dict[str, Any]) -> Dict[str, Any]:
+    # A cache hit does not touch the database
+    stats = {**response["metadata"]["stats"], "connection_time": 0.0, "query_time": 0.0, "cached": True}
+    return {**response, "metadata": {**response["metadata"], "stats": stats}}
+
+def _with_preview(response: Dict[str, Any], preview: Any) -> Dict[str, Any]:
+    return {**response, "data": {**response["data"], "data": preview}}
+
+def _stream_headers(dataset_id: str, connection_id: str, cached: bool) -> Dict[str, str]:
+    return {
+        "X-Dataset-Id": dataset_id,
+        "X-Connection-Id": connection_id,
+        "X-Cache": "hit" if cached else "miss"
+    }
+
+async def _store_and_stream(
+    first: pd.DataFrame,
+    frames: AsyncIterator[pd.DataFrame],
+    writer: DatasetWriter,
+    payload_format: str,
+    on_commit: Callable[[], Any]
+) -> AsyncIterator[bytes]:
+    """Send each batch to the client, then append it to the dataset.
+
+    If the client disconnects or the query fails mid-stream, the query is
+    cancelled, its cursor closed and the partial dataset dropped.
+    """
+    try:
+        async for chunk in _stream_frames(_store_frames(first, frames, writer), payload_format):
+            yield chunk
+        await run_in_threadpool(writer.commit)
+    except BaseException as e:
+        writer.abort()
+        if isinstance(e, Exception):
+            logger.error(f"Streaming query result failed: {str(e)}")
+        raise
+    finally:
+        await frames.aclose()
+    on_commit()
+
+async def _store_frames(
+    first: pd.DataFrame,
+    frames: AsyncIterator[pd.DataFrame],
+    writer: DatasetWriter
+) -> AsyncIterator[pd.DataFrame]:
+    # Each batch is stored once it has been handed on to the client
+    yield first
+    await run_in_threadpool(writer.write, first)
+    async for df in frames:
+        yield df
+        await run_in_threadpool(writer.write, df)
+
+async def _stream_frames(frames: AsyncIterator[pd.DataFrame], payload_format: str) -> AsyncIterator[bytes]:
+    """Encode batches as NDJSON lines or as one Arrow IPC stream"""
+    encoder = ArrowStreamEncoder() if payload_format == "arrow" else None
+    encode = encoder.write if encoder else to_ndjson
+    async for df in frames:
+        yield await run_in_threadpool(encode, df)
+    if encoder:
+        yield encoder.close()
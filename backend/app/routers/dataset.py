@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from typing import Any, List, Optional
+from ..services.dataset_store import DatasetStore
+from ..services.dataset_refresh import DatasetRefresher
+from ..schemas.database import DatasetRefreshRequest
+from ..core.exceptions import (
+    ConnectionSessionNotFoundError,
+    DatasetNotFoundError,
+    DatasetRefreshError,
+    QueryCancelledError,
+    QueryTimeoutError
+)
+from ..utils.payload import ARROW_STREAM_MEDIA_TYPE, encode_frame, negotiate_payload_format
+from ..core.responses import FastJSONResponse
+import logging
+
+router = APIRouter(tags=["datasets"])
+logger = logging.getLogger(__name__)
+
+@router.get("/datasets/{dataset_id}")
+async def get_dataset(
+    dataset_id: str,
+    preview_rows: Optional[int] = None,
+    accept: Optional[str] = Header(None)
+) -> FastJSONResponse:
+    """Return the schema and a preview of a stored dataset"""
+    try:
+        dataset_store = DatasetStore()
+        metadata = dataset_store.get_metadata(dataset_id)
+        payload_format = negotiate_payload_format(accept, allow_binary=False)
+        
+        return FastJSONResponse({
+            "status": "success",
+            "dataset_id": dataset_id,
+            "data": dataset_store.preview(dataset_id, preview_rows, payload_format),
+            "metadata": metadata
+        })
+        
+    except DatasetNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to read dataset {dataset_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/datasets/{dataset_id}/data")
+async def get_dataset_rows(
+    dataset_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    columns: Optional[List[str]] = Query(None),
+    accept: Optional[str] = Header(None)
+):
+    """Return dataset rows in the format negotiated through the Accept header"""
+    try:
+        dataset_store = DatasetStore()
+        df = dataset_store.slice(dataset_id, offset=offset, limit=limit, columns=columns)
+        payload_format = negotiate_payload_format(accept)
+        
+        if payload_format == "arrow":
+            return Response(content=encode_frame(df, "arrow"), media_type=ARROW_STREAM_MEDIA_TYPE)
+        
+        return FastJSONResponse({
+            "status": "success",
+            "dataset_id": dataset_id,
+            "offset": offset,
+            "rows": len(df),
+            "data": encode_frame(df, payload_format)
+        })
+        
+    except DatasetNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to read dataset {dataset_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/datasets/{dataset_id}/refresh")
+async def refresh_dataset(dataset_id: str, request: DatasetRefreshRequest) -> FastJSONResponse:
+    """Fetch only the rows past the dataset's watermark and merge them in"""
+    try:
+        result = await DatasetRefresher().refresh(dataset_id, request.dict())
+        return FastJSONResponse({"status": "success", **result})
+        
+    except (DatasetNotFoundError, ConnectionSessionNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DatasetRefreshError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCancelledError as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to refresh dataset {dataset_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/datasets/{dataset_id}")
+async def delete_dataset(dataset_id: str) -> FastJSONResponse:
+    """Delete a stored dataset"""
+    try:
+        DatasetStore().delete(dataset_id)
+        return FastJSONResponse({"status": "success", "dataset_id": dataset_id})
+        
+    except DatasetNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Body
 from fastapi.responses import FileResponse
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..services.export_service import ExportService
 from ..schemas.export import ExportOptions
 from ..core.exceptions import ExportError
+from ..core.responses import FastJSONResponse
 import logging
 
 router = APIRouter()
@@ -12,12 +13,16 @@ logger = logging.getLogger(__name__)
 @router.post("/export")
 async def export_report(
     data: Dict[str, Any] = Body(...),
-    options: ExportOptions = Body(...)
+    options: ExportOptions = Body(...),
+    dataset_id: Optional[str] = Body(None)
 ):
     """Export report with specified options"""
     try:
         logger.info(f"Exporting report in format: {options.format}")
         
+        if dataset_id:
+            data = {**data, "dataset_id": dataset_id}
+        
         export_service = ExportService()
         result = await export_service.export_report(data, options)
         
@@ -28,11 +33,11 @@ async def export_report(
                 filename=f"report_{data.get('id', 'export')}.{options.format}"
             )
             
-        return {
+        return FastJSONResponse({
             "status": "success",
             "data": result["data"],
             "format": options.format
-        }
+        })
         
     except ExportError as e:
         logger.error(f"Export failed: {str(e)}")
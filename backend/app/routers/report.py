@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Response
 from typing import Dict, Any
 from ..services.report_service import ReportService
-from ..core.exceptions import ReportGenerationError
+from ..schemas.database import DatabaseConnectionRequest
+from ..core.exceptions import ReportGenerationError, DatasetNotFoundError
+from ..core.responses import FastJSONResponse
 import logging
 from datetime import datetime
 
@@ -17,13 +19,16 @@ async def generate_report(
         logger.info(f"Received report generation request: {request.get('format', 'json')}")
         
         data = request.get("data")
+        dataset_id = request.get("dataset_id")
+        # Database connection parameters, profiled in the database
+        source = request.get("source")
         query = request.get("query")
         format = request.get("format", "json")
         
-        if not data:
+        if not data and not dataset_id and not source:
             raise HTTPException(
                 status_code=400,
-                detail="Data is required"
+                detail="Data, dataset_id or source is required"
             )
         
         if not query:
@@ -32,14 +37,25 @@ async def generate_report(
                 detail="Query is required"
             )
 
+        if source:
+            try:
+                source = DatabaseConnectionRequest(**source).dict()
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid source: {str(e)}"
+                )
+
         report_service = ReportService()
-        result = await report_service.generate_report(data, query, format)
+        result = await report_service.generate_report(
+            data, query, format, dataset_id=dataset_id, source=source
+        )
 
         if format == "json":
-            return {
+            return FastJSONResponse({
                 "status": "success",
                 "data": result
-            }
+            })
         elif format == "pdf":
             return Response(
                 content=result,
@@ -54,6 +70,13 @@ async def generate_report(
                 media_type="text/html"
             )
 
+    except HTTPException:
+        raise
+    except DatasetNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
     except ReportGenerationError as e:
         logger.error(f"Report generation failed: {str(e)}")
         raise HTTPException(
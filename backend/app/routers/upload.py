@@ -1,47 +1,92 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import Any, Optional
 from ..services.file_service import FileService
+from ..services.ingest_jobs import get_ingest_jobs
+from ..core.config import get_settings
+from ..core.exceptions import JobNotFoundError
+from ..schemas.upload import IngestOptions
+from ..utils.payload import negotiate_payload_format
+from ..core.responses import FastJSONResponse
+import io
 import logging
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 # Remove the prefix from individual routers
 router = APIRouter(tags=["upload"])
 
-@router.post("/upload")
+@router.post("/upload", response_class=FastJSONResponse)
 async def upload_file(
+    request: Request,
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks()
-) -> Dict[str, Any]:
-    """Upload and process a file with background processing for large files"""
+    options: Optional[str] = Form(None),
+    accept: Optional[str] = Header(None)
+) -> FastJSONResponse:
+    """Upload and process a file, handing large files to a background job"""
     try:
         logger.info(f"Received file upload request: {file.filename}")
         
-        # Validate file size
-        if not hasattr(file, 'size'):
-            content = await file.read()
-            size = len(content)
-            await file.seek(0)
-        else:
-            size = file.size
-
-        if size > 10 * 1024 * 1024:  # 10MB limit
-            raise HTTPException(
-                status_code=400,
-                detail="File size exceeds 10MB limit"
+        try:
+            ingest_options = IngestOptions.model_validate_json(options) if options else IngestOptions()
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid upload options: {str(e)}")
+        
+        # The size limit is enforced by UploadSizeLimitMiddleware while the
+        # body streams in, so there is no need to read the file here.
+        # Previews are embedded in a JSON envelope, so Arrow is not offered here
+        payload_format = negotiate_payload_format(accept, allow_binary=False)
+        # Hashed by UploadDigestMiddleware while the body was spooled
+        content_hash = getattr(request.state, "upload_digests", {}).get("file")
+        
+        if _run_in_background(file, ingest_options):
+            # Parsing can outlast proxy timeouts; answer now and let the
+            # client poll the job instead
+            job = await run_in_threadpool(
+                get_ingest_jobs().submit, file.file, file.filename, ingest_options, payload_format, content_hash
+            )
+            return FastJSONResponse(
+                status_code=202,
+                content={
+                    "status": "accepted",
+                    "job_id": job.job_id,
+                    "status_url": f"/api/upload/jobs/{job.job_id}",
+                    "job": job.to_dict()
+                }
             )
-            
-        file_service = FileService()
-        processed_data = await file_service.read_file(file)
         
-        return {
+        file_service = FileService(payload_format=payload_format)
+        processed_data = await file_service.read_file(file, ingest_options, content_hash)
+        
+        return FastJSONResponse({
             "status": "success",
             "processed_data": processed_data
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"File upload failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/upload/jobs/{job_id}", response_class=FastJSONResponse)
+async def get_upload_job(job_id: str) -> FastJSONResponse:
+    """Report the stage and progress of a background upload, with its result once done"""
+    try:
+        return FastJSONResponse(get_ingest_jobs().get(job_id).to_dict())
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def _run_in_background(file: UploadFile, options: IngestOptions) -> bool:
+    if options.background is not None:
+        return options.background
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, io.SEEK_END)
+        file.file.seek(0)
+    return size >= settings.BACKGROUND_INGEST_THRESHOLD_MB * 1024 * 1024
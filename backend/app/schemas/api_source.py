@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Literal, Optional
+
+class PaginationOptions(BaseModel):
+    """How to walk a paginated HTTP API"""
+    type: Literal["none", "cursor", "offset", "page", "link"] = Field(
+        "none",
+        description="cursor: token from the body; offset/page: numeric params; link: RFC 8288 Link header"
+    )
+    page_size: int = Field(100, gt=0, description="Records requested per page (offset/page)")
+    limit_param: str = Field("limit", description="Query parameter carrying the page size")
+    offset_param: str = Field("offset", description="Query parameter carrying the offset")
+    page_param: str = Field("page", description="Query parameter carrying the page number")
+    first_page: int = Field(1, description="Number of the first page (page pagination)")
+    cursor_param: str = Field("cursor", description="Query parameter carrying the cursor")
+    cursor_path: str = Field("next_cursor", description="Dot path of the next cursor in the response body")
+    total_path: Optional[str] = Field(None, description="Dot path of the total record count, if the API reports it")
+    max_pages: int = Field(1000, gt=0, description="Stop after this many pages")
+    concurrency: Optional[int] = Field(None, gt=0, description="Pages fetched at once (offset/page only)")
+
+class ApiSourceRequest(BaseModel):
+    """An HTTP JSON API to ingest as a dataset"""
+    url: str = Field(..., description="Endpoint returning JSON")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query parameters sent with every page")
+    headers: Dict[str, str] = Field(default_factory=dict, description="Request headers, e.g. authorization")
+    records_path: Optional[str] = Field(None, description="Dot path of the record list in each page, e.g. 'data.items'")
+    pagination: PaginationOptions = Field(default_factory=PaginationOptions)
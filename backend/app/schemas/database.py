@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Literal, Optional, Union
 
 class DatabaseConnectionRequest(BaseModel):
     """Database connection request schema"""
@@ -10,6 +10,39 @@ class DatabaseConnectionRequest(BaseModel):
     username: str = Field(..., description="Database username")
     password: str = Field(..., description="Database password")
     query: str = Field(..., description="Query to execute")
+    parameters: Optional[Dict[str, Any]] = Field(None, description="Bound query parameters (SQL :name placeholders)")
+    fetch_size: Optional[int] = Field(None, gt=0, description="Rows fetched per round trip from the server-side cursor")
+    timeout: Optional[float] = Field(None, gt=0, description="Seconds the query and each batch fetch may take")
+    cache_ttl: Optional[float] = Field(None, ge=0, description="Seconds to reuse this result for; 0 bypasses the cache")
+
+class SourceSpec(BaseModel):
+    """One source of a multi-source request: a stored dataset, a session or full connection details"""
+    name: str = Field(..., description="Name of the source's dataset in the response")
+    dataset_id: Optional[str] = Field(None, description="Stored dataset, e.g. an upload")
+    connection: Optional[DatabaseConnectionRequest] = Field(None, description="Connection details and query")
+    connection_id: Optional[str] = Field(None, description="Session opened by /api/connect, used with query")
+    query: Optional[str] = Field(None, description="Query to run on connection_id")
+    parameters: Optional[Dict[str, Any]] = Field(None, description="Bound query parameters, with connection_id")
+    timeout: Optional[float] = Field(None, gt=0, description="Seconds this source may take in total")
+
+class JoinSpec(BaseModel):
+    """Join of all sources, in order, into one dataset"""
+    on: List[str] = Field(..., min_length=1, description="Columns every source is joined on")
+    how: Literal["inner", "left", "outer"] = Field("inner", description="Join type")
+
+class MultiSourceRequest(BaseModel):
+    """Sources loaded concurrently in one request"""
+    sources: List[SourceSpec] = Field(..., min_length=1, description="Sources to load; names must be unique")
+    join: Optional[JoinSpec] = Field(None, description="Join the sources into one dataset instead of returning each")
+    timeout: Optional[float] = Field(None, gt=0, description="Default per-source timeout in seconds")
+
+class DatasetRefreshRequest(BaseModel):
+    """Incremental refresh of a dataset stored by /api/connect"""
+    connection_id: str = Field(..., description="Connection ID of a session on the dataset's source database")
+    watermark_column: Optional[str] = Field(None, description="Increasing column (e.g. updated_at or an ID); required on the first refresh")
+    mode: Optional[Literal["append", "upsert"]] = Field(None, description="Append new rows, or replace rows by key_columns (default: previous mode, else append)")
+    key_columns: Optional[List[str]] = Field(None, description="Columns identifying a row, for upsert")
+    timeout: Optional[float] = Field(None, gt=0, description="Seconds the delta query and each batch fetch may take")
 
 class DatabaseResponse(BaseModel):
     """Database response schema"""
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
 
 class UploadResponse(BaseModel):
     """Upload response schema"""
@@ -12,4 +12,24 @@ class FileMetadata(BaseModel):
     filename: str
     content_type: str
     size: int
-    extension: str 
\ No newline at end of file
+    extension: str
+
+class IngestOptions(BaseModel):
+    """Optional parsing options sent alongside an upload"""
+    sheets: Optional[List[str]] = Field(
+        None,
+        description="Workbook sheets to parse; defaults to the first sheet, '*' parses all"
+    )
+    columns: Optional[List[str]] = Field(
+        None,
+        description="Columns to read from Parquet/Arrow uploads; defaults to all"
+    )
+    filters: Optional[List[List[Any]]] = Field(
+        None,
+        description="Row filters for Parquet/Arrow uploads as [column, op, value] triples, ANDed"
+    )
+    background: Optional[bool] = Field(
+        None,
+        description="Force (true) or skip (false) background ingestion; by default "
+                    "uploads above BACKGROUND_INGEST_THRESHOLD_MB run as jobs"
+    )
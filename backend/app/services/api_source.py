@@ -0,0 +1,210 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import math
+import weakref
+import httpx
+import pandas as pd
+from ..core.config import get_settings
+from ..schemas.api_source import ApiSourceRequest
+from ..utils.json_stream import records_to_frame
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Bodies without records_path are searched for the first of these lists
+_RECORD_KEYS = ("data", "results", "items", "records")
+_RETRY_STATUSES = {429, 502, 503, 504}
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the running event loop.
+
+    Connections are pooled across requests instead of being opened per
+    call. Clients are bound to their loop, so background jobs running
+    their own loop get their own pool.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.API_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.API_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=settings.API_TIMEOUT,
+            follow_redirects=True
+        )
+        _clients[loop] = client
+    return client
+
+async def close_http_client() -> None:
+    """Close the running loop's shared client (application shutdown)"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+class ApiSource:
+    """Fetches a JSON API page by page and yields columnar batches.
+
+    Cursor and Link-header pagination are inherently sequential; offset
+    and page pagination fetch up to ``concurrency`` pages at once and
+    yield them in order. Pass ``client`` to use a specific transport,
+    e.g. one pointed at a local stub server.
+    """
+
+    def __init__(self, request: ApiSourceRequest, client: Optional[httpx.AsyncClient] = None):
+        self.request = request
+        self.pagination = request.pagination
+        self.client = client or get_http_client()
+        self.pages_fetched = 0
+        self.first_body: Any = None
+
+    async def iter_frames(self, batch_size: int) -> AsyncIterator[pd.DataFrame]:
+        """Yield DataFrames of ``batch_size`` records as pages arrive"""
+        buffer: List[Any] = []
+        async for records in self.iter_pages():
+            buffer.extend(records)
+            while len(buffer) >= batch_size:
+                yield records_to_frame(buffer[:batch_size])
+                buffer = buffer[batch_size:]
+        if buffer:
+            yield records_to_frame(buffer)
+
+    async def iter_pages(self) -> AsyncIterator[List[Any]]:
+        """Yield the record list of every page, in order"""
+        kind = self.pagination.type
+        if kind in ("offset", "page"):
+            pages = self._iter_numbered()
+        elif kind == "cursor":
+            pages = self._iter_cursor()
+        elif kind == "link":
+            pages = self._iter_link()
+        else:
+            pages = self._iter_single()
+        async for records in pages:
+            yield records
+
+    async def _iter_single(self) -> AsyncIterator[List[Any]]:
+        body, _ = await self._get(self.request.url, self.request.params)
+        yield self._records(body)
+
+    async def _iter_link(self) -> AsyncIterator[List[Any]]:
+        url: Optional[str] = self.request.url
+        params: Optional[Dict[str, Any]] = self.request.params
+        while url and self.pages_fetched < self.pagination.max_pages:
+            body, response = await self._get(url, params)
+            records = self._records(body)
+            if records:
+                yield records
+            next_link = response.links.get("next", {}).get("url")
+            url = str(response.url.join(next_link)) if next_link else None
+            # The next link carries its own query string
+            params = None
+
+    async def _iter_cursor(self) -> AsyncIterator[List[Any]]:
+        params = dict(self.request.params)
+        while self.pages_fetched < self.pagination.max_pages:
+            body, _ = await self._get(self.request.url, params)
+            records = self._records(body)
+            if records:
+                yield records
+            cursor = _lookup(body, self.pagination.cursor_path)
+            if not cursor or not records:
+                return
+            params = {**params, self.pagination.cursor_param: cursor}
+
+    async def _iter_numbered(self) -> AsyncIterator[List[Any]]:
+        page_size = self.pagination.page_size
+        concurrency = self.pagination.concurrency or settings.API_PAGE_CONCURRENCY
+
+        # The first page is fetched alone: it may report the total, which
+        # bounds how many pages to request in parallel
+        first, _ = await self._get(self.request.url, self._page_params(0))
+        records = self._records(first)
+        if records:
+            yield records
+        total = _lookup(first, self.pagination.total_path) if self.pagination.total_path else None
+        if total is None and len(records) < page_size:
+            return
+
+        last_page = self.pagination.max_pages
+        if isinstance(total, (int, float)):
+            last_page = min(last_page, math.ceil(total / page_size))
+
+        index = 1
+        while index < last_page:
+            window = range(index, min(index + concurrency, last_page))
+            responses = await asyncio.gather(
+                *(self._get(self.request.url, self._page_params(i)) for i in window)
+            )
+            for body, _ in responses:
+                records = self._records(body)
+                if records:
+                    yield records
+                # Without a total, a short or empty page is the last one
+                if not records or (total is None and len(records) < page_size):
+                    return
+            index = window.stop
+
+    def _page_params(self, index: int) -> Dict[str, Any]:
+        pagination = self.pagination
+        if pagination.type == "page":
+            position = {pagination.page_param: pagination.first_page + index}
+        else:
+            position = {pagination.offset_param: index * pagination.page_size}
+        return {**self.request.params, **position, pagination.limit_param: pagination.page_size}
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]]) -> Tuple[Any, httpx.Response]:
+        """GET one page, retrying transport errors, 429 and 5xx gateway errors"""
+        for attempt in range(settings.API_MAX_RETRIES + 1):
+            last_attempt = attempt == settings.API_MAX_RETRIES
+            try:
+                response = await self.client.get(url, params=params, headers=self.request.headers)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"API request to {url} failed, retrying: {str(e)}")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+
+            if response.status_code in _RETRY_STATUSES and not last_attempt:
+                await asyncio.sleep(_retry_after(response) or 0.5 * 2 ** attempt)
+                continue
+            response.raise_for_status()
+
+            body = response.json()
+            self.pages_fetched += 1
+            if self.first_body is None:
+                self.first_body = body
+            return body, response
+
+    def _records(self, body: Any) -> List[Any]:
+        if self.request.records_path:
+            records = _lookup(body, self.request.records_path)
+        elif isinstance(body, dict):
+            records = next((body[key] for key in _RECORD_KEYS if isinstance(body.get(key), list)), None)
+        else:
+            records = body
+        return records if isinstance(records, list) else []
+
+def _lookup(body: Any, path: Optional[str]) -> Any:
+    """Follow a dot path like ``meta.next`` into a JSON body"""
+    value = body
+    for key in (path or "").split("."):
+        if not key:
+            continue
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return min(float(response.headers.get("retry-after", "")), 60.0)
+    except ValueError:
+        return None
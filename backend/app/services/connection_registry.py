@@ -0,0 +1,239 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import quote_plus
+import asyncio
+import logging
+import re
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, URL, make_url
+from pymongo import MongoClient, uri_parser
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_MONGO_SCHEMES = ("mongodb://", "mongodb+srv://")
+_CREDENTIALS_PATTERN = re.compile(r"//([^:/@]+):([^@]*)@")
+
+def build_dsn(params: Dict[str, Any]) -> str:
+    """Normalized DSN for a connection request (``type``, ``host``, ``port``...).
+
+    Credentials are escaped, so passwords containing ``@`` or ``/`` do not
+    break the URL, and equal requests always map to the same pool.
+    """
+    db_type = params['type']
+    if db_type == 'mongodb':
+        return (
+            f"mongodb://{quote_plus(params['username'])}:{quote_plus(params['password'])}"
+            f"@{params['host']}:{params['port']}"
+        )
+    if db_type == 'postgresql':
+        return URL.create(
+            "postgresql",
+            username=params['username'],
+            password=params['password'],
+            host=params['host'],
+            port=params['port'],
+            database=params['database']
+        ).render_as_string(hide_password=False)
+    raise ValueError(f"Unsupported database type: {db_type}")
+
+def normalize_dsn(url: str) -> str:
+    """The ``build_dsn`` form of a configured URL, so it keys the same pool requests use.
+
+    URLs ``build_dsn`` cannot express (several Mongo hosts, SRV records,
+    other SQL dialects) are returned unchanged.
+    """
+    if url.startswith("mongodb+srv://"):
+        return url
+    if is_mongo_dsn(url):
+        parsed = uri_parser.parse_uri(url)
+        if len(parsed["nodelist"]) != 1 or not parsed["username"]:
+            return url
+        host, port = parsed["nodelist"][0]
+        return build_dsn({
+            "type": "mongodb",
+            "host": host,
+            "port": port,
+            "username": parsed["username"],
+            "password": parsed["password"] or ""
+        })
+    parsed_url = make_url(url)
+    if parsed_url.get_backend_name() not in ("postgresql", "postgres"):
+        return url
+    return build_dsn({
+        "type": "postgresql",
+        "host": parsed_url.host,
+        "port": parsed_url.port or 5432,
+        "database": parsed_url.database,
+        "username": parsed_url.username,
+        "password": parsed_url.password
+    })
+
+def redact_dsn(dsn: str) -> str:
+    """DSN with the password masked, for logs and status output"""
+    return _CREDENTIALS_PATTERN.sub(r"//\1:***@", dsn)
+
+def is_mongo_dsn(dsn: str) -> bool:
+    return dsn.startswith(_MONGO_SCHEMES)
+
+class _PoolEntry:
+    def __init__(self, resource: Union[Engine, MongoClient]):
+        self.resource = resource
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self.lock = threading.Lock()
+
+class ConnectionRegistry:
+    """Process-wide pooled SQLAlchemy engines and Mongo clients keyed by DSN.
+
+    Engines and clients are expensive to create (TCP, TLS and auth for
+    every pooled connection), so they are created once per DSN and shared
+    by every request. At most ``DB_REGISTRY_MAX_ENTRIES`` DSNs are kept;
+    the least recently used one is disposed beyond that, and pools unused
+    for ``DB_IDLE_TIMEOUT`` seconds are disposed by ``evict_idle``. Every
+    ``DB_HEALTH_CHECK_INTERVAL`` seconds a pool is pinged before it is
+    handed out and recreated if the ping fails.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, idle_timeout: Optional[float] = None):
+        self.max_entries = max_entries or settings.DB_REGISTRY_MAX_ENTRIES
+        self.idle_timeout = idle_timeout or settings.DB_IDLE_TIMEOUT
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def engine(self, dsn: str) -> Engine:
+        """Shared engine for a SQLAlchemy DSN; may ping it, so call off the event loop"""
+        return self._acquire(dsn)
+
+    def mongo_client(self, dsn: str) -> MongoClient:
+        """Shared client for a MongoDB DSN; may ping it, so call off the event loop"""
+        return self._acquire(dsn)
+
+    def prewarm(self, dsns: List[str]) -> None:
+        """Open pooled connections up front so first requests skip the handshake"""
+        for dsn in dsns:
+            try:
+                resource = self._acquire(dsn, check=False)
+                if isinstance(resource, MongoClient):
+                    resource.admin.command("ping")
+                else:
+                    connections = [resource.connect() for _ in range(settings.DB_PREWARM_CONNECTIONS)]
+                    for connection in connections:
+                        connection.close()
+                logger.info(f"Pre-warmed connection pool for {redact_dsn(dsn)}")
+            except Exception as e:
+                logger.warning(f"Could not pre-warm {redact_dsn(dsn)}: {str(e)}")
+
+    def evict_idle(self) -> int:
+        """Dispose pools unused for longer than the idle timeout"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [dsn for dsn, entry in self._entries.items() if entry.last_used < cutoff]
+            evicted = [self._entries.pop(dsn) for dsn in expired]
+        for dsn, entry in zip(expired, evicted):
+            logger.info(f"Disposing idle connection pool for {redact_dsn(dsn)}")
+            self._dispose(entry)
+        return len(evicted)
+
+    async def run_eviction(self, interval: Optional[float] = None) -> None:
+        """Evict idle pools periodically; run as a background task"""
+        interval = interval or max(self.idle_timeout / 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Connection pool eviction failed: {str(e)}")
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._dispose(entry)
+
+    def _acquire(self, dsn: str, check: bool = True) -> Union[Engine, MongoClient]:
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(dsn)
+            if entry is None:
+                # Creating an engine or client does not connect yet, so
+                # holding the lock here is cheap
+                entry = _PoolEntry(self._create(dsn))
+                self._entries[dsn] = entry
+                while len(self._entries) > self.max_entries:
+                    evicted.append(self._entries.popitem(last=False))
+            self._entries.move_to_end(dsn)
+            entry.last_used = time.monotonic()
+
+        for evicted_dsn, evicted_entry in evicted:
+            logger.info(f"Evicting connection pool for {redact_dsn(evicted_dsn)}")
+            self._dispose(evicted_entry)
+
+        if check and time.monotonic() - entry.last_checked > settings.DB_HEALTH_CHECK_INTERVAL:
+            entry = self._check(dsn, entry)
+        return entry.resource
+
+    def _check(self, dsn: str, entry: _PoolEntry) -> _PoolEntry:
+        # One request pings while concurrent ones keep using the pool
+        if not entry.lock.acquire(blocking=False):
+            return entry
+        try:
+            self._ping(entry.resource)
+            entry.last_checked = time.monotonic()
+            return entry
+        except Exception as e:
+            logger.warning(f"Health check failed for {redact_dsn(dsn)}, recreating pool: {str(e)}")
+            replacement = _PoolEntry(self._create(dsn))
+            with self._lock:
+                if self._entries.get(dsn) is entry:
+                    self._entries[dsn] = replacement
+            self._dispose(entry)
+            return replacement
+        finally:
+            entry.lock.release()
+
+    def _create(self, dsn: str) -> Union[Engine, MongoClient]:
+        if is_mongo_dsn(dsn):
+            return MongoClient(
+                dsn,
+                maxPoolSize=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+                maxIdleTimeMS=int(settings.DB_IDLE_TIMEOUT * 1000),
+                serverSelectionTimeoutMS=5000,
+                connect=False
+            )
+        options: Dict[str, Any] = {"pool_pre_ping": True, "pool_recycle": settings.DB_POOL_RECYCLE}
+        if make_url(dsn).get_backend_name() != "sqlite":
+            options.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT
+            )
+        return create_engine(dsn, **options)
+
+    @staticmethod
+    def _ping(resource: Union[Engine, MongoClient]) -> None:
+        if isinstance(resource, MongoClient):
+            resource.admin.command("ping")
+        else:
+            with resource.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+    @staticmethod
+    def _dispose(entry: _PoolEntry) -> None:
+        try:
+            if isinstance(entry.resource, MongoClient):
+                entry.resource.close()
+            else:
+                entry.resource.dispose()
+        except Exception as e:
+            logger.warning(f"Error while closing connection pool: {str(e)}")
+
+@lru_cache()
+def get_connection_registry() -> ConnectionRegistry:
+    return ConnectionRegistry()
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+from ..core.config import get_settings
+from ..core.exceptions import ConnectionSessionNotFoundError
+from .connection_registry import build_dsn
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Request fields that identify the database; everything else is per query
+_CONNECTION_FIELDS = ("type", "host", "port", "database", "username", "password")
+
+class ConnectionSession:
+    """Connection parameters a ``connection_id`` stands for"""
+
+    def __init__(self, connection_id: str, params: Dict[str, Any]):
+        self.connection_id = connection_id
+        self.params = {key: params[key] for key in _CONNECTION_FIELDS}
+        self.dsn = build_dsn(self.params)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def query_params(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """DatabaseService parameters for a follow-up query"""
+        return {**self.params, "query": query, "parameters": parameters}
+
+class SessionStore:
+    """Process-wide map of ``connection_id`` to connection parameters.
+
+    ``/api/connect`` opens a session, so follow-up queries send only the
+    ``connection_id``. Sessions do not hold connections themselves: each
+    query borrows one from the pooled engine or client the registry keeps
+    for the session's DSN, which keeps that pool alive while the session
+    is in use. Sessions unused for ``SESSION_IDLE_TIMEOUT`` seconds
+    expire, and the least recently used ones are dropped beyond
+    ``SESSION_MAX_ENTRIES``.
+
+    Sessions hold credentials, so they are never written out: a
+    ``connection_id`` is only known to the process that opened it, and
+    the API must run as a single worker process for follow-up queries.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = None, max_entries: Optional[int] = None):
+        self.idle_timeout = idle_timeout or settings.SESSION_IDLE_TIMEOUT
+        self.max_entries = max_entries or settings.SESSION_MAX_ENTRIES
+        self._sessions: "OrderedDict[str, ConnectionSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, connection_id: str, params: Dict[str, Any]) -> ConnectionSession:
+        session = ConnectionSession(connection_id, params)
+        with self._lock:
+            self._sessions[connection_id] = session
+            self._sessions.move_to_end(connection_id)
+            # Expired sessions still hold credentials, so drop them eagerly
+            cutoff = time.monotonic() - self.idle_timeout
+            while self._sessions and (
+                len(self._sessions) > self.max_entries
+                or next(iter(self._sessions.values())).last_used < cutoff
+            ):
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, connection_id: str) -> ConnectionSession:
+        """The live session for ``connection_id``, marked as used"""
+        with self._lock:
+            session = self._sessions.get(connection_id)
+            if session is not None and time.monotonic() - session.last_used > self.idle_timeout:
+                del self._sessions[connection_id]
+                logger.info(f"Connection session {connection_id} expired")
+                session = None
+            if session is None:
+                raise ConnectionSessionNotFoundError(connection_id)
+            self._sessions.move_to_end(connection_id)
+            session.last_used = time.monotonic()
+        return session
+
+    def close(self, connection_id: str) -> bool:
+        """Forget a session; its pool stays shared with other requests"""
+        with self._lock:
+            return self._sessions.pop(connection_id, None) is not None
+
+@lru_cache()
+def get_session_store() -> SessionStore:
+    return SessionStore()
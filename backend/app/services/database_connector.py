@@ -1,18 +1,32 @@
 from typing import Dict, Any, Optional, TypedDict, List
+import time
 import pandas as pd
-from sqlalchemy import create_engine, text
-from pymongo import MongoClient
-from app.core.config import settings
-from app.core.exceptions import DatabaseConnectionError
+from pymongo.errors import ExecutionTimeout
+from starlette.requests import Request
+from app.core.config import get_settings
+from app.core.exceptions import DatabaseConnectionError, QueryCancelledError, QueryTimeoutError
+from app.services.connection_registry import build_dsn, get_connection_registry
+from app.services.connection_sessions import get_session_store
+from app.services.database_executor import CancellationToken, get_database_executor
+from app.services.database_service import DatabaseService
+from app.utils.bson_frames import documents_to_frame
+
+settings = get_settings()
 
 class QueryResult(TypedDict):
     data: List[Dict[str, Any]]
     columns: List[str]
     rows: int
+    execution_time: float
 
 class DatabaseConnector:
     def __init__(self):
-        self.connections: Dict[str, Any] = {}
+        # connection_id -> connection parameters; the pools themselves
+        # live in the registry
+        self.sessions = get_session_store()
+        self.db_service = DatabaseService()
+        self.registry = get_connection_registry()
+        self.executor = get_database_executor()
 
     async def connect(self, connection_params: Dict[str, Any]) -> QueryResult:
         # Ensure all required parameters are present
@@ -21,68 +35,89 @@ class DatabaseConnector:
             if key not in connection_params:
                 raise DatabaseConnectionError(f"Missing parameter: {key}")
         try:
+            started = time.perf_counter()
             db_type = connection_params['type']
             if db_type == 'postgresql':
-                return await self._connect_postgresql(connection_params)
+                df = await self._connect_postgresql(connection_params)
             elif db_type == 'mongodb':
-                return await self._connect_mongodb(connection_params)
+                df = await self._connect_mongodb(connection_params)
             else:
                 raise DatabaseConnectionError(f"Unsupported database type: {db_type}")
+            self.sessions.open(self.db_service.connection_id(connection_params), connection_params)
+            return _query_result(df, time.perf_counter() - started)
 
+        except QueryCancelledError:
+            raise
         except Exception as e:
             raise DatabaseConnectionError(f"Failed to connect to database: {str(e)}")
 
-    async def _connect_postgresql(self, params: Dict[str, Any]) -> QueryResult:
-        connection_string = f"postgresql://{params['username']}:{params['password']}@{params['host']}:{params['port']}/{params['database']}"
-        engine = create_engine(connection_string)
-        
+    async def _connect_postgresql(self, params: Dict[str, Any]) -> pd.DataFrame:
         try:
-            with engine.connect() as connection:
-                df = pd.read_sql(text(params['query']), connection)
-                return {
-                    "data": df.to_dict(orient='records'),
-                    "columns": df.columns.tolist(),
-                    "rows": len(df)
-                }
+            return await self._run_sql(build_dsn(params), params['query'])
+        except QueryCancelledError:
+            raise
         except Exception as e:
             raise DatabaseConnectionError(f"PostgreSQL query failed: {str(e)}")
 
-    async def _connect_mongodb(self, params: Dict[str, Any]) -> QueryResult:
+    async def _connect_mongodb(self, params: Dict[str, Any]) -> pd.DataFrame:
         try:
-            client = MongoClient(
-                f"mongodb://{params['username']}:{params['password']}@{params['host']}:{params['port']}"
-            )
-            db = client[params['database']]
-            
-            # Parse MongoDB query from string to dict
-            import json
-            query = json.loads(params['query'])
-            
-            collection = db[query.get('collection', 'default')]
-            cursor = collection.find(query.get('filter', {}))
-            
-            df = pd.DataFrame(list(cursor))
-            client.close()
-            
-            return {
-                "data": df.to_dict(orient='records'),
-                "columns": df.columns.tolist(),
-                "rows": len(df)
-            }
+            dsn = build_dsn(params)
+
+            def fetch() -> pd.DataFrame:
+                # The registry may ping the pool; keep that off the event loop
+                db = self.registry.mongo_client(dsn)[params['database']]
+                with DatabaseService.mongo_cursor(
+                    db, params['query'], settings.DB_FETCH_SIZE, settings.DB_QUERY_TIMEOUT
+                ) as cursor:
+                    return documents_to_frame(list(cursor))
+
+            return await self.executor.run(fetch, timeout=settings.DB_QUERY_TIMEOUT)
+        except ExecutionTimeout:
+            raise QueryTimeoutError(f"Query exceeded the {settings.DB_QUERY_TIMEOUT:g}s timeout")
+        except QueryCancelledError:
+            raise
         except Exception as e:
             raise DatabaseConnectionError(f"MongoDB query failed: {str(e)}")
 
-    async def execute_query(self, connection_id: str, query: str) -> QueryResult:
-        if connection_id not in self.connections:
-            raise DatabaseConnectionError("No active connection found")
-            
+    async def execute_query(
+        self,
+        connection_id: str,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        request: Optional[Request] = None
+    ) -> QueryResult:
+        """Run a follow-up query on an open connection session.
+
+        Only the pooled connection is borrowed, so there is no connect or
+        auth round trip. ``execution_time`` covers waiting for the pool
+        and running the query.
+        """
+        session = self.sessions.get(connection_id)
         try:
-            connection = self.connections[connection_id]
-            df = pd.read_sql(query, connection)
-            return {
-                "data": df.to_dict(orient='records'),
-                "columns": df.columns.tolist(),
-                "rows": len(df)
-            }
+            started = time.perf_counter()
+            result = await self.db_service.connect(session.query_params(query, parameters), request)
+            return _query_result(result["data"], time.perf_counter() - started)
+        except (DatabaseConnectionError, QueryCancelledError):
+            raise
         except Exception as e:
-            raise DatabaseConnectionError(f"Query execution failed: {str(e)}")
\ No newline at end of file
+            raise DatabaseConnectionError(f"Query execution failed: {str(e)}")
+
+    async def _run_sql(self, dsn: str, query: str) -> pd.DataFrame:
+        # The token and statement_timeout stop the statement on the server
+        # when the executor gives up on it
+        token = CancellationToken()
+
+        def read() -> pd.DataFrame:
+            # The registry may ping the pool; keep that off the event loop
+            engine = self.registry.engine(dsn)
+            return DatabaseService.read_sql(engine, query, token=token, timeout=settings.DB_QUERY_TIMEOUT)
+
+        return await self.executor.run(read, timeout=settings.DB_QUERY_TIMEOUT, token=token)
+
+def _query_result(df: pd.DataFrame, execution_time: float) -> QueryResult:
+    return {
+        "data": df.to_dict(orient='records'),
+        "columns": [str(col) for col in df.columns],
+        "rows": len(df),
+        "execution_time": execution_time
+    }
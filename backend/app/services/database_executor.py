@@ -0,0 +1,191 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, TypeVar
+import asyncio
+import logging
+import threading
+from starlette.requests import Request
+from ..core.config import get_settings
+from ..core.exceptions import QueryCancelledError, QueryTimeoutError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+_DONE = object()
+_DISCONNECT_POLL_INTERVAL = 0.5
+
+class CancellationToken:
+    """Cancels a query running on a database worker thread.
+
+    Drivers register a callback (e.g. psycopg2's ``connection.cancel``)
+    for as long as a statement is in flight; ``cancel`` records why the
+    query was stopped and calls it on a short-lived thread of its own.
+    """
+
+    def __init__(self):
+        self.error: Optional[QueryCancelledError] = None
+        self._callbacks: List[Callable[[], Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.error is not None
+
+    def cancel(self, error: QueryCancelledError) -> None:
+        with self._lock:
+            if self.error is not None:
+                return
+            self.error = error
+            callbacks = list(self._callbacks)
+        if callbacks:
+            # psycopg2's cancel opens a new connection to the server and
+            # blocks until it is answered; keep that off the event loop and
+            # off the database workers, which may all be busy
+            threading.Thread(target=self._run_callbacks, args=(callbacks,), name="db-cancel", daemon=True).start()
+
+    def _run_callbacks(self, callbacks: List[Callable[[], Any]]) -> None:
+        for callback in callbacks:
+            # Holding the lock keeps cancel_with from returning the
+            # connection to its pool while its cancel is in flight, and a
+            # statement that already finished is not cancelled at all
+            with self._lock:
+                if callback not in self._callbacks:
+                    continue
+                try:
+                    callback()
+                except Exception as e:
+                    logger.warning(f"Query cancellation callback failed: {str(e)}")
+
+    @contextmanager
+    def cancel_with(self, callback: Optional[Callable[[], Any]]) -> Iterator[None]:
+        """Register ``callback`` for the duration of the block.
+
+        The callback must not outlive the statement: a pooled connection
+        goes on to serve other requests once it is returned.
+        """
+        if callback is None:
+            yield
+            return
+        with self._lock:
+            cancelled = self.error is not None
+            if not cancelled:
+                self._callbacks.append(callback)
+        if cancelled:
+            raise self.error
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+class DatabaseExecutor:
+    """Bounded worker pool for blocking psycopg2/pymongo calls.
+
+    Queries run on at most ``DB_MAX_WORKERS`` threads so they never block
+    the event loop, and a burst of slow queries cannot take over the
+    default threadpool that file handling uses. Waiting for a call stops
+    on ``timeout``, when the client disconnects (if ``request`` is
+    given) or when the awaiting task is cancelled; the token is then
+    cancelled, which interrupts the statement in flight.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.DB_MAX_WORKERS,
+            thread_name_prefix="db"
+        )
+
+    async def run(
+        self,
+        fn: Callable[[], T],
+        timeout: Optional[float] = None,
+        token: Optional[CancellationToken] = None,
+        request: Optional[Request] = None
+    ) -> T:
+        """Run a blocking call on the pool"""
+        return await self._wait(self._executor.submit(fn), timeout, token or CancellationToken(), request)
+
+    async def iterate(
+        self,
+        iterator: Iterator[T],
+        timeout: Optional[float] = None,
+        token: Optional[CancellationToken] = None,
+        request: Optional[Request] = None
+    ) -> AsyncIterator[T]:
+        """Drive a blocking iterator (e.g. a cursor) from the event loop.
+
+        Each ``next`` runs on the pool and gets the full ``timeout``, so
+        long streams are bounded per batch rather than in total. The
+        iterator is closed on the pool once it is no longer running.
+        """
+        token = token or CancellationToken()
+        future: Optional[Future] = None
+        try:
+            while True:
+                future = self._executor.submit(next, iterator, _DONE)
+                item = await self._wait(future, timeout, token, request)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # A fetch abandoned on timeout may still be running; closing a
+            # generator that is executing fails, so close it after it returns
+            if future is not None and not future.done():
+                future.add_done_callback(lambda _: _close(iterator))
+            else:
+                self._executor.submit(_close, iterator)
+
+    async def _wait(
+        self,
+        future: Future,
+        timeout: Optional[float],
+        token: CancellationToken,
+        request: Optional[Request]
+    ) -> Any:
+        waiting = asyncio.wrap_future(future)
+        watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+        try:
+            done, _ = await asyncio.wait(
+                [task for task in (waiting, watcher) if task is not None],
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            token.cancel(QueryCancelledError("Query cancelled"))
+            waiting.cancel()
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+        if waiting in done:
+            return waiting.result()
+
+        if watcher is not None and watcher in done:
+            token.cancel(QueryCancelledError("Query cancelled: client disconnected"))
+        else:
+            token.cancel(QueryTimeoutError(f"Query exceeded the {timeout:g}s timeout"))
+        # Only stops calls still queued; running ones are interrupted
+        # through the token
+        waiting.cancel()
+        raise token.error
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(_DISCONNECT_POLL_INTERVAL)
+
+def _close(iterator: Iterator[Any]) -> None:
+    close = getattr(iterator, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.warning(f"Error while closing query cursor: {str(e)}")
+
+@lru_cache()
+def get_database_executor() -> DatabaseExecutor:
+    return DatabaseExecutor()
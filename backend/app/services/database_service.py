@@ -1,116 +1,345 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
 import pandas as pd
-from sqlalchemy import create_engine, text
-from pymongo import MongoClient
-from ..core.exceptions import DatabaseConnectionError
+from pymongo.command_cursor import CommandCursor
+from pymongo.cursor import Cursor
+from pymongo.database import Database
+from pymongo.errors import ExecutionTimeout
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+from starlette.requests import Request
+from ..core.config import get_settings
+from ..core.exceptions import DatabaseConnectionError, QueryCancelledError, QueryTimeoutError
+from ..schemas.database import MongoDBQuery
+from ..utils.bson_frames import documents_to_frame
+from .connection_registry import build_dsn, get_connection_registry
+from .database_executor import CancellationToken, get_database_executor
+import hashlib
+import hmac
 import logging
 import json
+import re
+import time
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# SQLSTATE raised for statement_timeout and cancel requests
+_PG_QUERY_CANCELED = "57014"
+# documents_to_frame stores ObjectIds as their hex string
+_OBJECT_ID_HEX = re.compile(r'^[0-9a-f]{24}$')
 
 class DatabaseService:
     def __init__(self):
-        self.connections = {}
+        # Engines and clients are pooled process-wide, keyed by DSN
+        self.registry = get_connection_registry()
+        self.executor = get_database_executor()
         self.logger = logger
+        # Timings of the last streamed query, in DatabaseStats terms
+        self.stats = {"connection_time": 0.0, "query_time": 0.0}
 
-    async def connect(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Connect to database and execute query"""
-        try:
-            db_type = params['type']
-            connection_id = f"{db_type}_{params['host']}_{params['database']}"
-            
-            if db_type == 'postgresql':
-                result = await self._connect_postgresql(params)
-            elif db_type == 'mongodb':
-                result = await self._connect_mongodb(params)
-            else:
-                raise DatabaseConnectionError(f"Unsupported database type: {db_type}")
+    @staticmethod
+    def connection_id(params: Dict[str, Any]) -> str:
+        """Stable ID for a set of credentials.
+
+        It ends in a keyed digest of the DSN, so it can stand in for the
+        credentials in follow-up queries but cannot be derived without them.
+        """
+        digest = hmac.new(settings.SECRET_KEY.encode(), build_dsn(params).encode(), hashlib.sha256).hexdigest()
+        return f"{params['type']}_{params['host']}_{params['database']}_{digest[:16]}"
+
+    async def connect(self, params: Dict[str, Any], request: Optional[Request] = None) -> Dict[str, Any]:
+        """Connect to database and execute query, returning the whole result"""
+        frames = [df async for df in self.stream(params, request)]
+        return {
+            "connection_id": self.connection_id(params),
+            "data": pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        }
 
-            # Store connection for future use
-            self.connections[connection_id] = {
-                "connection": result["connection"],
-                "type": db_type
-            }
+    async def stream(self, params: Dict[str, Any], request: Optional[Request] = None) -> AsyncIterator[pd.DataFrame]:
+        """Yield the result batches of ``iter_frames`` without blocking the event loop.
 
-            return {
-                "connection_id": connection_id,
-                "data": result["data"]
-            }
+        Every round trip runs on the database executor under the request's
+        ``timeout`` (``DB_QUERY_TIMEOUT`` by default). Passing the HTTP
+        ``request`` also cancels the query when the client disconnects.
+        """
+        timeout = params.get('timeout') or settings.DB_QUERY_TIMEOUT
+        token = CancellationToken()
+        frames = self.iter_frames(params, token=token, timeout=timeout)
+        self.stats = {"connection_time": 0.0, "query_time": 0.0}
 
+        # Only time spent waiting on the database counts, not the time
+        # the consumer takes between batches
+        waited = 0.0
+        started = time.perf_counter()
+        async for df in self.executor.iterate(frames, timeout, token, request):
+            waited += time.perf_counter() - started
+            yield df
+            started = time.perf_counter()
+        waited += time.perf_counter() - started
+        self.stats["query_time"] = max(waited - self.stats["connection_time"], 0.0)
+
+    def iter_frames(
+        self,
+        params: Dict[str, Any],
+        fetch_size: Optional[int] = None,
+        token: Optional[CancellationToken] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Run the query on a server-side cursor and yield DataFrames of ``fetch_size`` rows.
+
+        Only one batch is held at a time. A result without rows still
+        yields one empty frame carrying the column names. Closing the
+        generator early closes the cursor and returns the connection to
+        its pool. ``timeout`` is also enforced by the server
+        (``statement_timeout`` / ``maxTimeMS``) and ``token`` interrupts
+        a PostgreSQL statement in flight.
+        """
+        fetch_size = fetch_size or params.get('fetch_size') or settings.DB_FETCH_SIZE
+        token = token or CancellationToken()
+        db_type = params['type']
+        if db_type == 'postgresql':
+            frames = self._iter_postgresql(params, fetch_size, token, timeout)
+        elif db_type == 'mongodb':
+            frames = self._iter_mongodb(params, fetch_size, timeout)
+        else:
+            raise DatabaseConnectionError(f"Unsupported database type: {db_type}")
+
+        try:
+            yield from frames
+        except (DatabaseConnectionError, QueryCancelledError) as e:
+            if token.cancelled:
+                raise token.error
+            self.logger.error(f"Database connection error: {str(e)}")
+            raise
         except Exception as e:
+            if token.cancelled:
+                raise token.error
             self.logger.error(f"Database connection error: {str(e)}")
             raise DatabaseConnectionError(f"Failed to connect to database: {str(e)}")
 
-    async def _connect_postgresql(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Connect to PostgreSQL database"""
-        connection_string = f"postgresql://{params['username']}:{params['password']}@{params['host']}:{params['port']}/{params['database']}"
-        engine = create_engine(connection_string)
-        
+    def _iter_postgresql(
+        self,
+        params: Dict[str, Any],
+        fetch_size: int,
+        token: CancellationToken,
+        timeout: Optional[float]
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a PostgreSQL query through a named (server-side) cursor"""
+        started = time.perf_counter()
+        engine = self.registry.engine(build_dsn(params))
+
         try:
             with engine.connect() as connection:
-                df = pd.read_sql(text(params['query']), connection)
-                return {
-                    "connection": engine,
-                    "data": df.to_dict('records')
-                }
+                self.stats["connection_time"] = time.perf_counter() - started
+                with self.guard_statements(connection, token, timeout):
+                    result = connection.execution_options(
+                        stream_results=True,
+                        max_row_buffer=fetch_size
+                    ).execute(text(params['query']), params.get('parameters') or {})
+                    columns = list(result.keys())
+
+                    empty = True
+                    for rows in result.partitions(fetch_size):
+                        empty = False
+                        yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+                    if empty:
+                        yield pd.DataFrame(columns=columns)
+        except QueryCancelledError:
+            raise
+        except DBAPIError as e:
+            self.raise_if_timed_out(e, token, timeout)
+            raise DatabaseConnectionError(f"PostgreSQL query failed: {str(e)}")
         except Exception as e:
             raise DatabaseConnectionError(f"PostgreSQL query failed: {str(e)}")
 
-    async def _connect_mongodb(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Connect to MongoDB database and execute query"""
+    @staticmethod
+    @contextmanager
+    def guard_statements(connection: Connection, token: CancellationToken, timeout: Optional[float]) -> Iterator[None]:
+        """Bound the statements run in the block on the server and let ``token`` interrupt them.
+
+        ``statement_timeout`` stops a statement the executor has given up
+        on, so it does not keep running on the server or hold a worker.
+        """
+        if timeout and connection.dialect.name == 'postgresql':
+            # SET LOCAL ends with the transaction, so the pooled
+            # connection goes back without the timeout
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+        dbapi_connection = connection.connection.dbapi_connection
+        with token.cancel_with(getattr(dbapi_connection, 'cancel', None)):
+            yield
+
+    @staticmethod
+    def read_sql(
+        engine: Engine,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        token: Optional[CancellationToken] = None,
+        timeout: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Read a whole SQL result under ``guard_statements``; runs on the database executor"""
+        token = token or CancellationToken()
+        try:
+            with engine.connect() as connection:
+                with DatabaseService.guard_statements(connection, token, timeout):
+                    return pd.read_sql(text(query), connection, params=parameters or {})
+        except DBAPIError as e:
+            DatabaseService.raise_if_timed_out(e, token, timeout)
+            raise
+
+    @staticmethod
+    def raise_if_timed_out(error: DBAPIError, token: CancellationToken, timeout: Optional[float]) -> None:
+        """Report a statement stopped by ``statement_timeout`` as a timeout"""
+        if token.cancelled:
+            raise token.error
+        if timeout and getattr(error.orig, 'pgcode', None) == _PG_QUERY_CANCELED:
+            raise QueryTimeoutError(f"Query exceeded the {timeout:g}s timeout")
+
+    def _iter_mongodb(self, params: Dict[str, Any], fetch_size: int, timeout: Optional[float]) -> Iterator[pd.DataFrame]:
+        """Stream a MongoDB find or aggregation in batches of ``fetch_size`` documents"""
+        started = time.perf_counter()
         try:
-            connection_string = f"mongodb://{params['username']}:{params['password']}@{params['host']}:{params['port']}"
-            client = MongoClient(connection_string, serverSelectionTimeoutMS=5000)
+            client = self.registry.mongo_client(build_dsn(params))
             db = client[params['database']]
-            
-            # Parse and execute MongoDB query
-            if params['query'].strip().startswith('{'):
-                # Query is a JSON string
-                query = json.loads(params['query'])
-                collection_name = query.get('collection')
-                filter_dict = query.get('filter', {})
-                projection = query.get('projection', None)
-                
-                if not collection_name:
-                    raise ValueError("MongoDB query must specify a collection")
-                    
-                collection = db[collection_name]
-                cursor = collection.find(filter_dict, projection)
-                
-                # Convert cursor to list of dictionaries
-                data = list(cursor)
-                
-                # Convert ObjectId to string for JSON serialization
-                for doc in data:
-                    if '_id' in doc:
-                        doc['_id'] = str(doc['_id'])
-                        
-                return {
-                    "connection": client,
-                    "data": data
-                }
-            else:
-                # Support for aggregation pipeline
-                pipeline = json.loads(params['query'])
-                collection_name = pipeline[0].get('$collection', pipeline[0].get('from'))
-                
-                if not collection_name:
-                    raise ValueError("MongoDB aggregation must specify a collection")
-                    
-                collection = db[collection_name]
-                result = list(collection.aggregate(pipeline))
-                
-                # Convert ObjectId to string
-                for doc in result:
-                    if '_id' in doc:
-                        doc['_id'] = str(doc['_id'])
-                        
-                return {
-                    "connection": client,
-                    "data": result
-                }
-                
+            self.stats["connection_time"] = time.perf_counter() - started
+
+            with self.mongo_cursor(db, params['query'], fetch_size, timeout) as cursor:
+                yield from self._iter_documents(cursor, fetch_size)
+
+        except ExecutionTimeout:
+            raise QueryTimeoutError(f"Query exceeded the {timeout:g}s timeout")
         except Exception as e:
             raise DatabaseConnectionError(f"MongoDB connection/query failed: {str(e)}")
 
-    # Similar implementations for MySQL and MongoDB... 
\ No newline at end of file
+    @staticmethod
+    def mongo_cursor(db: Database, query_text: str, fetch_size: int, timeout: Optional[float]) -> Union[Cursor, CommandCursor]:
+        """Open the cursor for a MongoDB query with all of it evaluated by the server.
+
+        A ``MongoDBQuery`` object runs as ``find`` with its filter,
+        projection, sort, skip and limit; a pipeline runs as ``aggregate``
+        with ``allowDiskUse`` so large sorts and groups can spill to disk.
+        Documents arrive ``fetch_size`` at a time instead of the driver's
+        default of 101 per round trip.
+        """
+        collection_name, query = DatabaseService._parse_mongo_query(query_text)
+        collection = db[collection_name]
+        max_time_ms = int(timeout * 1000) if timeout else None
+        if isinstance(query, MongoDBQuery):
+            return collection.find(
+                query.filter or {},
+                query.projection,
+                sort=list(query.sort.items()) if query.sort else None,
+                skip=query.skip or 0,
+                limit=query.limit or 0,
+                batch_size=fetch_size,
+                max_time_ms=max_time_ms
+            )
+        options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+        return collection.aggregate(query, batchSize=fetch_size, allowDiskUse=True, **options)
+
+    @staticmethod
+    def mongo_pipeline(query_text: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """Express a MongoDB query (find shape or pipeline) as ``(collection, pipeline)``"""
+        collection_name, query = DatabaseService._parse_mongo_query(query_text)
+        if not isinstance(query, MongoDBQuery):
+            return collection_name, query
+        pipeline = [{"$match": query.filter or {}}]
+        if query.sort:
+            pipeline.append({"$sort": query.sort})
+        if query.skip:
+            pipeline.append({"$skip": query.skip})
+        if query.limit:
+            pipeline.append({"$limit": query.limit})
+        if query.projection:
+            pipeline.append({"$project": query.projection})
+        return collection_name, pipeline
+
+    @staticmethod
+    def delta_query(
+        db_type: str,
+        query_text: str,
+        column: str,
+        watermark: Any,
+        inclusive: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Restrict a query to rows whose ``column`` is past ``watermark``.
+
+        Returns the query text and the parameters to bind with it (merged
+        over the query's own). The filter wraps the original query, so it
+        applies to what the query returns; ``inclusive`` also matches
+        rows equal to the watermark.
+        """
+        if db_type == 'postgresql':
+            quoted = postgresql.dialect().identifier_preparer.quote(column)
+            source = query_text.strip().rstrip(';')
+            op = ">=" if inclusive else ">"
+            return (
+                f"SELECT * FROM ({source}) AS _delta WHERE {quoted} {op} :_watermark ORDER BY {quoted}",
+                {"_watermark": watermark}
+            )
+        if db_type == 'mongodb':
+            collection_name, pipeline = DatabaseService.mongo_pipeline(query_text)
+            op = "$gte" if inclusive else "$gt"
+            if isinstance(watermark, datetime):
+                # Extended JSON dates are not parsed here, so compare
+                # against a server-side conversion
+                match = {"$expr": {op: [f"${column}", {"$toDate": watermark.isoformat()}]}}
+            elif isinstance(watermark, str) and _OBJECT_ID_HEX.match(watermark):
+                # The stored watermark may be an ObjectId turned into hex.
+                # Query operators only compare values of the same type, so
+                # the first branch matches string columns; the second, an
+                # aggregation comparison, matches ObjectIds (strings sort
+                # below ObjectIds there, so they never pass it)
+                match = {"$or": [
+                    {column: {op: watermark}},
+                    {"$expr": {op: [f"${column}", {"$toObjectId": watermark}]}}
+                ]}
+            else:
+                match = {column: {op: watermark}}
+            pipeline = pipeline + [{"$match": match}, {"$sort": {column: 1}}]
+            return json.dumps({"collection": collection_name, "pipeline": pipeline}), {}
+        raise DatabaseConnectionError(f"Unsupported database type: {db_type}")
+
+    @staticmethod
+    def _parse_mongo_query(query_text: str) -> Tuple[str, Union[MongoDBQuery, List[Dict[str, Any]]]]:
+        """Parse a MongoDB query into its collection and a find query or a pipeline.
+
+        Accepted shapes:
+
+        * ``{"collection": ..., "filter": ..., "sort": ..., ...}`` (``MongoDBQuery``)
+        * ``{"collection": ..., "pipeline": [...]}``
+        * ``[{"$collection": ...}, ...stages]``, the legacy form; the
+          naming stage is stripped rather than sent to the server
+        """
+        query = json.loads(query_text)
+        if isinstance(query, dict):
+            if 'pipeline' in query:
+                collection_name, pipeline = query.get('collection'), query['pipeline']
+            else:
+                if not query.get('collection'):
+                    raise ValueError("MongoDB query must specify a collection")
+                find = MongoDBQuery(**query)
+                return find.collection, find
+        else:
+            first = query[0] if query else {}
+            collection_name = first.get('$collection', first.get('from'))
+            pipeline = query[1:] if set(first) <= {'$collection', 'from'} else query
+        if not collection_name:
+            raise ValueError("MongoDB aggregation must specify a collection")
+        return collection_name, pipeline
+
+    @staticmethod
+    def _iter_documents(cursor: Iterable[Dict[str, Any]], fetch_size: int) -> Iterator[pd.DataFrame]:
+        empty = True
+        while True:
+            documents = list(islice(cursor, fetch_size))
+            if not documents:
+                break
+            empty = False
+            yield documents_to_frame(documents)
+        if empty:
+            yield pd.DataFrame()
@@ -0,0 +1,127 @@
+from typing import Any, Dict, Iterable, List, Optional
+import math
+import pandas as pd
+from ..core.config import get_settings
+
+settings = get_settings()
+
+# Profile of one column. Every field is a sum or an extreme, so profiles
+# of disjoint batches merge exactly and removed rows can be subtracted:
+#   count, nulls                        all columns
+#   sum, sum_sq, min, max               numeric columns
+#   values {value: count} or None       other columns, None once there
+#                                       are more than PROFILE_MAX_TRACKED_VALUES
+Profile = Dict[str, Dict[str, Any]]
+
+def profile_frame(df: pd.DataFrame) -> Profile:
+    """Mergeable statistics of one batch"""
+    profile: Profile = {}
+    for col in df.columns:
+        series = df[col]
+        valid = series.dropna()
+        stats: Dict[str, Any] = {"count": int(len(valid)), "nulls": int(len(series) - len(valid))}
+        if series.dtype.kind in 'iuf':
+            values = valid.astype(float)
+            stats.update({
+                "sum": float(values.sum()),
+                "sum_sq": float((values * values).sum()),
+                "min": float(values.min()) if len(values) else None,
+                "max": float(values.max()) if len(values) else None
+            })
+        else:
+            counts = valid.astype(str).value_counts()
+            stats["values"] = (
+                {str(value): int(n) for value, n in counts.items()}
+                if len(counts) <= settings.PROFILE_MAX_TRACKED_VALUES else None
+            )
+        profile[str(col)] = stats
+    return profile
+
+def profile_batches(batches: Iterable[pd.DataFrame]) -> Profile:
+    """Profile a dataset one batch at a time"""
+    profile: Profile = {}
+    for batch in batches:
+        profile = merge_profiles(profile, profile_frame(batch))
+    return profile
+
+def merge_profiles(left: Profile, right: Profile) -> Profile:
+    """Profile of the union of two disjoint sets of rows"""
+    merged = {col: dict(stats) for col, stats in left.items()}
+    for col, stats in right.items():
+        if col not in merged:
+            merged[col] = dict(stats)
+            continue
+        target = merged[col]
+        target["count"] += stats["count"]
+        target["nulls"] += stats["nulls"]
+        if "sum" in target and "sum" in stats:
+            target["sum"] += stats["sum"]
+            target["sum_sq"] += stats["sum_sq"]
+            target["min"] = _extreme(min, target["min"], stats["min"])
+            target["max"] = _extreme(max, target["max"], stats["max"])
+        elif "values" in target:
+            target["values"] = _merge_counts(target["values"], stats.get("values"), 1)
+    return merged
+
+def subtract_profile(profile: Profile, removed: Profile) -> List[str]:
+    """Take removed rows out of ``profile`` in place.
+
+    Sums and counts are exact. A minimum or maximum that may have been
+    removed cannot be derived from what is left; it is cleared and the
+    names of those columns returned, so the caller can recompute them.
+    """
+    stale = []
+    for col, stats in removed.items():
+        target = profile.get(col)
+        if target is None:
+            continue
+        target["count"] -= stats["count"]
+        target["nulls"] -= stats["nulls"]
+        if "sum" in target and "sum" in stats:
+            target["sum"] -= stats["sum"]
+            target["sum_sq"] -= stats["sum_sq"]
+            if stats["min"] is not None and (
+                target["min"] is None or stats["min"] <= target["min"] or stats["max"] >= target["max"]
+            ):
+                target["min"] = target["max"] = None
+                stale.append(col)
+        elif "values" in target:
+            target["values"] = _merge_counts(target["values"], stats.get("values"), -1)
+    return stale
+
+def summarize(profile: Profile) -> Dict[str, Any]:
+    """Summary statistics and missing values derived from a profile"""
+    summary = {}
+    for col, stats in profile.items():
+        if "sum" not in stats:
+            continue
+        n = stats["count"]
+        mean = stats["sum"] / n if n else None
+        std = None
+        if n > 1:
+            variance = (stats["sum_sq"] - n * mean * mean) / (n - 1)
+            std = math.sqrt(max(variance, 0.0))
+        summary[col] = {"count": n, "mean": mean, "std": std, "min": stats["min"], "max": stats["max"]}
+    return {
+        "summary_statistics": summary,
+        "missing_values": {col: stats["nulls"] for col, stats in profile.items()}
+    }
+
+def _extreme(pick, left: Optional[float], right: Optional[float]) -> Optional[float]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return pick(left, right)
+
+def _merge_counts(left: Optional[Dict[str, int]], right: Optional[Dict[str, int]], sign: int) -> Optional[Dict[str, int]]:
+    if left is None or right is None:
+        return None
+    merged = dict(left)
+    for value, n in right.items():
+        merged[value] = merged.get(value, 0) + sign * n
+        if merged[value] <= 0:
+            del merged[value]
+    if len(merged) > settings.PROFILE_MAX_TRACKED_VALUES:
+        return None
+    return merged
@@ -0,0 +1,209 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+import logging
+import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+from ..core.config import get_settings
+from ..core.exceptions import DatasetRefreshError
+from .connection_sessions import get_session_store
+from .database_service import DatabaseService
+from .dataset_profile import merge_profiles, profile_batches, profile_frame, subtract_profile, summarize
+from .dataset_store import DatasetStore, DatasetWriter
+from .query_cache import get_query_cache
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class DatasetRefresher:
+    """Brings a dataset stored by ``/api/connect`` up to date with its source.
+
+    The source query is re-run restricted to rows past the watermark, the
+    largest value of ``watermark_column`` seen so far, so a refresh costs
+    the size of the delta rather than the table:
+
+    * ``append`` adds the new rows as new Parquet parts
+    * ``upsert`` also re-fetches rows equal to the watermark and replaces
+      stored rows with the same ``key_columns``, rewriting only the parts
+      holding them
+
+    The dataset's profile (``dataset_profile``) is updated from the delta
+    and the removed rows instead of being recomputed. The watermark, mode
+    and keys are kept in the dataset metadata under ``refresh``, so later
+    refreshes only need a ``connection_id``. Refreshes of the same dataset
+    hold its ``DatasetStore.lock`` and run one at a time.
+    """
+
+    def __init__(self):
+        self.dataset_store = DatasetStore()
+        self.db_service = DatabaseService()
+        self.sessions = get_session_store()
+
+    async def refresh(self, dataset_id: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        # Refreshes of one dataset read the same watermark and number their
+        # parts from the same index, so they take turns
+        lock = self.dataset_store.lock(dataset_id)
+        await run_in_threadpool(lock.acquire)
+        try:
+            return await self._refresh(dataset_id, options)
+        finally:
+            lock.release()
+
+    async def _refresh(self, dataset_id: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = self.dataset_store.get_metadata(dataset_id)
+        source = metadata.get("source") or {}
+        if not source.get("query"):
+            raise DatasetRefreshError(f"Dataset {dataset_id} was not stored from a database query")
+
+        session = self.sessions.get(options["connection_id"])
+        if any(session.params[key] != source.get(key) for key in ("type", "host", "database")):
+            raise DatasetRefreshError("The connection does not point at the dataset's source database")
+
+        state = dict(metadata.get("refresh") or {})
+        column = options.get("watermark_column") or state.get("watermark_column")
+        if not column:
+            raise DatasetRefreshError("watermark_column is required on the first refresh")
+        if column not in metadata.get("columns", []):
+            raise DatasetRefreshError(f"Watermark column not in dataset: {column}")
+        mode = options.get("mode") or state.get("mode") or "append"
+        key_columns = options.get("key_columns") or state.get("key_columns") or []
+        if mode == "upsert" and not key_columns:
+            raise DatasetRefreshError("key_columns are required for upsert")
+        missing = [key for key in key_columns if key not in metadata.get("columns", [])]
+        if missing:
+            raise DatasetRefreshError(f"Key columns not in dataset: {', '.join(missing)}")
+
+        if column == state.get("watermark_column"):
+            watermark = _decode_watermark(state.get("watermark"))
+        else:
+            watermark = await run_in_threadpool(self._max_value, dataset_id, column)
+        if watermark is None and metadata.get("rows"):
+            # Re-running the whole query would add every row a second time
+            raise DatasetRefreshError(f"Watermark column {column} has no values to resume from")
+        profile = metadata.get("profile")
+        if profile is None:
+            # One full pass the first time; later refreshes only see deltas
+            profile = await run_in_threadpool(profile_batches, self.dataset_store.iter_batches(dataset_id))
+
+        params = {**session.params, "timeout": options.get("timeout")}
+        if watermark is None:
+            # Nothing stored yet, so the delta is the whole result
+            params.update(query=source["query"], parameters=source.get("parameters"))
+        else:
+            # Bind a plain Python value rather than a NumPy/pandas scalar
+            watermark = _decode_watermark(_encode_watermark(watermark))
+            query, delta_parameters = self.db_service.delta_query(
+                source["type"], source["query"], column, watermark, inclusive=(mode == "upsert")
+            )
+            params.update(query=query, parameters={**(source.get("parameters") or {}), **delta_parameters})
+
+        writer = self.dataset_store.appender(dataset_id)
+        rows_before = writer.rows
+        frames = self.db_service.stream(params)
+        try:
+            with writer:
+                if mode == "upsert":
+                    added, replaced, watermark, profile, stale = await self._upsert(
+                        writer, frames, column, key_columns, watermark, profile
+                    )
+                else:
+                    added, replaced, stale = 0, 0, []
+                    async for df in frames:
+                        if df.empty:
+                            continue
+                        await run_in_threadpool(writer.write, df)
+                        added += len(df)
+                        watermark = _max(watermark, df[column].max())
+                        profile = merge_profiles(profile, profile_frame(df))
+                writer.metadata.update(profile=profile, refresh={
+                    "watermark_column": column,
+                    "watermark": _encode_watermark(watermark),
+                    "mode": mode,
+                    "key_columns": key_columns,
+                    "refreshed_at": datetime.now().isoformat()
+                })
+        finally:
+            await frames.aclose()
+
+        if stale:
+            profile = await run_in_threadpool(self._restore_extremes, dataset_id, profile, stale)
+            self.dataset_store.update_metadata(dataset_id, {"profile": profile})
+
+        # Cached /api/connect responses describe the dataset as it was
+        get_query_cache().invalidate(session.connection_id)
+        logger.info(f"Refreshed dataset {dataset_id}: {added} rows added, {replaced} replaced ({mode})")
+        return {
+            "dataset_id": dataset_id,
+            "mode": mode,
+            "rows_added": added,
+            "rows_replaced": replaced,
+            "rows_before": rows_before,
+            "rows": writer.rows,
+            "refresh": writer.metadata["refresh"],
+            "profile": summarize(profile)
+        }
+
+    async def _upsert(
+        self,
+        writer: DatasetWriter,
+        frames: AsyncIterator[pd.DataFrame],
+        column: str,
+        key_columns: List[str],
+        watermark: Any,
+        profile: Dict[str, Any]
+    ):
+        # Keys must be deduplicated across batches before stored rows are
+        # replaced, so the delta is collected first; deltas are small
+        batches = [df async for df in frames if not df.empty]
+        if not batches:
+            return 0, 0, watermark, profile, []
+        delta = pd.concat(batches, ignore_index=True)
+        missing = [key for key in key_columns if key not in delta.columns]
+        if missing:
+            raise DatasetRefreshError(f"Key columns not in query result: {', '.join(missing)}")
+        delta = delta.drop_duplicates(subset=key_columns, keep="last")
+
+        removed = await run_in_threadpool(writer.remove_rows, delta[key_columns])
+        await run_in_threadpool(writer.write, delta)
+        stale = subtract_profile(profile, profile_frame(removed)) if len(removed) else []
+        # Extremes cleared above are recomputed from the stored column after
+        # commit; the delta's own extremes alone would not be right
+        profile = merge_profiles(profile, profile_frame(delta))
+        return len(delta), len(removed), _max(watermark, delta[column].max()), profile, stale
+
+    def _max_value(self, dataset_id: str, column: str) -> Any:
+        values = self.dataset_store.load(dataset_id, columns=[column])[column].dropna()
+        return values.max() if len(values) else None
+
+    def _restore_extremes(self, dataset_id: str, profile: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+        df = self.dataset_store.load(dataset_id, columns=columns)
+        for col in columns:
+            values = df[col].dropna()
+            profile[col]["min"] = float(values.min()) if len(values) else None
+            profile[col]["max"] = float(values.max()) if len(values) else None
+        return profile
+
+def _max(current: Any, candidate: Any) -> Any:
+    if candidate is None or pd.isna(candidate):
+        return current
+    if current is None:
+        return candidate
+    return max(current, candidate)
+
+def _encode_watermark(value: Any) -> Optional[Dict[str, Any]]:
+    # Metadata is JSON; keep the type so the value binds the same way
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": pd.Timestamp(value).isoformat()}
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, (int, float)):
+        return {"type": "number", "value": value}
+    return {"type": "string", "value": str(value)}
+
+def _decode_watermark(encoded: Optional[Dict[str, Any]]) -> Any:
+    if encoded is None:
+        return None
+    if encoded["type"] == "datetime":
+        return pd.Timestamp(encoded["value"]).to_pydatetime()
+    return encoded["value"]
@@ -0,0 +1,381 @@
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+from pathlib import Path
+from datetime import datetime
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from ..core.config import get_settings
+from ..core.exceptions import DatasetNotFoundError
+from ..utils.payload import encode_frame
+from ..utils.dtype_optimizer import merge_dtypes, optimize_dtypes
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class DatasetStore:
+    """Server-side columnar storage for processed datasets.
+
+    Each dataset lives in its own directory under ``DATASET_STORE_DIR``::
+
+        <dataset_id>/metadata.json
+        <dataset_id>/part-00000.parquet
+
+    Clients only ever see the ``dataset_id``, the schema and a small preview;
+    report, export and visualization code loads the frame back by ID.
+    """
+
+    METADATA_FILE = "metadata.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.DATASET_STORE_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def save(self, df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Persist a DataFrame and return its new dataset ID"""
+        return self.save_batches([df], metadata)
+
+    def save_batches(self, batches: Iterable[pd.DataFrame], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Persist a stream of DataFrame batches, one Parquet part per batch.
+
+        Batches are written as they arrive, so callers that parse
+        incrementally never need the whole dataset in memory at once. With
+        ``DTYPE_OPTIMIZATION`` each batch is downcast and dictionary-encoded
+        first, and the bytes saved are recorded under ``memory``.
+        """
+        with self.writer(metadata) as writer:
+            for batch in batches:
+                writer.write(batch)
+        return writer.dataset_id
+
+    def writer(self, metadata: Optional[Dict[str, Any]] = None) -> "DatasetWriter":
+        """Open a new dataset for callers that produce batches themselves"""
+        return DatasetWriter(self, metadata)
+
+    def appender(self, dataset_id: str, metadata: Optional[Dict[str, Any]] = None) -> "DatasetWriter":
+        """Open an existing dataset to add parts to, or to remove rows from"""
+        return DatasetWriter(self, metadata, dataset_id=dataset_id)
+
+    def load(self, dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load a stored dataset, optionally projecting a subset of columns"""
+        parts = self._part_files(dataset_id)
+        if not parts:
+            return pd.DataFrame(columns=columns or self.get_metadata(dataset_id).get("columns", []))
+
+        frames = [pd.read_parquet(part, columns=columns) for part in parts]
+        if len(frames) == 1:
+            return frames[0]
+        return self._restore_categories(dataset_id, pd.concat(frames, ignore_index=True))
+
+    def iter_batches(self, dataset_id: str, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield a stored dataset one Parquet part at a time"""
+        for part in self._part_files(dataset_id):
+            yield pd.read_parquet(part, columns=columns)
+
+    def preview(
+        self,
+        dataset_id: str,
+        rows: Optional[int] = None,
+        payload_format: Optional[str] = None
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Return the first rows of a stored dataset in the given wire format"""
+        rows = rows or settings.DATASET_PREVIEW_ROWS
+        return self.to_preview(self.slice(dataset_id, 0, rows), rows, payload_format)
+
+    @staticmethod
+    def to_preview(
+        df: pd.DataFrame,
+        rows: Optional[int] = None,
+        payload_format: Optional[str] = None
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Encode the head of a DataFrame in the given wire format"""
+        rows = rows or settings.DATASET_PREVIEW_ROWS
+        return encode_frame(df.head(rows), payload_format or settings.DEFAULT_PAYLOAD_FORMAT)
+
+    def slice(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Load a window of rows, optionally projecting columns.
+
+        Part row counts come from the Parquet footers, so parts entirely
+        outside the window are never read.
+        """
+        frames = []
+        part_start = 0
+        end = offset + limit if limit is not None else None
+        for part in self._part_files(dataset_id):
+            parquet_file = pq.ParquetFile(part)
+            part_end = part_start + parquet_file.metadata.num_rows
+            if part_end > offset and (end is None or part_start < end):
+                df = parquet_file.read(columns=columns).to_pandas()
+                frames.append(df.iloc[max(offset - part_start, 0):None if end is None else end - part_start])
+            part_start = part_end
+            if end is not None and part_start >= end:
+                break
+
+        if not frames:
+            return pd.DataFrame(columns=columns or self.get_metadata(dataset_id).get("columns", []))
+        if len(frames) == 1:
+            return frames[0]
+        return self._restore_categories(dataset_id, pd.concat(frames, ignore_index=True))
+
+    def lock(self, dataset_id: str) -> "DatasetLock":
+        """Exclusive lock on a dataset, for read-modify-write updates like refresh"""
+        return DatasetLock(self._dataset_dir(dataset_id) / self.LOCK_FILE)
+
+    def get_metadata(self, dataset_id: str) -> Dict[str, Any]:
+        """Read the metadata stored alongside a dataset"""
+        metadata_path = self._dataset_dir(dataset_id) / self.METADATA_FILE
+        return json.loads(metadata_path.read_text())
+
+    def update_metadata(self, dataset_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge updates into a dataset's metadata"""
+        metadata = self.get_metadata(dataset_id)
+        metadata.update(updates)
+        self._write_metadata(dataset_id, metadata)
+        return metadata
+
+    def size(self, dataset_id: str) -> int:
+        """Bytes the dataset's Parquet parts take on disk"""
+        return sum(part.stat().st_size for part in self._part_files(dataset_id))
+
+    def exists(self, dataset_id: str) -> bool:
+        try:
+            self._dataset_dir(dataset_id)
+            return True
+        except DatasetNotFoundError:
+            return False
+
+    def delete(self, dataset_id: str) -> None:
+        shutil.rmtree(self._dataset_dir(dataset_id))
+        logger.info(f"Deleted dataset {dataset_id}")
+
+    def _dataset_dir(self, dataset_id: str) -> Path:
+        # Dataset IDs are plain uuid4 hex strings; reject anything else so an
+        # ID can never be used to walk outside the store directory.
+        if not dataset_id or not _DATASET_ID_PATTERN.match(dataset_id):
+            raise DatasetNotFoundError(dataset_id)
+        dataset_dir = self.root / dataset_id
+        if not (dataset_dir / self.METADATA_FILE).exists():
+            raise DatasetNotFoundError(dataset_id)
+        return dataset_dir
+
+    def _part_files(self, dataset_id: str) -> List[Path]:
+        return sorted(self._dataset_dir(dataset_id).glob("part-*.parquet"))
+
+    def _write_metadata(self, dataset_id: str, metadata: Dict[str, Any]) -> None:
+        # Write to a temp file first so readers never see a half-written file
+        metadata_path = self.root / dataset_id / self.METADATA_FILE
+        tmp_path = metadata_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(metadata, default=str))
+        tmp_path.replace(metadata_path)
+
+    def _restore_categories(self, dataset_id: str, df: pd.DataFrame) -> pd.DataFrame:
+        # Concatenating parts whose categories differ yields object columns;
+        # re-encode the ones stored as category
+        dtypes = self.get_metadata(dataset_id).get("dtypes", {})
+        for col in df.columns:
+            if dtypes.get(col) == 'category' and df[col].dtype != 'category':
+                df[col] = df[col].astype('category')
+        return df
+
+    def _prepare_for_parquet(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Make a frame Parquet-compatible without changing well-typed columns"""
+        df = df.copy(deep=False)
+        df.columns = [str(col) for col in df.columns]
+
+        for col in df.select_dtypes(include=['object']).columns:
+            inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+            if inferred in ('mixed', 'mixed-integer', 'mixed-integer-float') or inferred.startswith('unknown'):
+                # Arrow needs one type per column; fall back to strings for
+                # mixed columns (e.g. free-form JSON values) but keep nulls
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+        return df.replace([np.inf, -np.inf], np.nan)
+
+class DatasetLock:
+    """``flock`` on a file in the dataset directory.
+
+    The lock is taken on a fresh file descriptor, so it excludes other
+    threads of this process as well as other workers sharing the store.
+    ``acquire`` blocks; async callers run it on the threadpool.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            # Closing the descriptor drops the lock
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "DatasetLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+class DatasetWriter:
+    """Writes one dataset part per batch; see ``DatasetStore.save_batches``.
+
+    Used as a context manager: the metadata is written when the block
+    exits cleanly, and the partial dataset is removed if it raises.
+    Opened on an existing ``dataset_id`` (``DatasetStore.appender``) it
+    adds parts after the existing ones and can drop rows by key; nothing
+    is visible to readers until ``commit`` and ``abort`` leaves the
+    dataset as it was.
+    """
+
+    def __init__(
+        self,
+        store: DatasetStore,
+        metadata: Optional[Dict[str, Any]] = None,
+        dataset_id: Optional[str] = None
+    ):
+        self.store = store
+        self.metadata = metadata or {}
+        self.memory = {"bytes_before": 0, "bytes_after": 0, "bytes_saved": 0}
+        # Parts written and parts rewritten (staged file -> part) by this writer
+        self._written: List[Path] = []
+        self._replaced: Dict[Path, Path] = {}
+        if dataset_id is None:
+            self.dataset_id = uuid.uuid4().hex
+            self.dataset_dir = store.root / self.dataset_id
+            self.dataset_dir.mkdir()
+            self.existing: Optional[Dict[str, Any]] = None
+            self.rows = 0
+            self.dtypes: Dict[str, str] = {}
+            self._parts = 0
+        else:
+            self.dataset_id = dataset_id
+            self.existing = store.get_metadata(dataset_id)
+            self.dataset_dir = store._dataset_dir(dataset_id)
+            self.rows = self.existing.get("rows", 0)
+            self.dtypes = dict(self.existing.get("dtypes") or {})
+            parts = store._part_files(dataset_id)
+            self._parts = int(parts[-1].stem.split("-")[1]) + 1 if parts else 0
+
+    def write(self, batch: pd.DataFrame) -> None:
+        batch = self.store._prepare_for_parquet(batch)
+        if settings.DTYPE_OPTIMIZATION:
+            batch, report = optimize_dtypes(batch)
+            for key in self.memory:
+                self.memory[key] += report[key]
+        # Staged under a name readers ignore until commit
+        path = self.dataset_dir / f"part-{self._parts:05d}.parquet"
+        staged = path.with_suffix(".parquet.tmp") if self.existing is not None else path
+        batch.to_parquet(staged, index=False)
+        self._written.append(staged)
+        self._parts += 1
+        self.rows += len(batch)
+        # Batches may be downcast differently; record the type the
+        # concatenated column loads as
+        for col, dtype in batch.dtypes.astype(str).items():
+            self.dtypes[col] = merge_dtypes(self.dtypes.get(col, dtype), dtype)
+
+    def remove_rows(self, keys: pd.DataFrame) -> pd.DataFrame:
+        """Drop the committed rows whose ``keys.columns`` values appear in ``keys``.
+
+        Only the key columns of each part are read to find matches, and
+        only parts holding a match are rewritten. Returns the removed rows.
+        """
+        key_columns = list(keys.columns)
+        wanted = _key_index(keys)
+        removed = []
+        for part in self.store._part_files(self.dataset_id):
+            matches = _key_index(pd.read_parquet(part, columns=key_columns)).isin(wanted)
+            if not matches.any():
+                continue
+            df = pd.read_parquet(part)
+            removed.append(df[matches])
+            staged = part.with_suffix(".parquet.tmp")
+            df[~matches].to_parquet(staged, index=False)
+            self._replaced[staged] = part
+            self.rows -= int(matches.sum())
+        if not removed:
+            return pd.DataFrame(columns=list(self.dtypes))
+        return pd.concat(removed, ignore_index=True)
+
+    def commit(self) -> str:
+        for staged in self._written:
+            if staged.suffix == ".tmp":
+                staged.replace(staged.with_suffix(""))
+        for staged, part in self._replaced.items():
+            staged.replace(part)
+
+        metadata = {
+            **(self.existing or {}),
+            **self.metadata,
+            "dataset_id": self.dataset_id,
+            "columns": list(self.dtypes),
+            "rows": self.rows,
+            "dtypes": self.dtypes,
+            "memory": self._memory() if settings.DTYPE_OPTIMIZATION else None
+        }
+        if self.existing is None:
+            metadata["created_at"] = datetime.now().isoformat()
+        else:
+            metadata["updated_at"] = datetime.now().isoformat()
+        self.store._write_metadata(self.dataset_id, metadata)
+        logger.info(f"Stored dataset {self.dataset_id} ({self.rows} rows)")
+        return self.dataset_id
+
+    def abort(self) -> None:
+        if self.existing is None:
+            shutil.rmtree(self.dataset_dir, ignore_errors=True)
+            return
+        for staged in [*self._written, *self._replaced]:
+            staged.unlink(missing_ok=True)
+
+    def _memory(self) -> Dict[str, int]:
+        previous = (self.existing or {}).get("memory") or {}
+        return {key: previous.get(key, 0) + value for key, value in self.memory.items()}
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+            return
+        try:
+            self.commit()
+        except Exception:
+            self.abort()
+            raise
+
+def _key_index(keys: pd.DataFrame) -> pd.MultiIndex:
+    # Stored parts are downcast, so compare numbers as floats (5 == 5.0)
+    # and everything else by its string form
+    return pd.MultiIndex.from_frame(pd.DataFrame({
+        col: keys[col].astype(float) if pd.api.types.is_numeric_dtype(keys[col]) else keys[col].astype(str)
+        for col in keys.columns
+    }))
+
+def get_dataset_store() -> DatasetStore:
+    return DatasetStore()
@@ -6,6 +6,7 @@ from pathlib import Path
 import logging
 from ..schemas.export import ExportOptions
 from ..core.exceptions import ExportError
+from .dataset_store import DatasetStore
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,7 @@ class ExportService:
         self.template_dir = Path("app/templates")
         self.temp_dir = Path("temp")
         self.temp_dir.mkdir(exist_ok=True)
+        self.dataset_store = DatasetStore()
 
     async def export_report(
         self,
@@ -22,6 +24,7 @@ class ExportService:
     ) -> Dict[str, Any]:
         """Export report in specified format with customizations"""
         try:
+            report_data = self._attach_dataset_tables(report_data, options)
             if options.format == 'pdf':
                 return await self._export_pdf(report_data, options)
             elif options.format == 'html':
@@ -113,6 +116,21 @@ class ExportService:
             logger.error(f"JSON export failed: {str(e)}")
             raise ExportError(f"Failed to generate JSON: {str(e)}")
 
+    def _attach_dataset_tables(
+        self,
+        report_data: Dict[str, Any],
+        options: ExportOptions
+    ) -> Dict[str, Any]:
+        """Load table rows for reports that reference a stored dataset by ID"""
+        dataset_id = report_data.get("dataset_id") or report_data.get("metadata", {}).get("dataset_id")
+        if not dataset_id or not options.includeTables or "data_tables" in report_data:
+            return report_data
+        
+        return {
+            **report_data,
+            "data_tables": self.dataset_store.preview(dataset_id, payload_format="records")
+        }
+
     def _filter_report_data(
         self,
         report_data: Dict[str, Any],
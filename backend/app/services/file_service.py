@@ -1,40 +1,73 @@
 from fastapi import UploadFile, HTTPException
 import pandas as pd
 import json
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union, BinaryIO
 import io
 import logging
-import chardet
 import numpy as np
 from datetime import datetime
+from ..core.config import get_settings
+from .dataset_store import DatasetStore
+from .upload_cache import get_upload_cache
+from ..utils.csv_sniffer import has_consistent_fields, sniff_csv
+from ..utils.csv_reader import read_csv
+from ..utils.excel_reader import list_sheets, read_sheets
+from ..utils.json_stream import (
+    JSONSchemaTracker,
+    detect_json_layout,
+    iter_json_array,
+    iter_ndjson,
+    iter_record_batches
+)
+from ..utils.decompression import detect_compression, open_decompressed
+from ..utils.columnar_reader import COLUMNAR_EXTENSIONS, detect_columnar_format, iter_columnar_frames, map_buffer
+from ..utils.log_parser import TemplateMiner, detect_log_format, iter_log_batches, iter_log_records
+from ..schemas.upload import IngestOptions
+from ..core.exceptions import DatasetNotFoundError, DecompressionLimitError
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class FileService:
     ALLOWED_EXTENSIONS = {
         'csv': ['text/csv', 'application/csv'],
         'json': ['application/json'],
+        'ndjson': ['application/x-ndjson'],
+        'jsonl': ['application/x-ndjson', 'application/jsonl'],
         'xlsx': ['application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'],
+        'parquet': ['application/vnd.apache.parquet', 'application/octet-stream'],
+        'feather': ['application/vnd.apache.arrow.file', 'application/octet-stream'],
+        'arrow': ['application/vnd.apache.arrow.file', 'application/octet-stream'],
+        'arrows': ['application/vnd.apache.arrow.stream', 'application/octet-stream'],
         'txt': ['text/plain'],
         'log': ['text/plain']
     }
 
-    async def read_file(self, file: UploadFile) -> Dict[str, Any]:
+    def __init__(self, payload_format: Optional[str] = None, progress: Optional[Any] = None):
+        self.dataset_store = DatasetStore()
+        self.upload_cache = get_upload_cache()
+        self.payload_format = payload_format
+        # Background ingest jobs pass themselves in to receive stage and
+        # row count updates
+        self.progress = progress
+        self._rows_parsed = 0
+
+    async def read_file(
+        self,
+        file: UploadFile,
+        options: Optional[IngestOptions] = None,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Read and process uploaded file"""
         try:
-            content = await file.read()
-            file_extension = file.filename.split('.')[-1].lower()
-            
-            # Handle different file types
-            if file_extension in ['csv', 'xlsx', 'xls']:
-                return await self._process_structured_data(content, file_extension)
-            elif file_extension == 'json':
-                return await self._process_json_data(content)
-            elif file_extension in ['txt', 'log']:
-                return await self._process_text_data(content)
-            else:
-                return await self._process_binary_data(content, file_extension)
+            # The multipart parser has already spooled the upload to a temp
+            # file; parse straight from it instead of copying it into memory.
+            return await self.read_source(file.file, file.filename, options, content_hash)
             
+        except HTTPException:
+            raise
+        except DecompressionLimitError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except Exception as e:
             logger.error(f"File processing error: {str(e)}")
             raise HTTPException(
@@ -42,132 +75,379 @@ class FileService:
                 detail=f"Error processing file: {str(e)}"
             )
 
-    async def _process_structured_data(self, content: bytes, extension: str) -> Dict[str, Any]:
+    async def read_source(
+        self,
+        source: BinaryIO,
+        filename: str,
+        options: Optional[IngestOptions] = None,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Parse and store an upload from a seekable binary file.
+
+        ``content_hash`` is the SHA-256 of the bytes, taken while they were
+        received; uploads without one bypass the upload cache.
+        """
+        source.seek(0)
+        file_extension = filename.split('.')[-1].lower()
+        options = options or IngestOptions()
+        
+        # Identical bytes parsed with the same options were already
+        # stored; answer from the dataset store instead of re-parsing
+        cache_key = None
+        if settings.UPLOAD_CACHE_ENABLED and content_hash:
+            cache_key = self.upload_cache.key(content_hash, file_extension, options.model_dump(exclude={"background"}))
+            cached = self._cached_result(cache_key)
+            if cached is not None:
+                logger.info(f"Upload cache hit for {filename}")
+                return cached
+        
+        self._report_progress(stage="parsing", bytes_processed=0)
+        compression = detect_compression(source, file_extension)
+        if compression is None:
+            result = await self._dispatch(source, file_extension, options)
+        else:
+            result = await self._dispatch_decompressed(source, filename, compression, options)
+        
+        if cache_key and result and result.get("dataset_id"):
+            self._cache_result(cache_key, content_hash, result)
+        return result
+
+    async def _dispatch_decompressed(
+        self,
+        source: BinaryIO,
+        filename: str,
+        compression: str,
+        options: IngestOptions
+    ) -> Dict[str, Any]:
+        """Parse a compressed upload by inflating it as the parser reads"""
+        reader, stream, inner_name = open_decompressed(source, filename, compression)
+        try:
+            result = await self._dispatch(reader, inner_name.split('.')[-1].lower(), options)
+        except Exception:
+            # Parsers re-wrap errors from their input; surface the limit
+            if stream.limit_error is not None:
+                raise stream.limit_error from None
+            raise
+        finally:
+            reader.detach()
+            stream.close()
+        
+        if result and isinstance(result.get("metadata"), dict):
+            result["metadata"]["compression"] = {
+                "format": compression,
+                "compressed_bytes": self._file_size(source),
+                "inner_file": inner_name
+            }
+        return result
+
+    def _report_progress(self, **fields: Any) -> None:
+        if self.progress is not None:
+            self.progress.update(**fields)
+
+    async def _dispatch(self, source: BinaryIO, file_extension: str, options: IngestOptions) -> Dict[str, Any]:
+        """Route an upload to the parser for its file type"""
+        # Columnar binaries are recognised by their magic bytes whatever
+        # the upload is called
+        columnar_format = detect_columnar_format(source)
+        if columnar_format or file_extension in COLUMNAR_EXTENSIONS:
+            return await self._process_columnar_data(source, columnar_format, file_extension, options)
+        if file_extension == 'xlsx':
+            return await self._process_workbook(source, options)
+        elif file_extension in ['csv', 'xls']:
+            return await self._process_structured_data(source, file_extension)
+        elif file_extension == 'json':
+            return await self._process_json_data(source)
+        elif file_extension in ['ndjson', 'jsonl']:
+            return await self._process_json_data(source, layout='ndjson')
+        elif file_extension in ['txt', 'log']:
+            return await self._process_text_data(source, file_extension)
+        else:
+            return await self._process_binary_data(source, file_extension)
+
+    def _cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a cached upload result with a fresh preview"""
+        cached = self.upload_cache.get(cache_key)
+        if cached is None:
+            return None
+        try:
+            cached["data"] = self.dataset_store.preview(cached["dataset_id"], payload_format=self.payload_format)
+        except DatasetNotFoundError:
+            # The dataset was deleted since; parse the upload again
+            self.upload_cache.discard(cache_key)
+            return None
+        cached["metadata"]["cache_hit"] = True
+        return cached
+
+    def _cache_result(self, cache_key: str, content_hash: str, result: Dict[str, Any]) -> None:
+        """Fingerprint the stored datasets and remember the upload result"""
+        dataset_ids = [result["dataset_id"]] + [
+            sheet["dataset_id"]
+            for sheet in result["metadata"].get("sheets", [])
+            if sheet.get("dataset_id") and sheet["dataset_id"] != result["dataset_id"]
+        ]
+        size = 0
+        for dataset_id in dataset_ids:
+            self.dataset_store.update_metadata(dataset_id, {"content_hash": content_hash})
+            size += self.dataset_store.size(dataset_id)
+        
+        result["metadata"]["content_hash"] = content_hash
+        self.upload_cache.put(cache_key, {**result, "data": None}, size, dataset_ids)
+
+    def _file_size(self, source: BinaryIO) -> int:
+        """Return the size of a seekable file without reading it"""
+        position = source.tell()
+        size = source.seek(0, io.SEEK_END)
+        source.seek(position)
+        return size
+
+    async def _process_structured_data(self, source: BinaryIO, extension: str) -> Dict[str, Any]:
         """Process structured data files (CSV, Excel)"""
         try:
             if extension == 'csv':
-                # Try different encodings
-                encodings = ['utf-8', 'latin1', 'cp1252']
-                df = None
-                for encoding in encodings:
-                    try:
-                        df = pd.read_csv(io.BytesIO(content), encoding=encoding)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                
-                if df is None:
-                    raise ValueError("Unable to decode CSV file with supported encodings")
+                # Pick encoding and dialect from a bounded sample, then parse once
+                dialect = sniff_csv(source, settings.CSV_SNIFF_SAMPLE_SIZE)
+                df = read_csv(source, dialect)
+                return self._store_structured_data(df, {"dialect": dialect.to_dict()})
             else:
-                df = pd.read_excel(io.BytesIO(content))
+                df = pd.read_excel(source)
+
+            return self._store_structured_data(df)
+        except Exception as e:
+            raise ValueError(f"Error processing structured data: {str(e)}")
 
-            # Handle missing values and data type inference
-            df = df.replace({np.nan: None})
+    async def _process_workbook(self, source: BinaryIO, options: IngestOptions) -> Dict[str, Any]:
+        """Process Excel workbooks sheet by sheet with read-only streaming"""
+        try:
+            sheets = list_sheets(source)
+            sheet_names = [sheet["name"] for sheet in sheets]
+            if not sheet_names:
+                raise ValueError("Workbook contains no sheets")
             
-            return {
-                "type": "structured",
-                "data": df.to_dict(orient='records'),
-                "metadata": {
-                    "columns": list(df.columns),
-                    "rows": len(df),
-                    "dtypes": df.dtypes.astype(str).to_dict()
-                }
+            if not options.sheets:
+                selected = sheet_names[:1]
+            elif "*" in options.sheets:
+                selected = sheet_names
+            else:
+                missing = [name for name in options.sheets if name not in sheet_names]
+                if missing:
+                    raise ValueError(f"Sheets not found in workbook: {', '.join(missing)}")
+                selected = options.sheets
+            
+            frames = read_sheets(source, selected)
+            
+            # Each parsed sheet becomes its own dataset; the first one is
+            # returned at the top level like a single-sheet upload
+            results = {
+                name: self._store_structured_data(df, {"sheet": name})
+                for name, df in frames.items()
             }
+            for sheet in sheets:
+                if sheet["name"] in results:
+                    sheet["dataset_id"] = results[sheet["name"]]["dataset_id"]
+            
+            primary = results[selected[0]]
+            primary["metadata"]["sheets"] = sheets
+            return primary
         except Exception as e:
-            raise ValueError(f"Error processing structured data: {str(e)}")
+            raise ValueError(f"Error processing workbook: {str(e)}")
 
-    async def _process_json_data(self, content: bytes) -> Dict[str, Any]:
-        """Process JSON data with better error handling"""
+    def _store_structured_data(self, df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Persist a parsed frame and return its ID, schema and a preview"""
+        return self._store_structured_batches([df], metadata)
+
+    def _store_structured_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Persist frames as they are parsed and return the ID, schema and a preview"""
+        head = []
+        
+        def capture_head(frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+            for df in frames:
+                if not head:
+                    head.append(df.head(settings.DATASET_PREVIEW_ROWS))
+                self._rows_parsed += len(df)
+                self._report_progress(stage="storing", rows_parsed=self._rows_parsed)
+                yield df
+        
+        dataset_id = self.dataset_store.save_batches(capture_head(batches), {
+            **(metadata or {}),
+            "source": {"type": "file"}
+        })
+        stored = self.dataset_store.get_metadata(dataset_id)
+        preview = head[0] if head else pd.DataFrame()
+        
+        return {
+            "type": "structured",
+            "dataset_id": dataset_id,
+            "data": self.dataset_store.to_preview(preview, payload_format=self.payload_format),
+            "data_type": self._determine_data_type(preview),
+            "metadata": {
+                **(metadata or {}),
+                "columns": stored["columns"],
+                "rows": stored["rows"],
+                "dtypes": stored["dtypes"],
+                "memory": stored.get("memory"),
+                "preview_rows": len(preview)
+            }
+        }
+
+    async def _process_json_data(self, source: BinaryIO, layout: Optional[str] = None) -> Dict[str, Any]:
+        """Process JSON data, streaming arrays and NDJSON record by record"""
+        text_stream = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
         try:
-            data = json.loads(content)
-            if isinstance(data, list):
-                # Try to convert to DataFrame for structured data
-                try:
-                    df = pd.DataFrame(data)
-                    return {
-                        "type": "structured",
-                        "data": data,
-                        "metadata": {
-                            "columns": list(df.columns),
-                            "rows": len(df),
-                            "dtypes": df.dtypes.astype(str).to_dict()
-                        }
-                    }
-                except:
-                    pass
+            layout = layout or detect_json_layout(text_stream)
+            if layout in ('array', 'ndjson'):
+                if layout == 'array':
+                    records = iter_json_array(text_stream, settings.UPLOAD_CHUNK_SIZE)
+                else:
+                    records = iter_ndjson(text_stream)
+                
+                # Records are grouped into columnar batches and written out
+                # as they are parsed, so memory is bounded by one batch
+                schema = JSONSchemaTracker()
+                batches = (df for df, _ in iter_record_batches(records, settings.JSON_BATCH_SIZE, schema))
+                result = self._store_structured_batches(batches, {"format": layout})
+                
+                self.dataset_store.update_metadata(result["dataset_id"], {"json_schema": schema.to_dict()})
+                result["metadata"]["json_schema"] = schema.to_dict()
+                return result
             
             # Handle as unstructured data
+            data = json.load(text_stream)
             return {
                 "type": "unstructured",
                 "data": data,
                 "metadata": {
-                    "size": len(content),
+                    "size": self._file_size(source),
                     "format": "json"
                 }
             }
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON format: {str(e)}")
+        finally:
+            # Leave the underlying upload file open for the caller
+            text_stream.detach()
 
-    async def _process_text_data(self, content: bytes) -> Dict[str, Any]:
-        """Process text files with encoding detection"""
+    async def _process_text_data(self, source: BinaryIO, extension: str = 'txt') -> Dict[str, Any]:
+        """Process text files as logs, delimited tables or plain text"""
         try:
-            # Detect encoding
-            result = chardet.detect(content)
-            encoding = result['encoding'] or 'utf-8'
-            
-            text = content.decode(encoding)
-            
-            # Try to detect if it's structured (e.g., CSV-like)
-            lines = text.split('\n')
-            if len(lines) > 1:
-                delimiter = self._detect_delimiter(lines[0])
-                if delimiter:
-                    try:
-                        df = pd.read_csv(io.StringIO(text), sep=delimiter)
-                        return {
-                            "type": "structured",
-                            "data": df.to_dict(orient='records'),
-                            "metadata": {
-                                "columns": list(df.columns),
-                                "rows": len(df),
-                                "dtypes": df.dtypes.astype(str).to_dict()
-                            }
-                        }
-                    except:
-                        pass
+            # One bounded sample decides the encoding, whether the text is a
+            # known log format and whether it is really a delimited table
+            dialect = sniff_csv(source, settings.CSV_SNIFF_SAMPLE_SIZE)
+            encoding = dialect.encoding
+            
+            lines = self._sample_lines(source, encoding)
+            # A consistent table is a table even when its first column is a
+            # timestamp; log detection only gets what does not parse as one
+            tried_delimited = False
+            if has_consistent_fields(lines, dialect):
+                tried_delimited = True
+                try:
+                    df = read_csv(source, dialect)
+                except Exception:
+                    df = None
+                    source.seek(0)
+                if df is not None:
+                    return self._store_structured_data(df, {"dialect": dialect.to_dict()})
+            
+            log_format = detect_log_format(lines)
+            if log_format is None and extension == 'log' and not dialect.is_delimited:
+                # Unrecognised .log files are still clustered as free text
+                log_format = 'text'
+            if log_format is not None:
+                return await self._process_log_data(source, encoding, log_format)
+            
+            if dialect.is_delimited and not tried_delimited:
+                try:
+                    df = read_csv(source, dialect)
+                except Exception:
+                    df = None
+                    source.seek(0)
+                if df is not None:
+                    return self._store_structured_data(df, {"dialect": dialect.to_dict()})
+            
+            text_stream = io.TextIOWrapper(source, encoding=encoding, errors='replace', newline='')
+            try:
+                text = text_stream.read()
+            finally:
+                # Leave the underlying upload file open for the caller
+                text_stream.detach()
             
             return {
                 "type": "unstructured",
                 "data": {
                     "text": text,
-                    "lines": len(lines)
+                    "lines": len(text.split('\n'))
                 },
                 "metadata": {
                     "encoding": encoding,
-                    "size": len(content)
+                    "size": self._file_size(source)
                 }
             }
         except Exception as e:
             raise ValueError(f"Error processing text data: {str(e)}")
 
-    def _detect_delimiter(self, header_line: str) -> Optional[str]:
-        """Detect the delimiter in a potential CSV header line"""
-        common_delimiters = [',', ';', '\t', '|']
-        max_count = 0
-        best_delimiter = None
-        
-        for delimiter in common_delimiters:
-            count = header_line.count(delimiter)
-            if count > max_count:
-                max_count = count
-                best_delimiter = delimiter
+    async def _process_log_data(self, source: BinaryIO, encoding: str, log_format: str) -> Dict[str, Any]:
+        """Stream a log file line by line into a templated, columnar dataset"""
+        text_stream = io.TextIOWrapper(source, encoding=encoding, errors='replace', newline='')
+        try:
+            miner = TemplateMiner(settings.LOG_TEMPLATE_SIMILARITY, settings.LOG_MAX_TEMPLATES)
+            records = iter_log_records(text_stream, log_format, settings.LOG_MAX_FIELDS)
+            batches = iter_log_batches(records, log_format, miner, settings.LOG_BATCH_SIZE)
+            result = self._store_structured_batches(batches, {"format": "log", "log_format": log_format})
+        finally:
+            # Leave the underlying upload file open for the caller
+            text_stream.detach()
         
-        return best_delimiter if max_count > 0 else None
+        templates = miner.summary()
+        self.dataset_store.update_metadata(result["dataset_id"], {"log_templates": templates})
+        result["metadata"]["log_templates"] = templates
+        return result
+
+    def _sample_lines(self, source: BinaryIO, encoding: str) -> List[str]:
+        """Decode the leading complete lines of a text upload"""
+        position = source.tell()
+        sample = source.read(settings.CSV_SNIFF_SAMPLE_SIZE)
+        source.seek(position)
+        lines = sample.decode(encoding, errors='replace').splitlines()
+        if len(sample) >= settings.CSV_SNIFF_SAMPLE_SIZE:
+            lines = lines[:-1]
+        return lines
+
+    async def _process_columnar_data(
+        self,
+        source: BinaryIO,
+        columnar_format: Optional[str],
+        extension: str,
+        options: IngestOptions
+    ) -> Dict[str, Any]:
+        """Read Parquet, Feather and Arrow IPC uploads from a memory map"""
+        try:
+            if columnar_format is None:
+                raise ValueError(f"File does not look like a valid .{extension} file")
+            
+            # Row groups / record batches become dataset parts one at a time
+            scan: Dict[str, Any] = {}
+            batches = iter_columnar_frames(
+                map_buffer(source),
+                columnar_format,
+                columns=options.columns,
+                filters=options.filters,
+                scan=scan
+            )
+            result = self._store_structured_batches(batches, {"format": columnar_format})
+            
+            self.dataset_store.update_metadata(result["dataset_id"], {"scan": scan})
+            result["metadata"]["scan"] = scan
+            return result
+        except Exception as e:
+            raise ValueError(f"Error processing {extension} file: {str(e)}")
 
-    async def _process_binary_data(self, content: bytes, extension: str) -> Dict[str, Any]:
-        """Process binary files"""
-        # Implement binary file processing logic here
-        pass
+    async def _process_binary_data(self, source: BinaryIO, extension: str) -> Dict[str, Any]:
+        """Reject uploads no parser recognises"""
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: .{extension}")
 
     def _determine_data_type(self, df: pd.DataFrame) -> str:
         """Determine the type of data in the DataFrame"""
@@ -190,7 +470,7 @@ class FileService:
             return "mixed"
 
     async def process_unstructured_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process unstructured data in background"""
+        """Profile unstructured text; run by ingest jobs off the request path"""
         try:
             # Extract text content if available
             text_content = data.get('text', '')
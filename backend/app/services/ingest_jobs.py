@@ -0,0 +1,273 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+from datetime import datetime
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from ..core.config import get_settings
+from ..core.exceptions import JobNotFoundError
+from ..core.responses import dumps
+from ..schemas.upload import IngestOptions
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class IngestJob:
+    """State of one background upload, updated from the worker thread.
+
+    With a ``path`` every update is also written there, so workers other
+    than the one running the job can report its status.
+    """
+
+    def __init__(self, filename: str, bytes_total: int, path: Optional[Path] = None):
+        self.job_id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"
+        self.stage = "queued"
+        self.bytes_total = bytes_total
+        self.bytes_processed = 0
+        self.rows_parsed = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[float] = None
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> "IngestJob":
+        """Snapshot of a job from the state another worker wrote"""
+        job = cls(state["filename"], state["bytes_total"])
+        for name, value in state.items():
+            setattr(job, name, value)
+        return job
+
+    def update(self, **fields: Any) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated_at = datetime.now().isoformat()
+            state = self._state()
+        self._persist(state)
+
+    def advance(self, bytes_processed: int) -> None:
+        # Readers seek back and forth (sniffing, zip directories); report
+        # the furthest point reached
+        if bytes_processed > self.bytes_processed:
+            self.bytes_processed = bytes_processed
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "bytes_total": self.bytes_total,
+            "bytes_processed": self.bytes_processed,
+            "rows_parsed": self.rows_parsed,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+            "result": self.result
+        }
+
+    def _persist(self, state: Dict[str, Any]) -> None:
+        if self.path is None:
+            return
+        # Write to a temp file first so readers never see a half-written file
+        tmp_path = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(dumps(state))
+        tmp_path.replace(self.path)
+
+class _ProgressReader(io.RawIOBase):
+    """Raw file wrapper that reports read progress to a job"""
+
+    def __init__(self, source: BinaryIO, job: IngestJob):
+        self._source = source
+        self._job = job
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._source.tell()
+
+    def fileno(self) -> int:
+        # Lets columnar readers memory-map the job's temp file
+        return self._source.fileno()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._source.seek(offset, whence)
+
+    def readinto(self, buffer) -> int:
+        n = self._source.readinto(buffer)
+        self._job.advance(self._source.tell())
+        return n
+
+class IngestJobManager:
+    """Runs large uploads through FileService on a bounded worker pool.
+
+    The upload is moved out of the request's spooled file into a temp file
+    owned by the job, so the request can return ``202`` straight away while
+    parsing, type inference and storage run on a worker thread. Job status
+    is written under ``INGEST_JOB_DIR``, next to the dataset store, so any
+    worker can answer a status poll. Finished jobs are kept for
+    ``INGEST_JOB_TTL`` seconds.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, root: Optional[str] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.INGEST_MAX_WORKERS,
+            thread_name_prefix="ingest"
+        )
+        self.root = Path(root or settings.INGEST_JOB_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        source: BinaryIO,
+        filename: str,
+        options: IngestOptions,
+        payload_format: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ) -> IngestJob:
+        """Take ownership of an upload and queue it for parsing.
+
+        Without a ``content_hash`` the upload is hashed as it is copied.
+        """
+        extension = os.path.splitext(filename)[1]
+        fd, path = tempfile.mkstemp(prefix="ingest-", suffix=extension)
+        try:
+            with os.fdopen(fd, "wb") as target:
+                source.seek(0)
+                digest = hashlib.sha256() if content_hash is None else None
+                for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b''):
+                    target.write(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+                size = target.tell()
+        except Exception:
+            os.unlink(path)
+            raise
+
+        if digest is not None:
+            content_hash = digest.hexdigest()
+        job = IngestJob(filename, size)
+        job.path = self._job_path(job.job_id)
+        job.update()
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, path, options, payload_format, content_hash)
+        logger.info(f"Queued ingest job {job.job_id} for {filename} ({size} bytes)")
+        return job
+
+    def get(self, job_id: str) -> IngestJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        # Submitted to another worker process
+        if not _JOB_ID_PATTERN.match(job_id):
+            raise JobNotFoundError(job_id)
+        try:
+            return IngestJob.restore(json.loads(self._job_path(job_id).read_bytes()))
+        except FileNotFoundError:
+            raise JobNotFoundError(job_id)
+
+    def _run(
+        self,
+        job: IngestJob,
+        path: str,
+        options: IngestOptions,
+        payload_format: Optional[str],
+        content_hash: str
+    ) -> None:
+        # Imported here to avoid a cycle: FileService reports into jobs
+        from .file_service import FileService
+
+        job.update(status="running", stage="reading")
+        try:
+            with open(path, "rb", buffering=0) as raw:
+                source = io.BufferedReader(_ProgressReader(raw, job), settings.UPLOAD_CHUNK_SIZE)
+                file_service = FileService(payload_format=payload_format, progress=job)
+                # The FileService parsers are coroutines but do blocking work;
+                # give this worker its own event loop to drive them
+                result = asyncio.run(self._ingest(file_service, source, job.filename, options, content_hash))
+            if not result:
+                # Pollers wait for a result; never report success without one
+                raise ValueError(f"No data could be read from {job.filename}")
+            job.update(status="completed", stage="completed", bytes_processed=job.bytes_total, result=result)
+            logger.info(f"Ingest job {job.job_id} completed ({job.rows_parsed} rows)")
+        except Exception as e:
+            logger.error(f"Ingest job {job.job_id} failed: {str(e)}")
+            job.update(status="failed", stage="failed", error=str(getattr(e, "detail", e)))
+        finally:
+            job.finished_at = time.monotonic()
+            os.unlink(path)
+
+    async def _ingest(
+        self,
+        file_service,
+        source: BinaryIO,
+        filename: str,
+        options: IngestOptions,
+        content_hash: str
+    ) -> Dict[str, Any]:
+        result = await file_service.read_source(source, filename, options, content_hash)
+        if result and result.get("type") == "unstructured" and isinstance(result.get("data"), dict):
+            file_service.progress.update(stage="profiling")
+            profiled = await file_service.process_unstructured_data(result["data"])
+            result["metadata"] = {**result.get("metadata", {}), **profiled["metadata"]}
+        return result
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - settings.INGEST_JOB_TTL
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+        # Status files of finished jobs, whichever worker ran them. A
+        # finished job's file was last written when it finished
+        wall_cutoff = time.time() - settings.INGEST_JOB_TTL
+        for path in self.root.glob("*.json"):
+            try:
+                if path.stat().st_mtime >= wall_cutoff:
+                    continue
+                if json.loads(path.read_bytes())["status"] in ("completed", "failed"):
+                    path.unlink()
+            except (FileNotFoundError, ValueError, KeyError):
+                # Pruned by another worker, or being replaced right now
+                continue
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+@lru_cache()
+def get_ingest_jobs() -> IngestJobManager:
+    return IngestJobManager()
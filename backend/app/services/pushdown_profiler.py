@@ -0,0 +1,365 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import logging
+import pandas as pd
+from pymongo.errors import ExecutionTimeout, OperationFailure
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from ..core.config import get_settings
+from ..core.exceptions import DatabaseConnectionError, QueryTimeoutError
+from .connection_registry import build_dsn, get_connection_registry
+from .database_executor import CancellationToken, get_database_executor
+from .database_service import DatabaseService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_QUARTILES = (0.25, 0.5, 0.75)
+
+class PushdownProfiler:
+    """Computes report statistics inside PostgreSQL or MongoDB.
+
+    Counts, null rates, mean/std/min/max, quartiles, IQR outlier rates,
+    blank-value rates, pairwise correlations and top-k value counts are
+    built as one aggregate SQL statement (``percentile_cont``,
+    ``count(*) FILTER``, ``GROUP BY ... LIMIT``) or as ``$group``/``$facet``
+    pipelines, so only the summary leaves the database. Column types are
+    read off a ``PROFILE_SAMPLE_ROWS`` sample, which also feeds the LLM
+    prompt and the charts.
+
+    ``profile`` returns the same sections ``ReportService`` computes in
+    pandas for uploaded data, plus the row count and the sample.
+    """
+
+    def __init__(self):
+        self.db_service = DatabaseService()
+        self.registry = get_connection_registry()
+        self.executor = get_database_executor()
+
+    async def profile(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        frames = self.db_service.stream({**params, "fetch_size": settings.PROFILE_SAMPLE_ROWS})
+        try:
+            sample = await frames.__anext__()
+        finally:
+            await frames.aclose()
+
+        columns = [str(col) for col in sample.columns]
+        sample.columns = columns
+        numeric = [col for col in columns if sample[col].dtype.kind in 'iuf']
+        categorical = [
+            col for col in columns
+            if sample[col].dtype == object or isinstance(sample[col].dtype, pd.CategoricalDtype)
+        ]
+        correlated = numeric[:settings.PROFILE_MAX_CORRELATION_COLUMNS]
+
+        # The aggregates scan the whole result; a timeout or cancellation
+        # stops them on the server too, not just the wait for them
+        timeout = params.get('timeout') or settings.DB_QUERY_TIMEOUT
+        token = CancellationToken()
+        if params['type'] == 'postgresql':
+            raw = await self.executor.run(
+                lambda: self._aggregate_sql(params, columns, numeric, categorical, correlated, token, timeout),
+                timeout=timeout,
+                token=token
+            )
+        elif params['type'] == 'mongodb':
+            try:
+                raw = await self.executor.run(
+                    lambda: self._aggregate_mongo(params, columns, numeric, categorical, correlated, timeout),
+                    timeout=timeout,
+                    token=token
+                )
+            except ExecutionTimeout:
+                raise QueryTimeoutError(f"Query exceeded the {timeout:g}s timeout")
+        else:
+            raise DatabaseConnectionError(f"Unsupported database type: {params['type']}")
+
+        profile = _assemble(raw, columns, numeric, categorical, correlated)
+        profile["sample"] = sample
+        return profile
+
+    def _aggregate_sql(
+        self,
+        params: Dict[str, Any],
+        columns: List[str],
+        numeric: List[str],
+        categorical: List[str],
+        correlated: List[str],
+        token: CancellationToken,
+        timeout: float
+    ) -> Dict[str, Any]:
+        engine = self.registry.engine(build_dsn(params))
+        quote = engine.dialect.identifier_preparer.quote
+        index = {col: i for i, col in enumerate(columns)}
+
+        def number(col: str) -> str:
+            return f"{quote(col)}::double precision"
+
+        quartiles = [
+            f"percentile_cont({p}) WITHIN GROUP (ORDER BY {number(col)}) AS c{index[col]}_q{n}"
+            for col in numeric for n, p in enumerate(_QUARTILES, start=1)
+        ]
+
+        aggregates = ["count(*) AS n_rows"]
+        for col in columns:
+            i = index[col]
+            aggregates.append(f"count({quote(col)}) AS c{i}_count")
+            if col in numeric:
+                value = number(col)
+                iqr = f"(q.c{i}_q3 - q.c{i}_q1)"
+                aggregates += [
+                    f"avg({value}) AS c{i}_mean",
+                    f"stddev_samp({value}) AS c{i}_std",
+                    f"min({value}) AS c{i}_min",
+                    f"max({value}) AS c{i}_max",
+                    f"count(*) FILTER (WHERE {value} BETWEEN q.c{i}_q1 - 1.5 * {iqr} "
+                    f"AND q.c{i}_q3 + 1.5 * {iqr}) AS c{i}_in_range",
+                ]
+            else:
+                # Nulls count as valid, like pandas' astype(str) check
+                aggregates.append(
+                    f"count(*) FILTER (WHERE {quote(col)} IS NULL OR length(btrim({quote(col)}::text)) > 0) AS c{i}_nonblank"
+                )
+        for a, left in enumerate(correlated):
+            for right in correlated[a + 1:]:
+                aggregates.append(f"corr({number(left)}, {number(right)}) AS corr_{index[left]}_{index[right]}")
+
+        top_values = [
+            f"(SELECT json_agg(t) FROM (SELECT {quote(col)}::text AS value, count(*) AS n FROM src "
+            f"WHERE {quote(col)} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC LIMIT {settings.PROFILE_TOP_K}) t) "
+            f"AS c{index[col]}_top"
+            for col in categorical
+        ]
+
+        # The source query is referenced more than once, so PostgreSQL
+        # materializes it and scans the table a single time
+        source = params['query'].strip().rstrip(';')
+        ctes = [f"src AS ({source})"]
+        if quartiles:
+            ctes.append(f"q AS (SELECT {', '.join(quartiles)} FROM src)")
+            ctes.append(f"agg AS (SELECT {', '.join(aggregates)} FROM src CROSS JOIN q)")
+            select = ["agg.*", "q.*"] + top_values
+            sql = f"WITH {', '.join(ctes)} SELECT {', '.join(select)} FROM agg CROSS JOIN q"
+        else:
+            ctes.append(f"agg AS (SELECT {', '.join(aggregates)} FROM src)")
+            sql = f"WITH {', '.join(ctes)} SELECT {', '.join(['agg.*'] + top_values)} FROM agg"
+
+        try:
+            with engine.connect() as connection:
+                with DatabaseService.guard_statements(connection, token, timeout):
+                    row = connection.execute(text(sql), params.get('parameters') or {}).mappings().one()
+        except DBAPIError as e:
+            DatabaseService.raise_if_timed_out(e, token, timeout)
+            raise
+        return dict(row)
+
+    def _aggregate_mongo(
+        self,
+        params: Dict[str, Any],
+        columns: List[str],
+        numeric: List[str],
+        categorical: List[str],
+        correlated: List[str],
+        timeout: float
+    ) -> Dict[str, Any]:
+        client = self.registry.mongo_client(build_dsn(params))
+        collection_name, pipeline = DatabaseService.mongo_pipeline(params['query'])
+        collection = client[params['database']][collection_name]
+        max_time_ms = int(timeout * 1000)
+        index = {col: i for i, col in enumerate(columns)}
+        # Field paths cannot start with '$'
+        fields = {col: f"${col}" for col in columns if not col.startswith('$')}
+
+        def present(field: str) -> Dict[str, Any]:
+            return {"$ne": [{"$ifNull": [field, None]}, None]}
+
+        def stats_group(with_quartiles: bool) -> Dict[str, Any]:
+            group: Dict[str, Any] = {"_id": None, "n_rows": {"$sum": 1}}
+            for col, field in fields.items():
+                i = index[col]
+                group[f"c{i}_count"] = {"$sum": {"$cond": [present(field), 1, 0]}}
+                if col in numeric:
+                    group.update({
+                        f"c{i}_mean": {"$avg": field},
+                        f"c{i}_std": {"$stdDevSamp": field},
+                        f"c{i}_min": {"$min": field},
+                        f"c{i}_max": {"$max": field},
+                    })
+                    if with_quartiles:
+                        # MongoDB 7.0+
+                        group[f"c{i}_quartiles"] = {
+                            "$percentile": {"input": field, "p": list(_QUARTILES), "method": "approximate"}
+                        }
+                else:
+                    text_value = {"$convert": {"input": field, "to": "string", "onError": "?", "onNull": "nan"}}
+                    group[f"c{i}_nonblank"] = {
+                        "$sum": {"$cond": [{"$gt": [{"$strLenCP": {"$trim": {"input": text_value}}}, 0]}, 1, 0]}
+                    }
+            # corr(x, y) from running sums over the rows where both are numbers
+            for a, left in enumerate(correlated):
+                for right in correlated[a + 1:]:
+                    if left not in fields or right not in fields:
+                        continue
+                    key = f"corr_{index[left]}_{index[right]}"
+                    x, y = fields[left], fields[right]
+                    both = {"$and": [{"$isNumber": x}, {"$isNumber": y}]}
+                    for name, term in (
+                        ("n", 1), ("x", x), ("y", y),
+                        ("xx", {"$multiply": [x, x]}),
+                        ("yy", {"$multiply": [y, y]}),
+                        ("xy", {"$multiply": [x, y]})
+                    ):
+                        group[f"{key}__{name}"] = {"$sum": {"$cond": [both, term, 0]}}
+            return group
+
+        facets = {
+            f"c{index[col]}_top": [
+                {"$match": {col: {"$ne": None}}},
+                {"$group": {"_id": fields[col], "n": {"$sum": 1}}},
+                {"$sort": {"n": -1}},
+                {"$limit": settings.PROFILE_TOP_K}
+            ]
+            for col in categorical if col in fields
+        }
+
+        def run(with_quartiles: bool) -> Dict[str, Any]:
+            stages = pipeline + [{"$facet": {"stats": [{"$group": stats_group(with_quartiles)}], **facets}}]
+            result = next(collection.aggregate(stages, allowDiskUse=True, maxTimeMS=max_time_ms), {})
+            raw = (result.get("stats") or [{}])[0]
+            for key in facets:
+                raw[key] = [{"value": item["_id"], "n": item["n"]} for item in result.get(key, [])]
+            return raw
+
+        try:
+            raw = run(with_quartiles=bool(numeric))
+        except ExecutionTimeout:
+            raise
+        except OperationFailure as e:
+            logger.info(f"$percentile unavailable, profiling without quartiles: {str(e)}")
+            raw = run(with_quartiles=False)
+
+        for col in numeric:
+            i = index[col]
+            quartiles = raw.pop(f"c{i}_quartiles", None)
+            if quartiles:
+                raw[f"c{i}_q1"], raw[f"c{i}_q2"], raw[f"c{i}_q3"] = quartiles
+        for key in [key for key in raw if key.endswith("__n")]:
+            raw[key[:-3]] = _correlation(*(raw.pop(f"{key[:-3]}__{name}") for name in ("n", "x", "y", "xx", "yy", "xy")))
+
+        # IQR outlier rates need the quartiles, so they take a second pass
+        ranges = {}
+        for col in numeric:
+            i = index[col]
+            if raw.get(f"c{i}_q1") is None or col not in fields:
+                continue
+            iqr = raw[f"c{i}_q3"] - raw[f"c{i}_q1"]
+            bounds = [
+                {"$gte": [fields[col], raw[f"c{i}_q1"] - 1.5 * iqr]},
+                {"$lte": [fields[col], raw[f"c{i}_q3"] + 1.5 * iqr]},
+                {"$isNumber": fields[col]}
+            ]
+            ranges[f"c{i}_in_range"] = {"$sum": {"$cond": [{"$and": bounds}, 1, 0]}}
+        if ranges:
+            stages = pipeline + [{"$group": {"_id": None, **ranges}}]
+            raw.update(next(collection.aggregate(stages, allowDiskUse=True, maxTimeMS=max_time_ms), {}))
+        return raw
+
+def _correlation(n: float, x: float, y: float, xx: float, yy: float, xy: float) -> Optional[float]:
+    if n < 2:
+        return None
+    variance = (n * xx - x * x) * (n * yy - y * y)
+    if variance <= 0:
+        return None
+    return (n * xy - x * y) / variance ** 0.5
+
+def _number(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _assemble(
+    raw: Dict[str, Any],
+    columns: List[str],
+    numeric: List[str],
+    categorical: List[str],
+    correlated: List[str]
+) -> Dict[str, Any]:
+    """Shape the aggregate row like ReportService's pandas sections"""
+    index = {col: i for i, col in enumerate(columns)}
+    rows = int(raw.get("n_rows") or 0)
+
+    def value(col: str, name: str) -> Optional[float]:
+        return _number(raw.get(f"c{index[col]}_{name}"))
+
+    def percent(count: Optional[float]) -> Optional[float]:
+        if count is None:
+            return None
+        return round(float(count) / rows * 100, 2) if rows else 0.0
+
+    counts = {col: int(raw.get(f"c{index[col]}_count") or 0) for col in columns}
+
+    summary_statistics = {
+        col: {
+            "count": counts[col],
+            "mean": value(col, "mean"),
+            "std": value(col, "std"),
+            "min": value(col, "min"),
+            "25%": value(col, "q1"),
+            "50%": value(col, "q2"),
+            "75%": value(col, "q3"),
+            "max": value(col, "max")
+        }
+        for col in numeric
+    }
+
+    correlation_matrix = None
+    if correlated:
+        correlation_matrix = {col: {} for col in correlated}
+        for a, left in enumerate(correlated):
+            correlation_matrix[left][left] = 1.0
+            for right in correlated[a + 1:]:
+                r = _number(raw.get(f"corr_{index[left]}_{index[right]}"))
+                correlation_matrix[left][right] = correlation_matrix[right][left] = r
+
+    completeness_details = {col: percent(counts[col]) for col in columns}
+    accuracy_details = {}
+    for col in columns:
+        valid = raw.get(f"c{index[col]}_in_range" if col in numeric else f"c{index[col]}_nonblank")
+        if valid is not None:
+            accuracy_details[col] = percent(valid)
+
+    return {
+        "rows": rows,
+        "insights": {
+            "summary_statistics": summary_statistics,
+            "missing_values": {col: rows - counts[col] for col in columns},
+            "correlation_matrix": correlation_matrix
+        },
+        "statistical_analysis": {
+            "numerical_analysis": {
+                "mean": {col: value(col, "mean") for col in numeric},
+                "median": {col: value(col, "q2") for col in numeric},
+                "std": {col: value(col, "std") for col in numeric}
+            },
+            "categorical_analysis": {
+                col: {str(item["value"]): item["n"] for item in raw.get(f"c{index[col]}_top") or []}
+                for col in categorical
+            }
+        },
+        "data_quality": {
+            "completeness": {
+                "score": round(sum(completeness_details.values()) / len(columns), 2) if columns else 100.0,
+                "details": completeness_details
+            },
+            "accuracy": {
+                "score": sum(accuracy_details.values()) / len(accuracy_details) if accuracy_details else 100.0,
+                "details": accuracy_details
+            },
+            "consistency": {
+                "score": 100.0,
+                "details": {}
+            }
+        }
+    }
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import logging
+import threading
+import time
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Statements whose results can be cached; anything else may write and
+# invalidates the cached results of its connection instead
+_READ_ONLY_KEYWORDS = ("select", "with", "table", "values", "show")
+
+def is_read_only(db_type: str, query: str) -> bool:
+    if db_type == 'mongodb':
+        # find() and aggregate() without $out/$merge
+        return '"$out"' not in query and '"$merge"' not in query
+    words = query.lstrip(" \t\r\n(").split(None, 1)
+    return bool(words) and words[0].lower() in _READ_ONLY_KEYWORDS
+
+class CachedQuery:
+    """A cached /api/connect result.
+
+    ``response`` is the JSON response without its preview and is shared
+    between hits, so treat it as read-only. Rendered bodies are kept per
+    payload format, so a repeat request is answered without touching the
+    database, the dataset store or the serializer.
+    """
+
+    def __init__(self, connection_id: str, dataset_id: str, response: Dict[str, Any], ttl: float):
+        self.connection_id = connection_id
+        self.dataset_id = dataset_id
+        self.response = response
+        self.bodies: Dict[str, bytes] = {}
+        self.expires_at = time.monotonic() + ttl
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.bodies.values())
+
+class QueryCache:
+    """Process-wide LRU of query results with a TTL per entry.
+
+    Keys hash the connection ID (database type, host, database name and a
+    digest of the DSN) with the query text and parameters, so credentials
+    never sit in the key. The database name matters for MongoDB, whose DSN
+    does not include it. Entries expire after the TTL they
+    were stored with and the least recently used ones are evicted beyond
+    ``QUERY_CACHE_MAX_ENTRIES`` entries or ``QUERY_CACHE_MAX_MB`` of
+    rendered bodies. Eviction leaves the dataset in the store.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or settings.QUERY_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.QUERY_CACHE_MAX_MB * 1024 * 1024
+        self._entries: "OrderedDict[str, CachedQuery]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(connection_id: str, query: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for one query against one database"""
+        payload = json.dumps([connection_id, query.strip(), parameters or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedQuery]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expired:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedQuery) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def add_body(self, key: str, payload_format: str, body: bytes) -> None:
+        """Keep a rendered response body on an existing entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or payload_format in entry.bodies:
+                return
+            entry.bodies[payload_format] = body
+            self._bytes += len(body)
+            self._evict()
+
+    def invalidate(self, connection_id: Optional[str] = None) -> int:
+        """Drop the entries of one connection, or all entries"""
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if connection_id is None or entry.connection_id == connection_id
+            ]
+            for key in keys:
+                self._remove(key)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached query results for {connection_id or 'all connections'}")
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, entry = next(iter(self._entries.items()))
+            self._remove(key)
+            logger.info(f"Evicted cached query result for {entry.connection_id}")
+
+@lru_cache()
+def get_query_cache() -> QueryCache:
+    return QueryCache()
@@ -1,21 +1,29 @@
 from typing import Dict, Any, Optional, Union
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import logging
 import uuid
-from ..core.exceptions import ReportGenerationError
+from ..core.exceptions import ReportGenerationError, DatasetNotFoundError
 from ..services.visualization_service import VisualizationService
 from ..services.llm_service import LLMService
+from ..services.dataset_profile import summarize
+from ..services.dataset_store import DatasetStore
+from ..services.pushdown_profiler import PushdownProfiler
 from ..utils.cohere_client import get_cohere_client
 from ..report_generators.generator import ReportGenerator
+from ..utils.payload import encode_frame, decode_frame
+from ..core.config import get_settings
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class ReportService:
     def __init__(self):
         self.viz_service = VisualizationService()
         self.llm_service = LLMService()
         self.cohere_client = get_cohere_client()
+        self.dataset_store = DatasetStore()
         
     async def process_data(
         self,
@@ -37,7 +45,7 @@ class ReportService:
                 df = pd.DataFrame([processed_data])
 
             return {
-                "data": df.to_dict(orient='records'),
+                "data": encode_frame(df, settings.DEFAULT_PAYLOAD_FORMAT),
                 "metadata": {
                     "columns": list(df.columns),
                     "rows": len(df),
@@ -48,27 +56,78 @@ class ReportService:
             logger.error(f"Data processing error: {str(e)}")
             raise ReportGenerationError(f"Failed to process data: {str(e)}")
 
+    async def load_dataframe(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        dataset_id: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Load report input from the dataset store, falling back to inline records"""
+        if dataset_id is None and isinstance(data, dict):
+            dataset_id = data.get("dataset_id")
+        
+        if dataset_id:
+            try:
+                return self.dataset_store.load(dataset_id)
+            except DatasetNotFoundError:
+                raise
+            except Exception as e:
+                raise ReportGenerationError(f"Failed to load dataset {dataset_id}: {str(e)}")
+        
+        # Legacy clients still post the rows inline, in any wire format
+        if isinstance(data, dict) and "data" in data and "format" not in data:
+            data = data["data"]
+        if data:
+            return decode_frame(data)
+        raise ReportGenerationError("Invalid data format")
+
     async def generate_report(
         self,
-        data: Dict[str, Any],
+        data: Optional[Dict[str, Any]],
         query: str,
-        format: str = "json"
+        format: str = "json",
+        dataset_id: Optional[str] = None,
+        source: Optional[Dict[str, Any]] = None
     ) -> Union[Dict[str, Any], bytes]:
-        """Generate analysis report"""
+        """Generate analysis report.
+
+        With ``source`` (DatabaseConnectionRequest fields) the statistics
+        are computed by the database itself and only a sample of the rows
+        is fetched for the LLM analysis and the charts.
+        """
         try:
             logger.info(f"Generating report with format: {format}")
             
-            # Process data and generate report content
-            processed_data = await self.process_data(data)
-            if not processed_data or "data" not in processed_data:
-                raise ReportGenerationError("Invalid data format")
-            
-            df = pd.DataFrame(processed_data["data"])
+            profile = None
+            if source is not None:
+                profile = await PushdownProfiler().profile(source)
+                df = profile["sample"]
+            else:
+                if dataset_id is None and isinstance(data, dict):
+                    dataset_id = data.get("dataset_id")
+                
+                # Load the dataset once; there is no records round-trip any more
+                df = await self.load_dataframe(data, dataset_id)
+                if dataset_id and not df.empty:
+                    # Refreshed datasets keep a profile of all their rows
+                    stored = self.dataset_store.get_metadata(dataset_id).get("profile")
+                    if stored:
+                        profile = await self._profile(df, self._stored_summary(df, summarize(stored)))
             if df.empty:
                 raise ReportGenerationError("No data to analyze")
             
             # Generate report content
-            report_content = await self._generate_report_content(df, query)
+            report_content = await self._generate_report_content(df, query, profile)
+            if source is not None:
+                report_content["metadata"]["source"] = {
+                    "type": source["type"],
+                    "host": source.get("host"),
+                    "database": source.get("database")
+                }
+            elif dataset_id:
+                report_content["metadata"]["dataset_id"] = dataset_id
+                report_content["metadata"]["source"] = self.dataset_store.get_metadata(dataset_id).get(
+                    "source", report_content["metadata"]["source"]
+                )
             
             # Generate final report in requested format
             report_generator = ReportGenerator(cohere_client=self.cohere_client)
@@ -76,15 +135,26 @@ class ReportService:
             
         except Exception as e:
             logger.error(f"Report generation failed: {str(e)}")
-            if isinstance(e, ReportGenerationError):
+            if isinstance(e, (ReportGenerationError, DatasetNotFoundError)):
                 raise e
             raise ReportGenerationError(f"Report generation failed: {str(e)}")
 
-    async def _generate_report_content(self, df: pd.DataFrame, query: str) -> Dict[str, Any]:
-        """Generate report content structure"""
+    async def _generate_report_content(
+        self,
+        df: pd.DataFrame,
+        query: str,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Generate report content structure.
+
+        ``profile`` holds statistics computed by ``PushdownProfiler`` over
+        the full result, in which case ``df`` is only a sample of it.
+        """
         try:
             llm_analysis = await self.llm_service.generate_analysis(df, query)
-            insights = await self._generate_insights(df)
+            if profile is None:
+                profile = await self._profile(df)
+            insights = profile["insights"]
             data_type = self._detect_data_type(df)
             visualizations = await self.viz_service.create_visualization(
                 df=df,
@@ -102,10 +172,10 @@ class ReportService:
                     },
                     "statistical_analysis": {
                         "time_series": None,
-                        "numerical": await self._generate_statistical_analysis(df),
+                        "numerical": profile["statistical_analysis"],
                         "categorical": None
                     },
-                    "data_quality": await self._assess_data_quality(df)
+                    "data_quality": profile["data_quality"]
                 },
                 "visualizations": visualizations or [],
                 "metadata": {
@@ -115,7 +185,7 @@ class ReportService:
                         "type": "file",
                         "name": "uploaded_data"
                     },
-                    "rows": len(df),
+                    "rows": profile["rows"],
                     "columns": len(df.columns)
                 }
             }
@@ -123,12 +193,60 @@ class ReportService:
             logger.error(f"Error generating report content: {str(e)}")
             raise ReportGenerationError(f"Failed to generate report content: {str(e)}")
 
-    async def _generate_insights(self, df: pd.DataFrame) -> Dict[str, Any]:
+    async def _profile(self, df: pd.DataFrame, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Statistics of an in-memory dataset, shaped like PushdownProfiler's.
+
+        ``summary`` is ``dataset_profile.summarize`` of the dataset's stored
+        profile; counts, means, deviations, extremes and missing values are
+        taken from it instead of being recomputed.
+        """
+        return {
+            "rows": len(df),
+            "insights": await self._generate_insights(df, summary),
+            "statistical_analysis": await self._generate_statistical_analysis(df, summary),
+            "data_quality": await self._assess_data_quality(df)
+        }
+
+    def _stored_summary(self, df: pd.DataFrame, summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Only trust a profile that describes exactly the rows loaded
+        stats = summary["summary_statistics"]
+        numeric = [str(col) for col in df.select_dtypes(include=['number']).columns]
+        if sorted(stats) != sorted(numeric) or sorted(summary["missing_values"]) != sorted(map(str, df.columns)):
+            return None
+        for col in numeric:
+            if stats[col]["count"] + summary["missing_values"][col] != len(df):
+                return None
+            if stats[col]["count"] and stats[col]["min"] is None:
+                # Extremes are cleared while an upsert recomputes them
+                return None
+        return summary
+
+    async def _generate_insights(self, df: pd.DataFrame, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate statistical insights from the data"""
         try:
+            if summary is None:
+                summary_statistics = df.describe().to_dict()
+                missing_values = df.isnull().sum().to_dict()
+            else:
+                # Only the quartiles need the rows
+                quartiles = df.select_dtypes(include=['number']).quantile([0.25, 0.5, 0.75])
+                summary_statistics = {
+                    col: {
+                        "count": stats["count"],
+                        "mean": stats["mean"],
+                        "std": stats["std"],
+                        "min": stats["min"],
+                        "25%": quartiles[col][0.25],
+                        "50%": quartiles[col][0.5],
+                        "75%": quartiles[col][0.75],
+                        "max": stats["max"]
+                    }
+                    for col, stats in summary["summary_statistics"].items()
+                }
+                missing_values = summary["missing_values"]
             return {
-                "summary_statistics": df.describe().to_dict(),
-                "missing_values": df.isnull().sum().to_dict(),
+                "summary_statistics": summary_statistics,
+                "missing_values": missing_values,
                 "correlation_matrix": df.select_dtypes(include=['number'])
                     .corr()
                     .to_dict() if not df.select_dtypes(include=['number']).empty else None
@@ -137,18 +255,29 @@ class ReportService:
             logger.warning(f"Error generating insights: {str(e)}")
             return {}
 
-    async def _generate_statistical_analysis(self, df: pd.DataFrame) -> Dict[str, Any]:
+    async def _generate_statistical_analysis(
+        self,
+        df: pd.DataFrame,
+        summary: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Generate detailed statistical analysis"""
         try:
+            numeric = df.select_dtypes(include=['number'])
+            if summary is None:
+                mean, std = numeric.mean().to_dict(), numeric.std().to_dict()
+            else:
+                stats = summary["summary_statistics"]
+                mean = {col: stats[col]["mean"] for col in stats}
+                std = {col: stats[col]["std"] for col in stats}
             return {
                 "numerical_analysis": {
-                    "mean": df.select_dtypes(include=['number']).mean().to_dict(),
-                    "median": df.select_dtypes(include=['number']).median().to_dict(),
-                    "std": df.select_dtypes(include=['number']).std().to_dict()
+                    "mean": mean,
+                    "median": numeric.median().to_dict(),
+                    "std": std
                 },
                 "categorical_analysis": {
                     col: df[col].value_counts().to_dict()
-                    for col in df.select_dtypes(include=['object']).columns
+                    for col in df.select_dtypes(include=['object', 'category']).columns
                 }
             }
         except Exception as e:
@@ -182,6 +311,13 @@ class ReportService:
                     upper = q3 + 1.5 * iqr
                     valid_range = df[col].between(lower, upper, inclusive='both')
                     accuracy["details"][col] = (valid_range.mean() * 100).round(2)
+                elif isinstance(df[col].dtype, pd.CategoricalDtype):
+                    # Check each distinct value once and map the result
+                    # through the codes; missing values (code -1) count as
+                    # valid like the 'nan' string below
+                    valid_categories = (df[col].cat.categories.astype(str).str.strip().str.len() > 0).to_numpy()
+                    valid_values = np.append(valid_categories, True)[df[col].cat.codes.to_numpy()]
+                    accuracy["details"][col] = round(valid_values.mean() * 100, 2)
                 else:
                     # For non-numeric columns, check for empty strings and whitespace
                     valid_values = df[col].astype(str).str.strip().str.len() > 0
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import copy
+import json
+import logging
+import threading
+from ..core.config import get_settings
+from ..core.exceptions import DatasetNotFoundError
+from .dataset_store import get_dataset_store
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class UploadCache:
+    """Process-wide LRU of parsed uploads keyed by content hash.
+
+    Entries hold the structured upload result (without its preview) and
+    point at the stored dataset, so a repeat upload of identical bytes is
+    answered from the dataset store without parsing anything. The cache
+    owns those datasets: ``UPLOAD_CACHE_MAX_MB`` bounds their size on
+    disk, and evicting an entry deletes them from the store.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or settings.UPLOAD_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.UPLOAD_CACHE_MAX_MB * 1024 * 1024
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(content_hash: str, extension: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for identical bytes parsed the same way"""
+        return f"{content_hash}:{extension}:{json.dumps(options or {}, sort_keys=True)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry["result"])
+
+    def put(self, key: str, result: Dict[str, Any], size: int, dataset_ids: List[str]) -> None:
+        entry = {"result": copy.deepcopy(result), "size": size, "dataset_ids": list(dataset_ids)}
+        evicted_ids: List[str] = []
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)["size"]
+            self._entries[key] = entry
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["size"]
+                evicted_ids.extend(evicted["dataset_ids"])
+                logger.info(f"Evicted upload cache entry {evicted_key.split(':', 1)[0]}")
+        # Deleting touches the disk; do it outside the lock
+        self._delete(evicted_ids)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry["size"]
+
+    def _delete(self, dataset_ids: List[str]) -> None:
+        store = get_dataset_store()
+        for dataset_id in dataset_ids:
+            try:
+                store.delete(dataset_id)
+            except DatasetNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+@lru_cache()
+def get_upload_cache() -> UploadCache:
+    return UploadCache()
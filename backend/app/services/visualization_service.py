@@ -3,7 +3,6 @@ import plotly.graph_objects as go
 import pandas as pd
 from typing import Dict, Any, List
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +66,7 @@ class VisualizationService:
                 template="plotly_dark"
             )
             
-            return json.loads(fig.to_json())
+            return fig.to_plotly_json()
             
         except Exception as e:
             logger.error(f"Time series plot creation failed: {str(e)}")
@@ -96,7 +95,7 @@ class VisualizationService:
                 template="plotly_dark"
             )
             
-            return json.loads(fig.to_json())
+            return fig.to_plotly_json()
             
         except Exception as e:
             logger.error(f"Numerical plot creation failed: {str(e)}")
@@ -126,7 +125,7 @@ class VisualizationService:
                 template="plotly_dark"
             )
             
-            return json.loads(fig.to_json())
+            return fig.to_plotly_json()
             
         except Exception as e:
             logger.error(f"Categorical plot creation failed: {str(e)}")
@@ -165,8 +164,7 @@ class VisualizationService:
             
             return {
                 "type": "mixed",
-                "data": fig.data,
-                "layout": fig.layout
+                **fig.to_plotly_json()
             }
             
         except Exception as e:
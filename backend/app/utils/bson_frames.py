@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+import pandas as pd
+from bson import Decimal128, ObjectId
+
+# Converts a whole column whose values are of the registered BSON type;
+# null entries must come back as nulls
+ColumnConverter = Callable[[pd.Series], pd.Series]
+
+def _to_string(series: pd.Series) -> pd.Series:
+    return series.astype(str).where(series.notna(), None)
+
+def _to_float(series: pd.Series) -> pd.Series:
+    # Decimal128's string form round-trips NaN and Infinity as well
+    return pd.to_numeric(_to_string(series), errors='coerce')
+
+def _to_datetime(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(series, errors='coerce')
+
+_CONVERTERS: Dict[type, ColumnConverter] = {
+    ObjectId: _to_string,
+    Decimal128: _to_float,
+    datetime: _to_datetime
+}
+
+def register_converter(bson_type: type, converter: ColumnConverter) -> None:
+    """Convert columns holding ``bson_type`` values with ``converter``"""
+    _CONVERTERS[bson_type] = converter
+
+def documents_to_frame(documents: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a DataFrame from a batch of MongoDB documents.
+
+    BSON values pandas cannot hold natively stay in object columns; each
+    such column is converted in one call by the converter registered for
+    the type of its first value, instead of walking the documents.
+    """
+    df = pd.DataFrame.from_records(documents) if documents else pd.DataFrame()
+    for col in df.columns:
+        series = df[col]
+        if series.dtype != object:
+            continue
+        first = series.first_valid_index()
+        if first is None:
+            continue
+        converter = _CONVERTERS.get(type(series[first]))
+        if converter is not None:
+            df[col] = converter(series)
+    return df
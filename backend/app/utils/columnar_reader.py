@@ -0,0 +1,216 @@
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence
+import io
+import logging
+import mmap
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_EXTENSIONS = {
+    'parquet': 'parquet',
+    'pq': 'parquet',
+    'feather': 'arrow_file',
+    'arrow': 'arrow_file',
+    'ipc': 'arrow_file',
+    'arrows': 'arrow_stream',
+}
+
+_PARQUET_MAGIC = b'PAR1'
+_ARROW_FILE_MAGIC = b'ARROW1'
+_FEATHER_V1_MAGIC = b'FEA1'
+_IPC_CONTINUATION = b'\xff\xff\xff\xff'
+
+_FILTER_OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+def detect_columnar_format(source: BinaryIO) -> Optional[str]:
+    """Identify Parquet, Arrow IPC (file/stream) and Feather by magic bytes"""
+    position = source.tell()
+    source.seek(0)
+    head = source.read(8)
+    source.seek(position)
+
+    if head.startswith(_PARQUET_MAGIC):
+        return 'parquet'
+    if head.startswith(_ARROW_FILE_MAGIC):
+        # Feather v2 is the Arrow IPC file format
+        return 'arrow_file'
+    if head.startswith(_FEATHER_V1_MAGIC):
+        return 'feather_v1'
+    if head.startswith(_IPC_CONTINUATION) and len(head) == 8:
+        return 'arrow_stream'
+    return None
+
+def map_buffer(source: BinaryIO) -> pa.Buffer:
+    """Expose an upload as an Arrow buffer without copying it into memory.
+
+    Files backed by a descriptor are memory-mapped, so Arrow reads column
+    chunks straight from the page cache and only touches the pages that
+    projection and row-group pruning leave; in-memory spools are wrapped
+    as they are.
+    """
+    try:
+        fileno = source.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        fileno = None
+
+    if fileno is not None:
+        if source.writable():
+            # The upload spool is opened for writing; make sure every byte
+            # has reached the file before mapping it
+            source.flush()
+        if source.seek(0, io.SEEK_END) == 0:
+            raise ValueError("File is empty")
+        return pa.py_buffer(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ))
+
+    source.seek(0)
+    return pa.py_buffer(source.read())
+
+def iter_columnar_frames(
+    buffer: pa.Buffer,
+    fmt: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Sequence[Sequence[Any]]] = None,
+    scan: Optional[Dict[str, Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames from a Parquet/Arrow buffer, one per row group or batch.
+
+    ``columns`` projects the read and ``filters`` (``[column, op, value]``
+    triples, ANDed) drop rows; Parquet row groups whose min/max statistics
+    rule a filter out are skipped without being decoded. Counts of what was
+    read and skipped are written into ``scan``.
+    """
+    filters = _validate_filters(filters or [])
+    expression = _filter_expression(filters)
+    scan = scan if scan is not None else {}
+
+    # Filter columns must be read even when they are not projected; they
+    # are dropped again once the rows are filtered
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(list(columns) + [column for column, _, _ in filters]))
+
+    if fmt == 'parquet':
+        tables = _iter_parquet(buffer, read_columns, filters, scan)
+    elif fmt == 'arrow_file':
+        tables = _iter_ipc_file(buffer, read_columns, scan)
+    elif fmt == 'arrow_stream':
+        tables = _iter_ipc_stream(buffer, read_columns, scan)
+    elif fmt == 'feather_v1':
+        tables = iter([feather.read_table(pa.BufferReader(buffer), columns=read_columns)])
+    else:
+        raise ValueError(f"Unsupported columnar format: {fmt}")
+
+    for table in tables:
+        if expression is not None:
+            table = table.filter(expression)
+        if columns is not None:
+            table = table.select(columns)
+        if table.num_rows:
+            yield table.to_pandas(split_blocks=True, self_destruct=True)
+
+def _iter_parquet(
+    buffer: pa.Buffer,
+    columns: Optional[List[str]],
+    filters: List[Sequence[Any]],
+    scan: Dict[str, Any]
+) -> Iterator[pa.Table]:
+    parquet_file = pq.ParquetFile(pa.BufferReader(buffer))
+    metadata = parquet_file.metadata
+    _check_columns(parquet_file.schema_arrow.names, columns)
+    scan.update({"row_groups": metadata.num_row_groups, "row_groups_read": 0})
+
+    for index in range(metadata.num_row_groups):
+        if not _row_group_may_match(metadata.row_group(index), filters):
+            continue
+        scan["row_groups_read"] += 1
+        yield parquet_file.read_row_group(index, columns=columns)
+
+def _iter_ipc_file(buffer: pa.Buffer, columns: Optional[List[str]], scan: Dict[str, Any]) -> Iterator[pa.Table]:
+    reader = pa.ipc.open_file(buffer)
+    _check_columns(reader.schema.names, columns)
+    scan["record_batches"] = reader.num_record_batches
+    for index in range(reader.num_record_batches):
+        table = pa.Table.from_batches([reader.get_batch(index)])
+        yield table if columns is None else table.select(columns)
+
+def _iter_ipc_stream(buffer: pa.Buffer, columns: Optional[List[str]], scan: Dict[str, Any]) -> Iterator[pa.Table]:
+    reader = pa.ipc.open_stream(buffer)
+    _check_columns(reader.schema.names, columns)
+    scan["record_batches"] = 0
+    for batch in reader:
+        scan["record_batches"] += 1
+        table = pa.Table.from_batches([batch])
+        yield table if columns is None else table.select(columns)
+
+def _check_columns(available: List[str], columns: Optional[List[str]]) -> None:
+    missing = [col for col in columns or [] if col not in available]
+    if missing:
+        raise ValueError(f"Columns not found: {', '.join(missing)}")
+
+def _validate_filters(filters: Sequence[Sequence[Any]]) -> List[Sequence[Any]]:
+    for item in filters:
+        if len(item) != 3 or item[1] not in _FILTER_OPERATORS:
+            raise ValueError(
+                f"Invalid filter {list(item)}; expected [column, op, value] with op in {', '.join(_FILTER_OPERATORS)}"
+            )
+        if item[1] in ('in', 'not in') and not isinstance(item[2], (list, tuple)):
+            raise ValueError(f"Filter '{item[1]}' on {item[0]} needs a list of values")
+    return list(filters)
+
+def _filter_expression(filters: List[Sequence[Any]]) -> Optional[pc.Expression]:
+    expression = None
+    for column, op, value in filters:
+        field = pc.field(column)
+        if op == 'in':
+            term = field.isin(list(value))
+        elif op == 'not in':
+            term = ~field.isin(list(value))
+        else:
+            term = {
+                '==': field == value,
+                '!=': field != value,
+                '<': field < value,
+                '<=': field <= value,
+                '>': field > value,
+                '>=': field >= value,
+            }[op]
+        expression = term if expression is None else expression & term
+    return expression
+
+def _row_group_may_match(row_group: pq.RowGroupMetaData, filters: List[Sequence[Any]]) -> bool:
+    """False only when a row group's min/max statistics exclude a filter"""
+    if not filters:
+        return True
+    statistics = {}
+    for index in range(row_group.num_columns):
+        chunk = row_group.column(index)
+        if chunk.statistics is not None and chunk.statistics.has_min_max:
+            statistics[chunk.path_in_schema] = chunk.statistics
+
+    for column, op, value in filters:
+        stats = statistics.get(column)
+        if stats is None:
+            continue
+        low, high = stats.min, stats.max
+        try:
+            if op == '==' and (value < low or value > high):
+                return False
+            if op == '<' and low >= value:
+                return False
+            if op == '<=' and low > value:
+                return False
+            if op == '>' and high <= value:
+                return False
+            if op == '>=' and high < value:
+                return False
+            if op == 'in' and all(v < low or v > high for v in value):
+                return False
+        except TypeError:
+            # Statistics in a type the filter value does not compare with
+            # (e.g. timestamps vs strings); read the group to be safe
+            continue
+    return True
@@ -0,0 +1,71 @@
+from typing import BinaryIO, Optional
+import logging
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from .csv_sniffer import CSVDialect, sniff_csv
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+def read_csv(source: BinaryIO, dialect: Optional[CSVDialect] = None) -> pd.DataFrame:
+    """Parse a delimited file with pyarrow's multi-threaded reader.
+
+    Falls back to the single-threaded pandas C parser for dialects Arrow
+    does not support (thousands separators) or files it rejects, e.g.
+    ragged rows or bytes that do not match the sniffed encoding.
+    """
+    if dialect is None:
+        dialect = sniff_csv(source, settings.CSV_SNIFF_SAMPLE_SIZE)
+
+    start = source.tell()
+    if settings.CSV_ARROW_ENGINE and dialect.thousands is None:
+        try:
+            table = _read_arrow_table(source, dialect)
+            df = _arrow_to_pandas(table)
+            if not dialect.has_header:
+                # Arrow generates f0, f1, ...; use the pandas parser's 0, 1, ...
+                # so a file's columns do not depend on which engine read it
+                df.columns = pd.RangeIndex(len(df.columns))
+            return df
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, UnicodeDecodeError) as e:
+            logger.info(f"Arrow CSV reader failed, falling back to pandas: {str(e)}")
+            source.seek(start)
+
+    return pd.read_csv(source, encoding_errors='replace', **dialect.to_read_csv_kwargs())
+
+def _read_arrow_table(source: BinaryIO, dialect: CSVDialect) -> pa.Table:
+    read_options = pa_csv.ReadOptions(
+        use_threads=True,
+        block_size=settings.CSV_ARROW_BLOCK_SIZE,
+        encoding=dialect.encoding,
+        autogenerate_column_names=not dialect.has_header
+    )
+    parse_options = pa_csv.ParseOptions(
+        delimiter=dialect.delimiter,
+        quote_char=dialect.quotechar or False,
+        # Quoted newlines serialise block parsing; files that have them fail
+        # with a column-count error and take the pandas path instead
+        newlines_in_values=False
+    )
+    convert_options = pa_csv.ConvertOptions(
+        decimal_point=dialect.decimal,
+        strings_can_be_null=True
+    )
+    return pa_csv.read_csv(
+        source,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=convert_options
+    )
+
+def _arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    if settings.CSV_ARROW_DTYPES:
+        # Keep the Arrow buffers and expose them as pandas ArrowDtype columns
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    # The rest of the pipeline (select_dtypes, describe, value_counts) is
+    # written against NumPy dtypes, so convert while releasing Arrow memory
+    # column by column.
+    return table.to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,181 @@
+from dataclasses import dataclass, asdict
+from typing import BinaryIO, Dict, Any, List, Optional
+import codecs
+import csv
+import io
+import re
+import chardet
+
+COMMON_DELIMITERS = [',', ';', '\t', '|']
+
+_DOT_DECIMAL = re.compile(r'^[-+]?\d+\.\d+$')
+_COMMA_DECIMAL = re.compile(r'^[-+]?\d{1,3}(\.\d{3})*,\d+$|^[-+]?\d+,\d+$')
+_DOT_THOUSANDS = re.compile(r'^[-+]?\d{1,3}(\.\d{3})+(,\d+)?$')
+_NUMBER = re.compile(r'^[-+]?[\d.,]+$')
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+@dataclass
+class CSVDialect:
+    """Everything needed to parse a delimited file in a single pass"""
+    encoding: str = 'utf-8'
+    delimiter: str = ','
+    quotechar: str = '"'
+    has_header: bool = True
+    decimal: str = '.'
+    thousands: Optional[str] = None
+    is_delimited: bool = True
+
+    def to_read_csv_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for ``pd.read_csv``"""
+        return {
+            "encoding": self.encoding,
+            "sep": self.delimiter,
+            "quotechar": self.quotechar,
+            "header": 0 if self.has_header else None,
+            "decimal": self.decimal,
+            "thousands": self.thousands
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def sniff_csv(source: BinaryIO, sample_size: int = 64 * 1024) -> CSVDialect:
+    """Inspect a bounded sample of a file to pick encoding and CSV dialect.
+
+    Only the first ``sample_size`` bytes are read, and the stream is rewound
+    afterwards so the caller can parse the whole file exactly once.
+    """
+    position = source.tell()
+    sample = source.read(sample_size)
+    source.seek(position)
+    return sniff_sample(sample, truncated=len(sample) >= sample_size)
+
+def sniff_sample(sample: bytes, truncated: bool = False) -> CSVDialect:
+    """Detect the CSV dialect of an in-memory byte sample"""
+    encoding = detect_encoding(sample, truncated)
+    text = sample.decode(encoding, errors='replace')
+    if truncated:
+        # Drop the partial last line so it cannot skew the dialect vote
+        last_newline = text.rfind('\n')
+        if last_newline > 0:
+            text = text[:last_newline]
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    dialect = CSVDialect(encoding=encoding)
+    if len(lines) < 2:
+        dialect.is_delimited = False
+        return dialect
+
+    sample_text = '\n'.join(lines)
+    try:
+        sniffed = csv.Sniffer().sniff(sample_text, delimiters=''.join(COMMON_DELIMITERS))
+        dialect.delimiter = sniffed.delimiter
+        dialect.quotechar = sniffed.quotechar or '"'
+    except csv.Error:
+        delimiter = _count_delimiter(lines)
+        if delimiter is None:
+            dialect.is_delimited = False
+            return dialect
+        dialect.delimiter = delimiter
+
+    rows = list(csv.reader(io.StringIO(sample_text), delimiter=dialect.delimiter, quotechar=dialect.quotechar))
+    dialect.has_header = _has_header(sample_text, rows)
+    dialect.decimal, dialect.thousands = _detect_number_format(rows[1:] if dialect.has_header else rows, dialect.delimiter)
+    return dialect
+
+def has_consistent_fields(lines: List[str], dialect: CSVDialect) -> bool:
+    """Whether sample lines split into the same number (>1) of fields.
+
+    Tells a real table apart from text that merely contains the delimiter,
+    such as log messages with commas in them.
+    """
+    lines = [line for line in lines if line.strip()]
+    if not dialect.is_delimited or len(lines) < 2:
+        return False
+    counts = {
+        len(row)
+        for row in csv.reader(lines, delimiter=dialect.delimiter, quotechar=dialect.quotechar)
+    }
+    return len(counts) == 1 and counts.pop() > 1
+
+def detect_encoding(sample: bytes, truncated: bool = False) -> str:
+    """Pick an encoding from a byte sample without scanning the whole file"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # Incremental decoding tolerates a multi-byte character cut off at the
+    # end of the sample
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=not truncated)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    result = chardet.detect(sample)
+    encoding = (result.get('encoding') or '').lower()
+    if encoding and encoding not in ('ascii', 'utf-8'):
+        try:
+            sample.decode(encoding)
+            return encoding
+        except (UnicodeDecodeError, LookupError):
+            pass
+
+    # cp1252 is a superset of latin-1's printable range but leaves a few
+    # bytes undefined; latin-1 decodes anything
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+def _count_delimiter(lines: List[str]) -> Optional[str]:
+    """Fallback: pick the delimiter that appears a consistent number of times"""
+    best_delimiter = None
+    best_count = 0
+    for delimiter in COMMON_DELIMITERS:
+        counts = {line.count(delimiter) for line in lines[:20]}
+        if len(counts) == 1:
+            count = counts.pop()
+            if count > best_count:
+                best_delimiter, best_count = delimiter, count
+    return best_delimiter
+
+def _has_header(sample_text: str, rows: List[List[str]]) -> bool:
+    # csv.Sniffer votes "no header" for tables made only of free text, which
+    # is the common case for exported reports, so only treat the first row
+    # as data when it is entirely numeric.
+    if not rows:
+        return True
+    first_row = [field.strip() for field in rows[0] if field.strip()]
+    if first_row and all(_NUMBER.match(field) for field in first_row):
+        try:
+            return csv.Sniffer().has_header(sample_text)
+        except csv.Error:
+            return False
+    return True
+
+def _detect_number_format(rows: List[List[str]], delimiter: str) -> tuple:
+    """Return the (decimal, thousands) separators used by numeric fields"""
+    dot_votes = comma_votes = dot_thousands_votes = 0
+    for row in rows[:200]:
+        for field in row:
+            field = field.strip()
+            if _DOT_DECIMAL.match(field):
+                dot_votes += 1
+            elif _COMMA_DECIMAL.match(field):
+                comma_votes += 1
+                if _DOT_THOUSANDS.match(field):
+                    dot_thousands_votes += 1
+
+    # A comma can only be the decimal mark when it is not the delimiter
+    if delimiter != ',' and comma_votes > dot_votes:
+        return ',', '.' if dot_thousands_votes else None
+    return '.', None
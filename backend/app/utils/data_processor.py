@@ -2,6 +2,10 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
+from .payload import encode_frame
+from ..core.config import get_settings
+
+settings = get_settings()
 
 class DataProcessor:
     @staticmethod
@@ -13,6 +17,17 @@ class DataProcessor:
             else:
                 df = pd.DataFrame(data)
             
+            result = DataProcessor.process_frame(df)
+            result["data"] = encode_frame(result.pop("dataframe"), settings.DEFAULT_PAYLOAD_FORMAT)
+            return result
+            
+        except Exception as e:
+            raise ValueError(f"Failed to process data: {str(e)}")
+
+    @staticmethod
+    def process_frame(df: pd.DataFrame) -> Dict[str, Any]:
+        """Clean a DataFrame and describe it without converting it to records"""
+        try:
             # Basic cleaning
             df = df.replace([np.inf, -np.inf], np.nan)
             
@@ -33,7 +48,7 @@ class DataProcessor:
             
             return {
                 "type": "structured",
-                "data": df.to_dict('records'),
+                "dataframe": df,
                 "data_type": data_type,
                 "metadata": metadata
             }
@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from ..core.config import get_settings
+
+settings = get_settings()
+
+# Tried in order; month-first before day-first like pandas, so a sample is
+# only read day-first once it contains a day above 12
+DATETIME_FORMATS = [
+    'ISO8601',
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M:%S',
+    '%m/%d/%Y',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d %b %Y',
+    '%d %B %Y',
+    '%b %d, %Y',
+    '%B %d, %Y',
+    '%d-%b-%Y',
+]
+
+class DatetimeInferrer:
+    """Detects date columns from a small sample and parses them in one pass.
+
+    Only string columns are considered. Each candidate format is tested
+    against ``DATETIME_SAMPLE_SIZE`` values, and the winning format (or
+    ``None`` for non-date columns) is cached per column name so later
+    frames with the same columns skip the search.
+    """
+
+    def __init__(self, sample_size: Optional[int] = None):
+        self.sample_size = sample_size or settings.DATETIME_SAMPLE_SIZE
+        self.formats: Dict[str, Optional[str]] = {}
+
+    def convert(self, df: pd.DataFrame) -> List[str]:
+        """Parse the date columns of ``df`` in place and return their names"""
+        date_columns = []
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                date_columns.append(col)
+                continue
+            if not self._is_candidate(series):
+                continue
+
+            fmt = self.infer_format(col, series)
+            if fmt is None:
+                continue
+
+            parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+            # Only convert when every value parses; a column with stray
+            # non-dates stays as it is rather than losing them to NaT
+            if parsed.isna().sum() == series.isna().sum():
+                df[col] = parsed
+                date_columns.append(col)
+            else:
+                self.formats[str(col)] = None
+        return date_columns
+
+    def infer_format(self, col, series: pd.Series) -> Optional[str]:
+        """Return the format the column's sample parses with, cached per column"""
+        key = str(col)
+        if self.formats.get(key, '') is None:
+            return None
+
+        sample = self._sample(series)
+        if sample.empty:
+            # Nothing to judge by yet; decide on a later frame
+            return None
+        if not self._looks_like_dates(sample):
+            self.formats[key] = None
+            return None
+        if key in self.formats and self._matches(sample, self.formats[key]):
+            return self.formats[key]
+
+        self.formats[key] = next(
+            (fmt for fmt in DATETIME_FORMATS if self._matches(sample, fmt)),
+            None
+        )
+        return self.formats[key]
+
+    def _is_candidate(self, series: pd.Series) -> bool:
+        # Numeric and boolean columns are never dates, however their values
+        # happen to look
+        return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+    def _sample(self, series: pd.Series) -> pd.Series:
+        values = series.dropna()
+        if len(values) > self.sample_size:
+            # Spread the sample over the whole column, not just its head
+            positions = np.linspace(0, len(values) - 1, self.sample_size).astype(int)
+            values = values.iloc[positions]
+        return values
+
+    def _looks_like_dates(self, sample: pd.Series) -> bool:
+        # Cheap rejections before trying any format: dates are short strings
+        # with digits and a separator or month name (so IDs and zip codes
+        # stored as text are left alone)
+        if pd.api.types.infer_dtype(sample, skipna=True) != 'string':
+            return False
+        lengths = sample.str.len()
+        if lengths.max() > 40 or lengths.min() < 6:
+            return False
+        return bool(
+            sample.str.contains(r'\d').all()
+            and sample.str.contains(r'[-/.:\s]|[A-Za-z]{3}').all()
+        )
+
+    def _matches(self, sample: pd.Series, fmt: str) -> bool:
+        parsed = pd.to_datetime(sample, format=fmt, errors='coerce')
+        return bool(parsed.notna().all())
@@ -0,0 +1,194 @@
+from typing import BinaryIO, Optional, Tuple
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+from ..core.config import get_settings
+from ..core.exceptions import DecompressionLimitError
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+settings = get_settings()
+
+COMPRESSION_EXTENSIONS = {
+    'gz': 'gzip',
+    'gzip': 'gzip',
+    'bz2': 'bz2',
+    'xz': 'xz',
+    'zst': 'zstd',
+    'zstd': 'zstd',
+    'zip': 'zip',
+}
+
+_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+]
+
+# Text-like payloads legitimately compress ~10-20x; the ratio guard only
+# kicks in once this much has been inflated
+_RATIO_GRACE_BYTES = 16 * 1024 * 1024
+
+def detect_compression(source: BinaryIO, extension: str) -> Optional[str]:
+    """Identify a compressed upload by magic bytes, or by extension for zip.
+
+    Zip is only unpacked when the upload is named ``.zip``: xlsx and other
+    office files are zip containers too and are parsed as they are.
+    """
+    position = source.tell()
+    source.seek(0)
+    head = source.read(6)
+    source.seek(position)
+
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    if extension == 'zip' and head.startswith(b'PK\x03\x04'):
+        return 'zip'
+    if extension in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"File does not look like a valid .{extension} archive")
+    return None
+
+class DecompressedStream(io.RawIOBase):
+    """Read-only, lazily inflated view of a compressed upload.
+
+    Bytes are decompressed as parsers read them, so nothing is fully
+    inflated in memory. Forward seeks skip ahead; backward seeks (sample
+    sniffing rewinds to the start) reopen the decompressor. Reading past
+    ``max_bytes`` or an inflation ratio above ``max_ratio`` raises
+    ``DecompressionLimitError``, which is also kept on ``limit_error``
+    because parsers tend to re-wrap the exceptions raised by their input.
+    """
+
+    def __init__(
+        self,
+        source: BinaryIO,
+        compression: str,
+        max_bytes: Optional[int] = None,
+        max_ratio: Optional[float] = None
+    ):
+        self._source = source
+        self.compression = compression
+        self.max_bytes = max_bytes or settings.MAX_DECOMPRESSED_SIZE_MB * 1024 * 1024
+        self.max_ratio = max_ratio or settings.MAX_DECOMPRESSION_RATIO
+        self.limit_error: Optional[DecompressionLimitError] = None
+        self.entry_name: Optional[str] = None
+        self._archive: Optional[zipfile.ZipFile] = None
+        self._reader: Optional[BinaryIO] = None
+        self._position = 0
+        self._open()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        n = self._reader.readinto(buffer)
+        self._position += n
+        self._check_limits()
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            # Only the size is known by inflating everything
+            self._skip(None)
+            offset += self._position
+        if offset < self._position:
+            self._open()
+        self._skip(offset)
+        return self._position
+
+    def close(self) -> None:
+        # The upload itself belongs to the caller
+        if self._reader is not None:
+            self._reader.close()
+        if self._archive is not None:
+            self._archive.close()
+        super().close()
+
+    def _open(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+        self._source.seek(0)
+        self._position = 0
+
+        if self.compression == 'gzip':
+            self._reader = gzip.GzipFile(fileobj=self._source, mode='rb')
+        elif self.compression == 'bz2':
+            self._reader = bz2.BZ2File(self._source, mode='rb')
+        elif self.compression == 'xz':
+            self._reader = lzma.LZMAFile(self._source, mode='rb')
+        elif self.compression == 'zstd':
+            if zstandard is None:
+                raise ValueError("zstd uploads need the 'zstandard' package")
+            self._reader = zstandard.ZstdDecompressor().stream_reader(self._source, closefd=False)
+        elif self.compression == 'zip':
+            if self._archive is None:
+                self._archive = zipfile.ZipFile(self._source)
+                self.entry_name = self._single_entry(self._archive).filename
+            self._reader = self._archive.open(self.entry_name)
+        else:
+            raise ValueError(f"Unsupported compression: {self.compression}")
+
+    def _skip(self, offset: Optional[int]) -> None:
+        chunk = bytearray(settings.UPLOAD_CHUNK_SIZE)
+        while offset is None or self._position < offset:
+            view = memoryview(chunk)
+            if offset is not None:
+                view = view[:min(len(chunk), offset - self._position)]
+            if not self.readinto(view):
+                break
+
+    def _check_limits(self) -> None:
+        if self._position > self.max_bytes:
+            self.limit_error = DecompressionLimitError(
+                f"Decompressed upload exceeds {self.max_bytes // (1024 * 1024)}MB limit"
+            )
+        elif self._position > _RATIO_GRACE_BYTES and self._position > self.max_ratio * max(self._source.tell(), 1):
+            self.limit_error = DecompressionLimitError(
+                f"Upload inflates more than {self.max_ratio:g}x; refusing a likely decompression bomb"
+            )
+        if self.limit_error is not None:
+            raise self.limit_error
+
+    def _single_entry(self, archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+        ]
+        if len(entries) != 1:
+            raise ValueError(f"Zip uploads must contain exactly one file, found {len(entries)}")
+        if entries[0].file_size > self.max_bytes:
+            raise DecompressionLimitError(
+                f"Decompressed upload exceeds {self.max_bytes // (1024 * 1024)}MB limit"
+            )
+        return entries[0]
+
+def open_decompressed(source: BinaryIO, filename: str, compression: str) -> Tuple[BinaryIO, DecompressedStream, str]:
+    """Wrap a compressed upload for the parsers.
+
+    Returns a buffered reader to parse from, the underlying stream (for
+    its ``limit_error``) and the name of the inner file, which decides
+    the parser.
+    """
+    stream = DecompressedStream(source, compression)
+    if stream.entry_name:
+        inner_name = os.path.basename(stream.entry_name)
+    else:
+        stem, extension = os.path.splitext(filename)
+        inner_name = stem if extension.lstrip('.').lower() in COMPRESSION_EXTENSIONS else filename
+    return io.BufferedReader(stream, settings.UPLOAD_CHUNK_SIZE), stream, inner_name
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Tuple
+import numpy as np
+import pandas as pd
+from ..core.config import get_settings
+
+settings = get_settings()
+
+_NULLABLE_PREFIXES = (("uint", "UInt"), ("int", "Int"), ("float", "Float"))
+
+def optimize_dtypes(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Shrink a frame's in-memory representation without changing its values.
+
+    * integers are downcast to the smallest type holding their range
+    * floats become float32 only where that is lossless, and whole-number
+      floats with gaps become nullable integers instead of float64
+    * object columns of booleans with gaps become the nullable ``boolean``
+    * low-cardinality string columns become ``category``
+
+    Returns the new frame and a report of the bytes saved.
+    """
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    df = df.copy(deep=False)
+    converted: Dict[str, str] = {}
+
+    for col in df.columns:
+        series = df[col]
+        optimized = _optimize_series(series)
+        if optimized.dtype != series.dtype:
+            df[col] = optimized
+            converted[str(col)] = f"{series.dtype} -> {optimized.dtype}"
+
+    bytes_after = int(df.memory_usage(deep=True).sum())
+    return df, {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "converted": converted
+    }
+
+def merge_dtypes(left: str, right: str) -> str:
+    """Common dtype name of two batches of the same column.
+
+    Mirrors what ``pd.concat`` produces for downcast numeric batches
+    (``int8`` + ``Int16`` -> ``Int16``); anything else is ``object``.
+    """
+    if left == right:
+        return left
+    try:
+        nullable = left[0].isupper() or right[0].isupper()
+        merged = str(np.promote_types(left.lower(), right.lower()))
+    except TypeError:
+        return 'object'
+    if merged == 'object' or not nullable:
+        return merged
+    for prefix, nullable_prefix in _NULLABLE_PREFIXES:
+        if merged.startswith(prefix):
+            return nullable_prefix + merged[len(prefix):]
+    return 'object'
+
+def _optimize_series(series: pd.Series) -> pd.Series:
+    dtype = series.dtype
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and not isinstance(dtype, pd.CategoricalDtype):
+        # Already nullable/Arrow-backed; leave as parsed
+        return series
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return _downcast_integers(series)
+    if pd.api.types.is_float_dtype(dtype):
+        return _downcast_floats(series)
+    if dtype == object:
+        return _compact_objects(series)
+    return series
+
+def _downcast_integers(series: pd.Series) -> pd.Series:
+    if series.empty:
+        return series
+    downcast = 'unsigned' if series.min() >= 0 else 'integer'
+    return pd.to_numeric(series, downcast=downcast)
+
+def _downcast_floats(series: pd.Series) -> pd.Series:
+    values = series.to_numpy()
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return series
+
+    if series.hasnans and finite.size == np.count_nonzero(~np.isnan(values)) and np.all(finite == np.trunc(finite)):
+        # Whole numbers with gaps: a nullable integer keeps them integral
+        # instead of float64 NaN placeholders
+        downcast = 'unsigned' if finite.min() >= 0 else 'integer'
+        smallest = pd.to_numeric(pd.Series(finite), downcast=downcast).dtype
+        return series.astype(str(smallest).replace('uint', 'UInt').replace('int', 'Int'))
+
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+        return series.astype(np.float32)
+    return series
+
+def _compact_objects(series: pd.Series) -> pd.Series:
+    non_null = series.dropna()
+    if non_null.empty:
+        return series
+
+    inferred = pd.api.types.infer_dtype(non_null, skipna=False)
+    if inferred == 'boolean':
+        return series.astype('boolean')
+    if inferred != 'string':
+        return series
+
+    # Dictionary-encode repetitive strings: each distinct value is stored
+    # once and rows hold small integer codes
+    unique = non_null.nunique()
+    if unique <= settings.CATEGORY_MAX_CARDINALITY_RATIO * len(series):
+        return series.astype('category')
+    return series
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Any, List, Optional
+import io
+import logging
+import threading
+import pandas as pd
+from openpyxl import load_workbook
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class _SharedFileView(io.RawIOBase):
+    """Independent read cursor over a file object shared between threads.
+
+    openpyxl keeps its own zip handle per workbook, so parsing sheets in
+    parallel needs one workbook per thread. Rather than copying the upload
+    for each of them, every workbook reads through a view that seeks the
+    shared file under a lock.
+    """
+
+    def __init__(self, source: BinaryIO, lock: threading.Lock):
+        self._source = source
+        self._lock = lock
+        self._position = 0
+        with lock:
+            self._size = source.seek(0, io.SEEK_END)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        with self._lock:
+            self._source.seek(self._position)
+            data = self._source.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self._position += n
+        return n
+
+def list_sheets(source: BinaryIO) -> List[Dict[str, Any]]:
+    """List every sheet with its dimensions without reading any cell data.
+
+    Read-only workbooks take the dimensions from each sheet's ``<dimension>``
+    element; writers that omit it report ``None``.
+    """
+    source.seek(0)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        return [
+            {
+                "name": worksheet.title,
+                "rows": worksheet.max_row,
+                "columns": worksheet.max_column
+            }
+            for worksheet in workbook.worksheets
+        ]
+    finally:
+        workbook.close()
+
+def read_sheets(source: BinaryIO, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+    """Parse the given sheets in parallel, one read-only workbook per thread"""
+    lock = threading.Lock()
+    max_workers = max(1, min(settings.EXCEL_MAX_WORKERS, len(sheet_names)))
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="excel") as executor:
+        futures = {
+            name: executor.submit(read_sheet, io.BufferedReader(_SharedFileView(source, lock)), name)
+            for name in sheet_names
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+def read_sheet(source: BinaryIO, sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """Stream one sheet row by row into a DataFrame.
+
+    Rows are collected as plain value tuples and converted in chunks, so the
+    openpyxl cell objects are never materialised and the intermediate Python
+    objects stay bounded by ``EXCEL_ROW_CHUNK``.
+    """
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = _column_names(header)
+
+        chunks = []
+        buffer = []
+        for row in rows:
+            if not any(value is not None for value in row):
+                continue
+            buffer.append(row[:len(columns)])
+            if len(buffer) >= settings.EXCEL_ROW_CHUNK:
+                chunks.append(pd.DataFrame.from_records(buffer, columns=columns))
+                buffer = []
+        if buffer or not chunks:
+            chunks.append(pd.DataFrame.from_records(buffer, columns=columns))
+    finally:
+        workbook.close()
+
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    return df.infer_objects()
+
+def _column_names(header: tuple) -> List[str]:
+    """Name header cells the way pandas does, including blanks and duplicates"""
+    names = []
+    seen: Dict[str, int] = {}
+    for index, value in enumerate(header):
+        name = str(value) if value is not None else f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
@@ -0,0 +1,141 @@
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+import json
+import pandas as pd
+
+_WHITESPACE = ' \t\r\n'
+
+class JSONSchemaTracker:
+    """Accumulates the observed value types of every field across batches"""
+
+    def __init__(self):
+        self.fields: Dict[str, Set[str]] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        for col in df.columns:
+            inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+            types = self.fields.setdefault(str(col), set())
+            if inferred != 'empty':
+                types.add(inferred)
+            if df[col].hasnans:
+                types.add('null')
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {field: sorted(types) for field, types in self.fields.items()}
+
+def detect_json_layout(source: TextIO, sample_size: int = 64 * 1024) -> str:
+    """Classify a JSON upload as 'array', 'ndjson' or a single 'document'"""
+    position = source.tell()
+    sample = source.read(sample_size)
+    source.seek(position)
+
+    stripped = sample.lstrip()
+    if stripped.startswith('['):
+        return 'array'
+
+    # NDJSON: the first line is a complete value and another value follows
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    if len(lines) > 1:
+        try:
+            json.loads(lines[0])
+            return 'ndjson'
+        except json.JSONDecodeError:
+            pass
+    return 'document'
+
+def iter_ndjson(source: TextIO) -> Iterator[Any]:
+    """Yield one record per non-empty line"""
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {str(e)}")
+
+def iter_json_array(source: TextIO, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    Only the current element (plus at most one read chunk) is held in
+    memory, using ``JSONDecoder.raw_decode`` on a sliding text buffer.
+    """
+    decoder = json.JSONDecoder()
+    buffer = source.read(chunk_size).lstrip(_WHITESPACE)
+    if not buffer.startswith('['):
+        raise ValueError("Expected a top-level JSON array")
+    position = 1
+    eof = False
+
+    while True:
+        # Skip separators, refilling the buffer when it runs dry
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE + ',':
+                position += 1
+            if position < len(buffer):
+                break
+            chunk = source.read(chunk_size)
+            if not chunk:
+                raise ValueError("Unexpected end of JSON array")
+            buffer, position = chunk, 0
+
+        if buffer[position] == ']':
+            return
+
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                # A number cut off by the buffer edge ("12" of "12.5") still
+                # decodes, so only trust values followed by a separator
+                if eof or (end < len(buffer) and buffer[end] in _WHITESPACE + ',]'):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = source.read(max(chunk_size, len(buffer) - position))
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        yield record
+        position = end
+        if position >= chunk_size:
+            buffer, position = buffer[position:], 0
+
+def iter_record_batches(
+    records: Iterator[Any],
+    batch_size: int,
+    schema: Optional[JSONSchemaTracker] = None
+) -> Iterator[Tuple[pd.DataFrame, int]]:
+    """Group records into columnar DataFrame batches.
+
+    Yields ``(frame, rows_so_far)`` so callers can report progress. Array
+    records become positional columns and scalars a single ``value`` column.
+    """
+    batch: List[Any] = []
+    total = 0
+
+    def flush() -> pd.DataFrame:
+        return records_to_frame(batch, schema)
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            total += len(batch)
+            yield flush(), total
+            batch = []
+
+    if batch:
+        total += len(batch)
+        yield flush(), total
+
+def records_to_frame(records: List[Any], schema: Optional[JSONSchemaTracker] = None) -> pd.DataFrame:
+    """Build one DataFrame from decoded JSON records of any shape"""
+    df = pd.DataFrame([_as_row(record) for record in records])
+    if schema is not None:
+        schema.update(df)
+    return df
+
+def _as_row(record: Any) -> Dict[Any, Any]:
+    if isinstance(record, dict):
+        return record
+    if isinstance(record, list):
+        return dict(enumerate(record))
+    return {"value": record}
@@ -0,0 +1,328 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+from datetime import datetime
+import json
+import re
+import pandas as pd
+
+# Formats tried against a sample of lines, most specific first
+LOG_FORMATS = ('json', 'syslog', 'combined', 'kv', 'generic')
+
+_SYSLOG = re.compile(
+    r'^(?:<(?P<pri>\d{1,3})>)?'
+    r'(?P<timestamp>[A-Z][a-z]{2}\s+\d{1,2} \d{2}:\d{2}:\d{2}) '
+    r'(?P<host>\S+) (?P<program>[^\s:\[]+)(?:\[(?P<pid>\d+)\])?: ?(?P<message>.*)$'
+)
+_SYSLOG_5424 = re.compile(
+    r'^<(?P<pri>\d{1,3})>1 (?P<timestamp>\S+) (?P<host>\S+) (?P<program>\S+) '
+    r'(?P<pid>\S+) (?P<msgid>\S+) (?:-|\[.*?\]) ?(?P<message>.*)$'
+)
+_COMBINED = re.compile(
+    r'^(?P<client_ip>\S+) (?P<ident>\S+) (?P<user>\S+) \[(?P<timestamp>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)(?: (?P<protocol>[^"]*))?" '
+    r'(?P<status>\d{3}) (?P<bytes>\d+|-)'
+    r'(?: "(?P<referrer>[^"]*)" "(?P<user_agent>[^"]*)")?'
+)
+_KV_PAIR = re.compile(r'([A-Za-z_][\w.\-]*)=("(?:[^"\\]|\\.)*"|\S*)')
+_GENERIC = re.compile(
+    r'^(?P<timestamp>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?'
+    r'\s*(?:\[?(?P<level>(?i:trace|debug|info|notice|warn(?:ing)?|error|err|critical|crit|fatal|alert|emerg))\]?)?'
+    r'[\s:\-]*(?P<message>.*)$'
+)
+_LEVEL_WORD = re.compile(r'\b(TRACE|DEBUG|INFO|NOTICE|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b')
+
+# Variable parts masked before clustering
+_VARIABLES = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'
+    r'|\b0x[0-9a-fA-F]+\b'
+    r'|\b[0-9a-fA-F]{16,}\b'
+    r'|[-+]?\b\d+(?:\.\d+)?\b'
+)
+
+_LEVEL_ALIASES = {
+    'WARN': 'WARNING',
+    'ERR': 'ERROR',
+    'CRIT': 'CRITICAL',
+    'FATAL': 'CRITICAL',
+    'EMERG': 'EMERGENCY',
+}
+_SYSLOG_SEVERITIES = ['EMERGENCY', 'ALERT', 'CRITICAL', 'ERROR', 'WARNING', 'NOTICE', 'INFO', 'DEBUG']
+_JSON_TIMESTAMP_KEYS = ('timestamp', '@timestamp', 'time', 'ts', 'datetime', 'date')
+_JSON_LEVEL_KEYS = ('level', 'severity', 'lvl', 'loglevel', 'levelname')
+_JSON_MESSAGE_KEYS = ('message', 'msg', 'event')
+_RESERVED_COLUMNS = {'timestamp', 'level', 'template_id', 'template', 'message'}
+
+WILDCARD = '<*>'
+
+class TemplateMiner:
+    """Online log template clustering in the style of Drain.
+
+    Variable-looking tokens (numbers, IPs, UUIDs, hex IDs) are masked,
+    then each line joins the most similar template with the same token
+    count and leading token; positions that differ become ``<*>``. Memory
+    is bounded by ``max_templates``: once full, lines join their closest
+    existing template, or a catch-all.
+    """
+
+    def __init__(self, similarity: float = 0.5, max_templates: int = 1000):
+        self.similarity = similarity
+        self.max_templates = max_templates
+        self.templates: List[List[str]] = []
+        self.counts: List[int] = []
+        self._groups: Dict[Tuple[int, str], List[int]] = {}
+        self._overflow = 0
+
+    def add(self, message: str) -> Tuple[int, str]:
+        """Assign a message to a template and return ``(template_id, template)``"""
+        tokens = _VARIABLES.sub(WILDCARD, message).split() or ['']
+        group = self._groups.setdefault((len(tokens), tokens[0]), [])
+
+        best_id, best_score = -1, -1.0
+        for template_id in group:
+            score = self._score(self.templates[template_id], tokens)
+            if score > best_score:
+                best_id, best_score = template_id, score
+
+        if best_id >= 0 and (best_score >= self.similarity or len(self.templates) >= self.max_templates):
+            template = self.templates[best_id]
+            for index, token in enumerate(tokens):
+                if template[index] != token:
+                    template[index] = WILDCARD
+            self.counts[best_id] += 1
+            return best_id, ' '.join(template)
+
+        if len(self.templates) >= self.max_templates:
+            self._overflow += 1
+            return -1, WILDCARD
+
+        self.templates.append(tokens)
+        self.counts.append(1)
+        group.append(len(self.templates) - 1)
+        return len(self.templates) - 1, ' '.join(tokens)
+
+    def summary(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The most frequent templates with their final form and counts"""
+        ranked = sorted(range(len(self.templates)), key=lambda i: self.counts[i], reverse=True)
+        summary = [
+            {"template_id": i, "template": ' '.join(self.templates[i]), "count": self.counts[i]}
+            for i in ranked[:limit]
+        ]
+        if self._overflow:
+            summary.append({"template_id": -1, "template": WILDCARD, "count": self._overflow})
+        return summary
+
+    @staticmethod
+    def _score(template: List[str], tokens: List[str]) -> float:
+        matches = sum(1 for a, b in zip(template, tokens) if a == b and a != WILDCARD)
+        return matches / len(tokens)
+
+def detect_log_format(lines: List[str], min_ratio: float = 0.6) -> Optional[str]:
+    """Pick the log format most of the sample lines parse as, if any"""
+    lines = [line for line in lines if line.strip() and not _is_continuation(line)]
+    if not lines:
+        return None
+
+    best, best_ratio = None, 0.0
+    for fmt in LOG_FORMATS:
+        parser = _PARSERS[fmt]
+        matched = sum(1 for line in lines if _recognized(fmt, parser(line)))
+        ratio = matched / len(lines)
+        if ratio > best_ratio:
+            best, best_ratio = fmt, ratio
+    return best if best_ratio >= min_ratio else None
+
+def iter_log_records(source: TextIO, log_format: str, max_fields: int = 64) -> Iterator[Dict[str, Any]]:
+    """Parse a text stream line by line into flat log records.
+
+    Indented lines (stack traces, wrapped messages) are folded into the
+    previous record's message. Lines the detected format does not match
+    are kept as free text. At most ``max_fields`` distinct extra fields
+    become columns so the schema stays bounded.
+    """
+    parser = _PARSERS.get(log_format, _parse_generic)
+    known_fields: Dict[str, None] = {}
+    pending: Optional[Dict[str, Any]] = None
+
+    for raw_line in source:
+        line = raw_line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if pending is not None and _is_continuation(line):
+            pending["message"] += '\n' + line.strip()
+            continue
+        if pending is not None:
+            yield pending
+
+        record = parser(line) or _parse_generic(line)
+        fields = record.pop("fields", {})
+        for key, value in fields.items():
+            column = f"field_{key}" if key in _RESERVED_COLUMNS else key
+            if column not in known_fields and len(known_fields) >= max_fields:
+                continue
+            known_fields.setdefault(column)
+            record[column] = json.dumps(value) if isinstance(value, (dict, list)) else value
+        pending = record
+
+    if pending is not None:
+        yield pending
+
+def iter_log_batches(
+    records: Iterator[Dict[str, Any]],
+    log_format: str,
+    miner: TemplateMiner,
+    batch_size: int
+) -> Iterator[pd.DataFrame]:
+    """Template records and group them into typed DataFrame batches"""
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        # Only the first line of multi-line messages decides the template
+        first_line = record["message"].split('\n', 1)[0]
+        record["template_id"], record["template"] = miner.add(first_line)
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield _to_frame(batch, log_format)
+            batch = []
+    if batch:
+        yield _to_frame(batch, log_format)
+
+def _to_frame(batch: List[Dict[str, Any]], log_format: str) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(batch)
+    leading = ['timestamp', 'level', 'template_id', 'template', 'message']
+    fields = [col for col in df.columns if col not in leading]
+    df = df[leading + fields]
+    df['timestamp'] = _parse_timestamps(df['timestamp'], log_format)
+    if log_format == 'kv':
+        # key=value pairs are all text; restore numbers where every value is one
+        for col in fields:
+            converted = pd.to_numeric(df[col], errors='coerce')
+            if converted.notna().sum() == df[col].notna().sum():
+                df[col] = converted
+    return df
+
+def _parse_timestamps(values: pd.Series, log_format: str) -> pd.Series:
+    if values.isna().all():
+        return pd.to_datetime(values, utc=True)
+    if pd.api.types.is_numeric_dtype(values):
+        # Epoch seconds, or milliseconds for values past the year 5000
+        unit = 'ms' if values.abs().max() > 1e11 else 's'
+        return pd.to_datetime(values, unit=unit, utc=True, errors='coerce')
+    values = values.astype(str).where(values.notna())
+    if log_format == 'syslog' and values.str.match(r'^[A-Z][a-z]{2}\s').any():
+        # BSD syslog timestamps carry no year or zone
+        year = str(datetime.now().year)
+        return pd.to_datetime(year + ' ' + values, format='%Y %b %d %H:%M:%S', errors='coerce').dt.tz_localize('UTC')
+    if log_format == 'combined':
+        return pd.to_datetime(values, format='%d/%b/%Y:%H:%M:%S %z', utc=True, errors='coerce')
+    # Log4j-style "10:00:00,123" fractions
+    values = values.str.replace(',', '.', regex=False)
+    return pd.to_datetime(values, format='ISO8601', utc=True, errors='coerce')
+
+def _normalize_level(level: Optional[str]) -> Optional[str]:
+    if not level:
+        return None
+    level = str(level).upper()
+    return _LEVEL_ALIASES.get(level, level)
+
+def _message_level(message: str) -> Optional[str]:
+    match = _LEVEL_WORD.search(message)
+    return _normalize_level(match.group(1)) if match else None
+
+def _is_continuation(line: str) -> bool:
+    return line[:1] in (' ', '\t')
+
+def _recognized(fmt: str, record: Optional[Dict[str, Any]]) -> bool:
+    if record is None:
+        return False
+    if fmt == 'generic':
+        # Free text always "parses"; only count lines with a timestamp or level
+        return bool(record["timestamp"] or record["level"])
+    return True
+
+def _record(timestamp: Any, level: Optional[str], message: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {"timestamp": timestamp, "level": level, "message": message, "fields": fields}
+
+def _parse_syslog(line: str) -> Optional[Dict[str, Any]]:
+    match = _SYSLOG.match(line) or _SYSLOG_5424.match(line)
+    if not match:
+        return None
+    groups = match.groupdict()
+    message = groups.pop("message")
+    timestamp = groups.pop("timestamp")
+    pri = groups.pop("pri")
+    level = _SYSLOG_SEVERITIES[int(pri) % 8] if pri else _message_level(message)
+    fields = {key: value for key, value in groups.items() if value not in (None, '-')}
+    return _record(timestamp, level, message, fields)
+
+def _parse_combined(line: str) -> Optional[Dict[str, Any]]:
+    match = _COMBINED.match(line)
+    if not match:
+        return None
+    groups = match.groupdict()
+    status = int(groups["status"])
+    level = 'ERROR' if status >= 500 else 'WARNING' if status >= 400 else 'INFO'
+    message = f'{groups["method"]} {groups["path"].split("?", 1)[0]} {status}'
+    fields = {
+        "client_ip": groups["client_ip"],
+        "user": None if groups["user"] == '-' else groups["user"],
+        "method": groups["method"],
+        "path": groups["path"],
+        "protocol": groups["protocol"],
+        "status": status,
+        "bytes": None if groups["bytes"] == '-' else int(groups["bytes"]),
+        "referrer": groups["referrer"],
+        "user_agent": groups["user_agent"],
+    }
+    return _record(groups["timestamp"], level, message, fields)
+
+def _parse_json(line: str) -> Optional[Dict[str, Any]]:
+    if not line.lstrip().startswith('{'):
+        return None
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    timestamp = _pop_first(data, _JSON_TIMESTAMP_KEYS)
+    level = _normalize_level(_pop_first(data, _JSON_LEVEL_KEYS))
+    message = _pop_first(data, _JSON_MESSAGE_KEYS)
+    return _record(timestamp, level, '' if message is None else str(message), data)
+
+def _parse_kv(line: str) -> Optional[Dict[str, Any]]:
+    pairs = _KV_PAIR.findall(line)
+    if len(pairs) < 2:
+        return None
+    data = {key: _unquote(value) for key, value in pairs}
+    timestamp = _pop_first(data, _JSON_TIMESTAMP_KEYS)
+    level = _normalize_level(_pop_first(data, _JSON_LEVEL_KEYS))
+    message = _pop_first(data, _JSON_MESSAGE_KEYS)
+    if message is None:
+        # No message key: the text outside the pairs, or the keys themselves
+        message = _KV_PAIR.sub('', line).strip() or ' '.join(f"{key}=" for key in data)
+    return _record(timestamp, level, message, data)
+
+def _parse_generic(line: str) -> Dict[str, Any]:
+    match = _GENERIC.match(line)
+    level = _normalize_level(match.group("level"))
+    message = match.group("message")
+    return _record(match.group("timestamp"), level or _message_level(message), message, {})
+
+def _pop_first(data: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if key in data:
+            return data.pop(key)
+    return None
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+_PARSERS: Dict[str, Callable[[str], Optional[Dict[str, Any]]]] = {
+    'json': _parse_json,
+    'syslog': _parse_syslog,
+    'combined': _parse_combined,
+    'kv': _parse_kv,
+    'generic': _parse_generic,
+    'text': _parse_generic,
+}
@@ -0,0 +1,201 @@
+from typing import Any, Dict, List, Optional, Set, Union
+import io
+import logging
+import pandas as pd
+import pyarrow as pa
+from ..core.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_PAYLOAD_FORMATS = ("columns", "split", "records")
+PAYLOAD_FORMATS = JSON_PAYLOAD_FORMATS + ("arrow",)
+
+_ARROW_MEDIA_TYPES = {ARROW_STREAM_MEDIA_TYPE, "application/vnd.apache.arrow.file"}
+_NDJSON_MEDIA_TYPES = {NDJSON_MEDIA_TYPE, "application/jsonl"}
+
+def negotiate_payload_format(
+    accept: Optional[str],
+    default: str = "columns",
+    allow_binary: bool = True,
+    allow_streaming: bool = False
+) -> str:
+    """Pick a dataset payload format from an ``Accept`` header.
+
+    ``application/vnd.apache.arrow.stream`` selects Arrow IPC (only where the
+    response is the dataset itself), ``application/x-ndjson`` selects
+    newline-delimited records (only where the response can be streamed),
+    and ``application/json; format=split`` (or ``records``/``columns``)
+    selects a JSON layout. Anything else gets the default compact
+    column-oriented JSON.
+    """
+    if not accept:
+        return default
+
+    candidates = []
+    for index, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        options = dict(param.split("=", 1) for param in params if "=" in param)
+        try:
+            quality = float(options.get("q", 1))
+        except ValueError:
+            quality = 1.0
+
+        if media_type.lower() in _ARROW_MEDIA_TYPES:
+            fmt = "arrow" if allow_binary else None
+        elif media_type.lower() in _NDJSON_MEDIA_TYPES:
+            fmt = "ndjson" if allow_streaming else None
+        elif media_type.lower() in ("application/json", "*/*"):
+            fmt = options.get("format", "").strip('"').lower() or None
+            if fmt not in JSON_PAYLOAD_FORMATS:
+                fmt = None
+        else:
+            fmt = None
+
+        if fmt and quality > 0:
+            # Sort by quality, then by position in the header
+            candidates.append((-quality, index, fmt))
+
+    return min(candidates)[2] if candidates else default
+
+def encode_frame(df: pd.DataFrame, payload_format: str = "columns") -> Union[Dict[str, Any], List[Dict[str, Any]], bytes]:
+    """Serialize a DataFrame in one of the supported wire formats.
+
+    * ``columns``: ``{"format", "columns", "data": {column: [values]}}``
+    * ``split``: ``{"format", "columns", "data": [[row values]]}``
+    * ``records``: the legacy list of row dicts
+    * ``arrow``: Arrow IPC stream bytes
+    """
+    if payload_format == "arrow":
+        return to_arrow_ipc(df)
+
+    columns = [str(col) for col in df.columns]
+    if payload_format == "records":
+        return df.set_axis(columns, axis=1).to_dict(orient='records')
+    if payload_format == "split":
+        return {
+            "format": "split",
+            "columns": columns,
+            "data": df.to_numpy(dtype=object).tolist()
+        }
+    return {
+        "format": "columns",
+        "columns": columns,
+        "data": {name: _column_values(df[col]) for name, col in zip(columns, df.columns)}
+    }
+
+def _column_values(series: pd.Series) -> Any:
+    # Plain numeric and boolean columns go out as NumPy arrays, which the
+    # orjson response serializes natively (NaN/Inf become null); everything
+    # else needs Python objects anyway.
+    if series.dtype.kind in 'biuf':
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            # Nullable Int/Float/boolean columns: pd.NA -> None
+            if series.hasnans:
+                return series.astype(object).where(series.notna(), None).tolist()
+            return series.to_numpy(dtype=series.dtype.numpy_dtype)
+        return series.to_numpy()
+    return series.tolist()
+
+def decode_frame(payload: Any) -> pd.DataFrame:
+    """Build a DataFrame from any of the JSON wire formats"""
+    if isinstance(payload, dict) and payload.get("format") in ("columns", "split"):
+        return pd.DataFrame(payload["data"], columns=payload["columns"])
+    if isinstance(payload, list):
+        return pd.DataFrame(payload)
+    return pd.DataFrame([payload])
+
+def to_arrow_ipc(df: pd.DataFrame) -> bytes:
+    """Encode a DataFrame as an Arrow IPC stream"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def to_ndjson(df: pd.DataFrame) -> bytes:
+    """Encode a DataFrame as newline-delimited JSON records"""
+    return b"".join(dumps(record) + b"\n" for record in encode_frame(df, "records"))
+
+class ArrowStreamEncoder:
+    """Encodes DataFrames as one incremental Arrow IPC stream.
+
+    The schema is taken from the first frame and written once; every
+    ``write`` returns the bytes of one more record batch, so a response
+    can be streamed without holding the whole result. Columns that are
+    entirely null in the first frame are typed as strings.
+
+    An IPC stream cannot change its schema, so later frames are conformed
+    to it rather than failing the response halfway: missing columns are
+    filled with nulls, values of another type are cast (e.g. whole floats
+    to integers, anything to strings), and columns first seen in a later
+    frame are left out of the stream; the stored dataset keeps them.
+    Values that cannot be cast become null, with a warning.
+    """
+
+    def __init__(self):
+        self.schema: Optional[pa.Schema] = None
+        self._sink = io.BytesIO()
+        self._writer: Optional[pa.ipc.RecordBatchStreamWriter] = None
+        self._warned: Set[str] = set()
+
+    def write(self, df: pd.DataFrame) -> bytes:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Object columns mixing types (e.g. free-form documents) go as strings
+            df = df.copy(deep=False)
+            for col in df.select_dtypes(include=['object']).columns:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self.schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            ]).remove_metadata()
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+        self._writer.write_table(self._conform(table))
+        return self._drain()
+
+    def _conform(self, table: pa.Table) -> pa.Table:
+        extra = [name for name in table.column_names if name not in self.schema.names]
+        self._warn(extra, "Columns not in the Arrow stream schema are left out of the stream")
+        columns = []
+        for field in self.schema:
+            if field.name not in table.column_names:
+                columns.append(pa.nulls(table.num_rows, field.type))
+                continue
+            column = table.column(field.name)
+            columns.append(column if column.type.equals(field.type) else self._cast(column, field))
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def _cast(self, column: pa.ChunkedArray, field: pa.Field) -> pa.ChunkedArray:
+        try:
+            return column.cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            pass
+        if pa.types.is_string(field.type):
+            values = column.to_pandas()
+            return pa.chunked_array([pa.array(values.astype(str).where(values.notna(), None), type=pa.string())])
+        self._warn([field.name], f"Values that do not fit the stream type {field.type} are sent as null")
+        return pa.chunked_array([pa.nulls(len(column), field.type)])
+
+    def _warn(self, columns: List[str], message: str) -> None:
+        new = [col for col in columns if col not in self._warned]
+        if new:
+            self._warned.update(new)
+            logger.warning(f"{message}: {', '.join(new)}")
+
+    def close(self) -> bytes:
+        """End-of-stream marker"""
+        if self._writer is None:
+            return b""
+        self._writer.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
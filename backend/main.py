@@ -1,15 +1,36 @@
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
-from app.routers import upload, database, report
+from app.core.middleware import UploadDigestMiddleware, UploadSizeLimitMiddleware
+from app.core.responses import FastJSONResponse
+from app.routers import upload, database, report, dataset
+from app.services.api_source import close_http_client
+from app.services.connection_registry import get_connection_registry, normalize_dsn
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import logging
+import os
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="InsightForge API",
     description="API for data analysis and report generation",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
+)
+
+# Middleware added last runs first: CORS wraps the upload middlewares so
+# their early 413 responses still carry CORS headers
+
+# Hash uploaded files for the upload cache as the body streams in
+app.add_middleware(UploadDigestMiddleware)
+
+# Enforce the upload size limit while the request body is still streaming in
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_upload_size_bytes
 )
 
 # Configure CORS
@@ -28,10 +49,40 @@ api_router = APIRouter()
 api_router.include_router(upload.router)
 api_router.include_router(database.router)
 api_router.include_router(report.router)
+api_router.include_router(dataset.router)
 
 # Mount the API router with the /api prefix
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+async def check_single_worker():
+    # uvicorn reads its default --workers from WEB_CONCURRENCY
+    workers = os.environ.get("WEB_CONCURRENCY", "1")
+    if workers.isdigit() and int(workers) > 1:
+        logger.warning(
+            f"Running {workers} workers: connection sessions are per process, "
+            "so follow-up queries by connection_id may fail"
+        )
+
+@app.on_event("startup")
+async def warm_database_pools():
+    # Open pools for the configured databases before the first request,
+    # under the keys requests for the same databases look them up by
+    registry = get_connection_registry()
+    dsns = [normalize_dsn(url) for url in (settings.DATABASE_URL, settings.MONGODB_URL) if url]
+    await run_in_threadpool(registry.prewarm, dsns)
+    app.state.pool_eviction = asyncio.create_task(registry.run_eviction())
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    # Drain the keep-alive pool shared by API-source ingestion
+    await close_http_client()
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    app.state.pool_eviction.cancel()
+    await run_in_threadpool(get_connection_registry().dispose_all)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
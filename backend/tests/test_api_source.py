@@ -0,0 +1,92 @@
+import asyncio
+import httpx
+import pytest
+from app.core.config import get_settings
+from app.data_processors.processor import DataProcessor
+from app.schemas.api_source import ApiSourceRequest, PaginationOptions
+from app.services.api_source import ApiSource
+from app.services.dataset_store import DatasetStore
+
+RECORDS = [{"id": i, "value": i * 1.5, "name": f"item-{i}"} for i in range(250)]
+
+def offset_api(request: httpx.Request) -> httpx.Response:
+    """Stub API paging ``RECORDS`` by offset/limit and reporting the total"""
+    offset = int(request.url.params.get("offset", 0))
+    limit = int(request.url.params.get("limit", 100))
+    return httpx.Response(200, json={"data": RECORDS[offset:offset + limit], "meta": {"total": len(RECORDS)}})
+
+def cursor_api(request: httpx.Request) -> httpx.Response:
+    """Stub API paging ``RECORDS`` by an opaque cursor, 100 records a page"""
+    start = int(request.url.params.get("cursor", 0))
+    end = start + 100
+    return httpx.Response(200, json={
+        "results": RECORDS[start:end],
+        "next_cursor": str(end) if end < len(RECORDS) else None
+    })
+
+def collect(source: ApiSource) -> list:
+    async def run():
+        return [record async for page in source.iter_pages() for record in page]
+    return asyncio.run(run())
+
+def stub_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "DATASET_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "API_MAX_RETRIES", 2)
+    return settings
+
+def test_offset_pagination_fetches_every_page_in_order(settings):
+    request = ApiSourceRequest(
+        url="https://api.test/items",
+        pagination=PaginationOptions(type="offset", page_size=100, total_path="meta.total", concurrency=2)
+    )
+    source = ApiSource(request, client=stub_client(offset_api))
+
+    assert collect(source) == RECORDS
+    assert source.pages_fetched == 3
+
+def test_cursor_pagination_follows_the_cursor(settings):
+    request = ApiSourceRequest(url="https://api.test/items", pagination=PaginationOptions(type="cursor"))
+    source = ApiSource(request, client=stub_client(cursor_api))
+
+    assert collect(source) == RECORDS
+    assert source.pages_fetched == 3
+
+def test_gateway_errors_are_retried(settings):
+    calls = []
+
+    def flaky_api(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503, headers={"retry-after": "0"})
+        return httpx.Response(200, json=RECORDS[:5])
+
+    request = ApiSourceRequest(url="https://api.test/items")
+    source = ApiSource(request, client=stub_client(flaky_api))
+
+    assert collect(source) == RECORDS[:5]
+    assert len(calls) == 2
+
+def test_process_api_data_counts_every_stored_row(settings, monkeypatch):
+    # Several batches and a preview shorter than the result
+    monkeypatch.setattr(settings, "JSON_BATCH_SIZE", 100)
+    monkeypatch.setattr(settings, "DATASET_PREVIEW_ROWS", 10)
+    request = ApiSourceRequest(
+        url="https://api.test/items",
+        pagination=PaginationOptions(type="offset", page_size=100, total_path="meta.total")
+    )
+
+    result = asyncio.run(
+        DataProcessor().process_api_data(request.url, source=request, client=stub_client(offset_api))
+    )
+
+    assert result["metadata"]["rows"] == len(RECORDS)
+    assert result["metadata"]["statistics"]["row_count"] == len(RECORDS)
+    assert result["metadata"]["preview_rows"] == 10
+    assert result["metadata"]["pages"] == 3
+    stored = DatasetStore().load(result["dataset_id"])
+    assert stored["id"].tolist() == [record["id"] for record in RECORDS]
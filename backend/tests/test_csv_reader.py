@@ -0,0 +1,21 @@
+import io
+import pytest
+from app.core.config import get_settings
+from app.utils.csv_reader import read_csv
+
+HEADERLESS = b'1,2.5,3\n4,5.5,6\n7,8.5,9\n'
+WITH_HEADER = b'id,value,count\n1,2.5,3\n4,5.5,6\n7,8.5,9\n'
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_headerless_columns_do_not_depend_on_the_engine(arrow, monkeypatch):
+    monkeypatch.setattr(get_settings(), "CSV_ARROW_ENGINE", arrow)
+    df = read_csv(io.BytesIO(HEADERLESS))
+    assert list(df.columns) == [0, 1, 2]
+    assert df[1].tolist() == [2.5, 5.5, 8.5]
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_header_row_names_the_columns(arrow, monkeypatch):
+    monkeypatch.setattr(get_settings(), "CSV_ARROW_ENGINE", arrow)
+    df = read_csv(io.BytesIO(WITH_HEADER))
+    assert list(df.columns) == ["id", "value", "count"]
+    assert len(df) == 3
@@ -0,0 +1,144 @@
+import asyncio
+import pandas as pd
+import pytest
+from app.core.config import get_settings
+from app.core.exceptions import DatasetRefreshError
+from app.services.connection_sessions import get_session_store
+from app.services.dataset_profile import merge_profiles, profile_batches, profile_frame, subtract_profile
+from app.services.dataset_refresh import DatasetRefresher
+from app.services.dataset_store import DatasetStore
+
+CONNECTION_ID = "postgresql_db_app_test"
+SOURCE = {"type": "postgresql", "host": "db", "database": "app", "query": "SELECT * FROM events"}
+COLUMNS = ["id", "ts", "value"]
+
+class StubSource:
+    """Stands in for DatabaseService.stream over an in-memory table.
+
+    Applies the ``_watermark`` bound by ``delta_query`` the way the
+    wrapped SQL would, and records every query it was asked to run.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def stream(self, params, http_request=None):
+        self.queries.append(params)
+        watermark = (params.get("parameters") or {}).get("_watermark")
+        inclusive = ">=" in params["query"]
+        rows = [
+            row for row in self.rows
+            if watermark is None or (
+                row["ts"] is not None and (row["ts"] >= watermark if inclusive else row["ts"] > watermark)
+            )
+        ]
+
+        async def frames():
+            yield pd.DataFrame(rows, columns=COLUMNS)
+
+        return frames()
+
+def rows(*triples):
+    return [{"id": i, "ts": ts, "value": value} for i, ts, value in triples]
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "DATASET_STORE_DIR", str(tmp_path))
+    get_session_store().open(CONNECTION_ID, {
+        "type": "postgresql", "host": "db", "port": 5432,
+        "database": "app", "username": "app", "password": "secret"
+    })
+    yield DatasetStore()
+    get_session_store().close(CONNECTION_ID)
+
+def stored(store, data):
+    return store.save(pd.DataFrame(data, columns=COLUMNS), {"source": SOURCE})
+
+def refresh(source, dataset_id, **options):
+    refresher = DatasetRefresher()
+    refresher.db_service.stream = source.stream
+    return asyncio.run(refresher.refresh(dataset_id, {"connection_id": CONNECTION_ID, **options}))
+
+def test_append_round_trip_only_fetches_past_the_watermark(store):
+    dataset_id = stored(store, rows((1, 10, 1.0), (2, 20, 2.0)))
+    source = StubSource(rows((1, 10, 1.0), (2, 20, 2.0), (3, 30, 3.0)))
+
+    result = refresh(source, dataset_id, watermark_column="ts", mode="append")
+    assert (result["rows_before"], result["rows_added"], result["rows"]) == (2, 1, 3)
+    assert result["refresh"]["watermark"] == {"type": "number", "value": 30}
+
+    # The second refresh resumes from the stored watermark
+    source.rows += rows((4, 40, 4.0))
+    result = refresh(source, dataset_id)
+    assert source.queries[-1]["parameters"] == {"_watermark": 30}
+    assert (result["rows_added"], result["rows"]) == (1, 4)
+
+    df = store.load(dataset_id)
+    assert df["id"].tolist() == [1, 2, 3, 4]
+    assert result["profile"]["summary_statistics"]["value"]["count"] == 4
+    assert result["profile"]["summary_statistics"]["value"]["max"] == 4.0
+
+def test_upsert_replaces_rows_by_key(store):
+    dataset_id = stored(store, rows((1, 10, 1.0), (2, 20, 2.0)))
+    # Row 2 changed at the watermark itself; row 3 is new
+    source = StubSource(rows((1, 10, 1.0), (2, 20, 5.0), (3, 30, 3.0)))
+
+    result = refresh(source, dataset_id, watermark_column="ts", mode="upsert", key_columns=["id"])
+    assert (result["rows_added"], result["rows_replaced"], result["rows"]) == (2, 1, 3)
+
+    df = store.load(dataset_id).sort_values("id")
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["value"].tolist() == [1.0, 5.0, 3.0]
+
+    # The incrementally maintained profile matches one computed from scratch
+    profile = store.get_metadata(dataset_id)["profile"]
+    expected = profile_frame(store.load(dataset_id))
+    for col in ("ts", "value"):
+        for field in ("count", "nulls", "min", "max"):
+            assert profile[col][field] == expected[col][field]
+        assert profile[col]["sum"] == pytest.approx(expected[col]["sum"])
+
+def test_empty_dataset_fetches_the_whole_query(store):
+    dataset_id = stored(store, [])
+    source = StubSource(rows((1, 10, 1.0), (2, 20, 2.0)))
+
+    result = refresh(source, dataset_id, watermark_column="ts")
+    assert source.queries[-1]["query"] == SOURCE["query"]
+    assert result["rows"] == 2
+
+def test_null_watermark_column_is_rejected_instead_of_duplicating(store):
+    dataset_id = stored(store, rows((1, None, 1.0), (2, None, 2.0)))
+    source = StubSource(rows((1, None, 1.0), (2, None, 2.0)))
+
+    with pytest.raises(DatasetRefreshError):
+        refresh(source, dataset_id, watermark_column="ts", mode="append")
+    assert source.queries == []
+    assert store.get_metadata(dataset_id)["rows"] == 2
+
+def test_merged_batch_profiles_match_the_full_frame():
+    df = pd.DataFrame({
+        "x": [1.0, None, 3.5, -2.0, 8.0, None],
+        "n": [1, 2, 3, 4, 5, 6],
+        "label": ["a", "b", None, "a", "c", "a"]
+    })
+    full = profile_frame(df)
+    merged = profile_batches([df.iloc[:2], df.iloc[2:5], df.iloc[5:]])
+
+    assert merged.keys() == full.keys()
+    for col in ("x", "n"):
+        for field in ("count", "nulls", "min", "max"):
+            assert merged[col][field] == full[col][field]
+        assert merged[col]["sum"] == pytest.approx(full[col]["sum"])
+        assert merged[col]["sum_sq"] == pytest.approx(full[col]["sum_sq"])
+    assert merged["label"] == full["label"]
+
+def test_subtracting_rows_reverses_a_merge():
+    kept, removed = pd.DataFrame({"x": [1.0, 5.0, 3.0]}), pd.DataFrame({"x": [9.0]})
+    profile = merge_profiles(profile_frame(kept), profile_frame(removed))
+
+    stale = subtract_profile(profile, profile_frame(removed))
+    # The removed row held the maximum, which must be recomputed
+    assert stale == ["x"]
+    assert profile["x"]["count"] == 3
+    assert profile["x"]["sum"] == pytest.approx(9.0)
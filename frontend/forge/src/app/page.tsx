@@ -61,6 +61,7 @@ export default function Home() {
         type: 'file',
         data: {
           type: processedData.type,
+          dataset_id: processedData.dataset_id,
           data_type: processedData.data_type,
           data: dataArray.map(item => {
             if (typeof item !== 'object' || item === null) {
@@ -394,14 +395,20 @@ export default function Home() {
                             Excel (.xlsx, .xls)
                           </span>
                           <span className="px-2 py-1 bg-gray-600 rounded-md text-xs text-gray-300">
-                            JSON (.json)
+                            JSON (.json, .ndjson, .jsonl)
+                          </span>
+                          <span className="px-2 py-1 bg-gray-600 rounded-md text-xs text-gray-300">
+                            Parquet / Arrow (.parquet, .feather, .arrow)
+                          </span>
+                          <span className="px-2 py-1 bg-gray-600 rounded-md text-xs text-gray-300">
+                            Compressed (.gz, .bz2, .xz, .zst, .zip)
                           </span>
                           <span className="px-2 py-1 bg-gray-600 rounded-md text-xs text-gray-300">
                             Text (.txt)
                           </span>
                         </div>
                         <p className="text-xs text-gray-400 mt-2">
-                          Maximum file size: 10MB
+                          Maximum file size: 500MB
                         </p>
                       </div>
                       <input
@@ -409,7 +416,7 @@ export default function Home() {
                         onChange={handleFileUpload}
                         className="hidden"
                         id="file-upload"
-                        accept=".csv,.xlsx,.xls,.json,.txt"
+                        accept=".csv,.xlsx,.xls,.json,.ndjson,.jsonl,.parquet,.feather,.arrow,.txt,.gz,.bz2,.xz,.zst,.zip"
                         title="Upload data file"
                         aria-label="Upload data file"
                       />
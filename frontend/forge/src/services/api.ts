@@ -16,6 +16,76 @@ export const api = axios.create({
   withCredentials: true
 });
 
+interface ColumnarPayload {
+  format: 'columns';
+  columns: string[];
+  data: Record<string, unknown[]>;
+}
+
+interface SplitPayload {
+  format: 'split';
+  columns: string[];
+  data: unknown[][];
+}
+
+// Dataset payloads arrive column-oriented by default; expand them back into
+// row records for the components that render tables.
+export function toRecords(
+  payload: ProcessedData['data'] | ColumnarPayload | SplitPayload
+): ProcessedData['data'] {
+  if (!payload || Array.isArray(payload) || typeof payload !== 'object') {
+    return payload as ProcessedData['data'];
+  }
+  if (payload.format === 'columns' && Array.isArray(payload.columns)) {
+    const { columns, data } = payload as ColumnarPayload;
+    const length = columns.length ? data[columns[0]].length : 0;
+    return Array.from({ length }, (_, row) =>
+      Object.fromEntries(columns.map(column => [column, data[column][row]]))
+    );
+  }
+  if (payload.format === 'split' && Array.isArray(payload.columns)) {
+    const { columns, data } = payload as SplitPayload;
+    return data.map(row => Object.fromEntries(columns.map((column, i) => [column, row[i]])));
+  }
+  return payload as ProcessedData['data'];
+}
+
+interface UploadJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  stage: string;
+  bytes_total: number;
+  bytes_processed: number;
+  rows_parsed: number;
+  error: string | null;
+  result: ProcessedData | null;
+}
+
+interface UploadJobAccepted {
+  status: 'accepted';
+  job_id: string;
+  status_url: string;
+  job: UploadJob;
+}
+
+const UPLOAD_JOB_POLL_MS = 1000;
+
+async function pollUploadJob(jobId: string): Promise<ProcessedData> {
+  for (;;) {
+    const { data: job } = await api.get<UploadJob>(`/upload/jobs/${jobId}`);
+    if (job.status === 'completed') {
+      if (!job.result) {
+        throw new Error('File processing finished without a result');
+      }
+      return job.result;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'File processing failed');
+    }
+    await new Promise(resolve => setTimeout(resolve, UPLOAD_JOB_POLL_MS));
+  }
+}
+
 export const apiService = {
   // File Upload
   async uploadFile(file: File): Promise<{ status: string; processed_data: ProcessedData }> {
@@ -23,17 +93,26 @@ export const apiService = {
     formData.append('file', file);
 
     try {
-      const response = await api.post<{ status: string; processed_data: ProcessedData }>(
+      const response = await api.post<{ status: string; processed_data: ProcessedData } | UploadJobAccepted>(
         '/upload',
         formData,
         {
           headers: {
             'Content-Type': 'multipart/form-data',
           },
-          timeout: 30000
+          // Sending a file up to the size limit can take minutes; parsing
+          // large files is already bounded by the 202/poll flow
+          timeout: 0
         }
       );
-      return response.data;
+      // Large files are parsed by a background job; poll it until done
+      const processed_data = response.status === 202
+        ? await pollUploadJob((response.data as UploadJobAccepted).job_id)
+        : (response.data as { processed_data: ProcessedData }).processed_data;
+      return {
+        status: 'success',
+        processed_data: { ...processed_data, data: toRecords(processed_data.data) }
+      };
     } catch (error) {
       console.error('Upload error:', error);
       if (axios.isAxiosError(error)) {
@@ -42,7 +121,7 @@ export const apiService = {
         }
         throw new Error(error.response.data?.detail || 'File upload failed');
       }
-      throw new Error('File upload failed');
+      throw error instanceof Error ? error : new Error('File upload failed');
     }
   },
 
@@ -96,7 +175,8 @@ export const apiService = {
   async connectDatabase(params: DatabaseConnectionParams): Promise<DatabaseResponse> {
     try {
       const response = await api.post<DatabaseResponse>('/database/connect', params);
-      return response.data;
+      const { data } = response.data;
+      return { ...response.data, data: { ...data, data: toRecords(data.data) } };
     } catch (error) {
       console.error('Database connection error:', error);
       throw new Error(error instanceof Error ? error.message : 'Database connection failed');
@@ -19,6 +19,7 @@ export interface ProcessedDataResponse {
 
 export interface ProcessedData {
   type: 'structured' | 'unstructured';
+  dataset_id?: string;
   data: Record<string, unknown>[] | Record<string, unknown>;
   data_type?: 'time_series' | 'numerical' | 'categorical' | 'mixed';
   metadata?: {
@@ -39,6 +40,12 @@ export interface ProcessedData {
     background_processing?: boolean;
     processed?: boolean;
     processed_at?: string;
+    preview_rows?: number;
+    memory?: {
+      bytes_before: number;
+      bytes_after: number;
+      bytes_saved: number;
+    } | null;
   };
 }
 